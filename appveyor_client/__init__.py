@@ -7,7 +7,49 @@
 # -----------------------------------------------------------------------------
 """Appveyor Python Client."""
 
-from .client import AppveyorClient
+# Standard library imports
+import importlib
+import sys
+
+# Public names and the submodule defining them. They are imported on first
+# access where possible, so importing a submodule (like the command line
+# interface) does not import requests or asyncio.
+_EXPORTS = {
+    'AppveyorClient': 'client',
+    'AppveyorClientError': 'client',
+    'AppveyorError': 'client',
+    'AppveyorTimeoutError': 'client',
+    'Deadline': 'deadline',
+}
+
+if sys.version_info >= (3, 6):
+    _EXPORTS['AsyncAppveyorClient'] = 'aio'
+
+__all__ = sorted(_EXPORTS)
+
+if sys.version_info >= (3, 7):
+
+    def __getattr__(name):
+        """Import public names on first access."""
+        module = _EXPORTS.get(name)
+        if module is None:
+            raise AttributeError(
+                "module {!r} has no attribute {!r}".format(__name__, name))
+
+        value = getattr(importlib.import_module('.' + module, __name__), name)
+        globals()[name] = value
+        return value
+
+    def __dir__():
+        """List the module attributes, including lazy ones."""
+        return sorted(set(globals()) | set(_EXPORTS))
+else:
+    from .client import (AppveyorClient, AppveyorClientError, AppveyorError,
+                         AppveyorTimeoutError)
+    from .deadline import Deadline
+
+    if sys.version_info >= (3, 6):
+        from .aio import AsyncAppveyorClient
 
 VERSION_INFO = (0, 1, 1, 'dev0')
 __version__ = '.'.join(map(str, VERSION_INFO))
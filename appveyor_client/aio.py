@@ -0,0 +1,934 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Appveyor Python asyncio Client."""
+
+# Standard library imports
+import asyncio
+import re
+import time
+
+# Third party imports
+import requests.structures
+
+# Local imports
+from appveyor_client.client import (DEFAULT_TIMEOUT, TEXT_HEADERS,
+                                    AppveyorClient, AppveyorClientError,
+                                    AppveyorTimeoutError, Builds,
+                                    Collaborators, Deployments, Environments,
+                                    Projects, Roles, Users, _parse_contents)
+from appveyor_client.codec import JsonCodec, get_codec
+from appveyor_client.deadline import current_deadline
+from appveyor_client.metrics import RequestInfo
+from appveyor_client.models import to_models
+from appveyor_client.routes import ROUTES, TEXT
+from appveyor_client.search import _MAX_PENDING, LineScanner, LogMatch
+from appveyor_client.utils import (BatchResult, LineDecoder, parse_datetime,
+                                   timer, to_utc)
+from appveyor_client.waiter import FINAL_STATUSES
+
+# Sent when all the logs of a search were scanned
+_SEARCH_DONE = object()
+
+
+# --- Client
+class AsyncAppveyorClient(object):
+    """
+    Appveyor python asyncio client.
+
+    Exposes the same api groups as `AppveyorClient`, but every api method
+    returns a coroutine. All requests share a single pooled aiohttp session.
+    Requires `aiohttp`.
+
+    ::
+
+        async with AsyncAppveyorClient(token) as client:
+            projects = await client.projects.get()
+
+    https://www.appveyor.com/docs/api/
+    """
+
+    _HEADERS = AppveyorClient._HEADERS
+
+    def __init__(self,
+                 token,
+                 endpoint=None,
+                 session=None,
+                 limit=100,
+                 cache=None,
+                 retry=None,
+                 rate_limiter=None,
+                 limit_per_host=0,
+                 keep_alive=True,
+                 timeout=DEFAULT_TIMEOUT,
+                 single_flight=False,
+                 codec=None,
+                 models=False,
+                 metrics=None,
+                 transport=None):
+        """
+        Appveyor python asyncio client.
+
+        The token is validated on the first api call (or by awaiting
+        `verify`). An existing `aiohttp.ClientSession` can be passed to share
+        its connection pool, otherwise one is created lazily with at most
+        `limit` simultaneous connections (`limit_per_host` per host, 0 for no
+        limit). `cache`, `retry`, `rate_limiter`, `keep_alive`, `timeout`,
+        `single_flight`, `codec`, `models` and `metrics` behave as in
+        `AppveyorClient`.
+
+        Deadlines created with `deadline` also apply to the tasks started
+        inside their context, and cancel the requests still in flight when
+        the budget is spent.
+
+        `transport` is an optional `appveyor_client.transport` transport
+        answering requests from memory (like `MemoryTransport` or a
+        `CassetteTransport` in replay mode) instead of aiohttp.
+        """
+        try:
+            # Third party imports
+            import aiohttp
+        except ImportError:
+            raise AppveyorClientError('AsyncAppveyorClient requires aiohttp')
+
+        self._aiohttp = aiohttp
+        self._endpoint = endpoint or 'https://ci.appveyor.com/'
+        self._token = token
+        self._limit = limit
+        self._limit_per_host = limit_per_host
+        self._keep_alive = keep_alive
+        self._timeout = timeout
+        self._session = session
+        self._owns_session = session is None
+        self._verified = False
+        self._verify_lock = None
+        self._cache = cache
+        self._retry = retry
+        self._rate_limiter = rate_limiter
+        self._single_flight = AsyncSingleFlight() if single_flight else None
+        self._codec = codec if isinstance(codec, JsonCodec) else get_codec(
+            codec)
+        self._models = models
+        self._transport = transport
+        self._hooks = {'pre_request': [], 'post_request': []}
+        if metrics is not None:
+            self.add_hook('pre_request', metrics.pre_request)
+            self.add_hook('post_request', metrics.post_request)
+        self._headers = dict(self._HEADERS)
+        self._headers['Authorization'] = "Bearer {}".format(token)
+
+        # Groups
+        self.users = Users(self)
+        self.collaborators = Collaborators(self)
+        self.roles = Roles(self)
+        self.projects = AsyncProjects(self)
+        self.builds = AsyncBuilds(self)
+        self.environments = Environments(self)
+        self.deployments = Deployments(self)
+
+    async def __aenter__(self):
+        """Enter the async context."""
+        return self
+
+    async def __aexit__(self, *exc_info):
+        """Close the session on exit of the async context."""
+        await self.close()
+
+    async def close(self):
+        """Close the underlying session if it was created by the client."""
+        if self._session is not None and self._owns_session:
+            await self._session.close()
+            self._session = None
+
+    add_hook = AppveyorClient.add_hook
+    remove_hook = AppveyorClient.remove_hook
+    deadline = AppveyorClient.deadline
+    _check_deadline = staticmethod(AppveyorClient._check_deadline)
+
+    # --- Helpers
+    def _make_url(self, url):
+        """Create full api url."""
+        return '{}{}'.format(self._endpoint, url)
+
+    def _get_session(self):
+        """Return the shared session, creating it on first use."""
+        if self._session is None:
+            aiohttp = self._aiohttp
+            connector = aiohttp.TCPConnector(
+                limit=self._limit,
+                limit_per_host=self._limit_per_host,
+                force_close=not self._keep_alive)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=self._headers,
+                timeout=self._client_timeout(self._timeout))
+        return self._session
+
+    def _open(self, method, url, **kwargs):
+        """Return an async context manager sending a request."""
+        if self._transport is None:
+            return self._get_session().request(method, self._make_url(url),
+                                               **kwargs)
+
+        headers = dict(self._headers)
+        headers.update(kwargs.get('headers') or {})
+        status_code, response_headers, body = self._transport.respond(
+            method, url, headers, kwargs.get('data'))
+        return _TransportResponse(status_code, response_headers, body)
+
+    def _client_timeout(self, timeout, deadline=None):
+        """
+        Convert seconds or a (connect, read) tuple to a ClientTimeout.
+
+        The total time is limited to the time left before `deadline`.
+        """
+        aiohttp = self._aiohttp
+        total = None if deadline is None else max(0, deadline.remaining())
+        if timeout is None:
+            return aiohttp.ClientTimeout(total=total)
+        elif isinstance(timeout, tuple):
+            connect, read = timeout
+            return aiohttp.ClientTimeout(total=total, sock_connect=connect,
+                                         sock_read=read)
+        else:
+            return aiohttp.ClientTimeout(
+                total=timeout if total is None else min(timeout, total))
+
+    async def _sleep(self, delay, deadline, method, url):
+        """Wait before a retry, failing early if it outlasts the deadline."""
+        if deadline is not None and delay >= deadline.remaining():
+            raise AppveyorTimeoutError(
+                '{} {} deadline of {}s exceeded before retry'.format(
+                    method, url, deadline.timeout))
+        await asyncio.sleep(delay)
+
+    async def _fetch(self, method, url, idempotent=None, stream=False,
+                     **kwargs):
+        """
+        Send request applying the rate limiter and retry policy.
+
+        Return the status code, headers and body of the response.
+        `idempotent` overrides the idempotency of the method for retries.
+        With `stream` the body is not read, and an open `_StreamResponse`
+        is returned in its place.
+        """
+        aiohttp = self._aiohttp
+        retry = self._retry
+        attempt = 0
+        if not self._owns_session and self._timeout is not None:
+            kwargs.setdefault('timeout', self._client_timeout(self._timeout))
+        deadline = current_deadline()
+        while True:
+            if self._rate_limiter is not None:
+                wait = self._rate_limiter.reserve()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+
+            try:
+                if deadline is None:
+                    response, body = await self._fetch_once(
+                        method, url, attempt, stream, **kwargs)
+                else:
+                    # Cancel the request in flight once the budget is spent
+                    self._check_deadline(deadline, method, url)
+                    response, body = await asyncio.wait_for(
+                        self._fetch_once(method, url, attempt, stream,
+                                         **kwargs),
+                        deadline.remaining())
+            except (aiohttp.ClientConnectionError,
+                    asyncio.TimeoutError) as error:
+                if deadline is not None:
+                    self._check_deadline(deadline, method, url)
+                if retry is None or not retry.is_retryable(
+                        method, attempt, idempotent=idempotent):
+                    if isinstance(error, asyncio.TimeoutError):
+                        raise AppveyorTimeoutError(
+                            '{} {} timed out'.format(method, url))
+                    raise
+                await self._sleep(retry.delay(attempt), deadline, method, url)
+            else:
+                status_code = response.status
+                if retry is None or not retry.is_retryable(
+                        method, attempt, status_code, idempotent):
+                    return status_code, response.headers, body
+                if stream:
+                    await body.close()
+                await self._sleep(
+                    retry.delay(attempt, response.headers.get('Retry-After')),
+                    deadline, method, url)
+
+            attempt += 1
+
+    def _parse_body(self, status_code, body):
+        """Parse response body bytes and convert to json if possible."""
+        return _parse_contents(status_code, lambda: self._codec.loads(body),
+                               lambda: body.decode('utf-8', 'replace'))
+
+    async def _fetch_once(self, method, url, attempt, stream=False,
+                          **kwargs):
+        """Send a single request attempt, running the request hooks."""
+        pre_hooks = self._hooks['pre_request']
+        post_hooks = self._hooks['post_request']
+        if not pre_hooks and not post_hooks:
+            if stream:
+                response = await _StreamResponse.open(
+                    self._open(method, url, **kwargs))
+                return response, response
+            async with self._open(method, url, **kwargs) as response:
+                return response, await response.read()
+
+        data = kwargs.get('data')
+        info = RequestInfo(method, url, attempt, len(data) if data else 0)
+        for hook in pre_hooks:
+            hook(info)
+
+        info.started = time.time()
+        start = timer()
+
+        def finish(bytes_received, error=None):
+            info.bytes_received = bytes_received
+            info.error = error
+            info.elapsed = timer() - start
+            for hook in post_hooks:
+                hook(info)
+
+        try:
+            if stream:
+                # Count the bytes actually read, see `_StreamResponse.close`
+                response = await _StreamResponse.open(
+                    self._open(method, url, **kwargs), finish)
+                info.status_code = response.status
+                return response, response
+
+            async with self._open(method, url, **kwargs) as response:
+                body = await response.read()
+        except Exception as error:
+            finish(0, error)
+            raise
+
+        info.status_code = response.status
+        finish(len(body))
+        return response, body
+
+    async def _send(self,
+                    method,
+                    url,
+                    data=None,
+                    json=None,
+                    headers=None,
+                    idempotent=None,
+                    cacheable=True):
+        """
+        Send request and parse the response contents.
+
+        GET responses are only cached if `cacheable`, and `idempotent`
+        overrides the idempotency of the method for retries. Other methods
+        always invalidate the cached entries of the resource.
+        """
+        cache = self._cache
+        if method == 'GET' and not cacheable:
+            cache = None
+        entry = None
+        if not self._owns_session:
+            headers = dict(self._headers, **headers or {})
+
+        scope = (self._endpoint, self._headers['Authorization'])
+        if cache is not None and method == 'GET':
+            entry = cache.get(url, scope)
+            if entry is not None and cache.is_fresh(entry):
+                return self._parse_body(200, entry.body)
+            if entry is not None and entry.etag:
+                headers = dict(headers or {})
+                headers['If-None-Match'] = entry.etag
+
+        if method == 'GET' and self._single_flight is not None:
+            key = (url, tuple(sorted((headers or {}).items())))
+            response = await self._single_flight.do(
+                key, self._fetch, method, url, headers=headers)
+        else:
+            response = await self._fetch(
+                method, url, idempotent=idempotent, data=data, json=json,
+                headers=headers)
+            if method != 'GET' and self._single_flight is not None:
+                self._single_flight.forget()
+        status_code, response_headers, body = response
+
+        if cache is not None:
+            if method != 'GET':
+                cache.invalidate(url)
+            elif status_code == 304 and entry is not None:
+                cache.refresh(url, scope)
+                return self._parse_body(200, entry.body)
+
+        contents = self._parse_body(status_code, body)
+        if cache is not None and method == 'GET' and status_code == 200:
+            cache.store(url, body, response_headers.get('ETag'), scope)
+        return contents
+
+    async def _call(self, route, args=(), query=None, body=None):
+        """
+        Send a request to an api route and return the response contents.
+
+        Same as `AppveyorClient._call`, as a coroutine.
+        """
+        if not self._verified:
+            await self.verify()
+
+        url = route.format(args, query)
+        headers = None
+        if body is not None:
+            if route.body == TEXT:
+                body, headers = body.encode('utf-8'), TEXT_HEADERS
+            else:
+                body = self._codec.dumps(body)
+
+        contents = await self._send(route.method, url, data=body,
+                                    headers=headers,
+                                    idempotent=route.idempotent,
+                                    cacheable=route.cacheable)
+        return to_models(contents) if self._models else contents
+
+    async def batch(self, name, items, max_workers=8):
+        """
+        Call an idempotent api route concurrently for many arguments.
+
+        Same as `AppveyorClient.batch`, as an async generator running at
+        most `max_workers` requests at a time.
+        """
+        route = ROUTES[name]
+        if not route.idempotent or route.stream:
+            raise AppveyorClientError(
+                'Route {} cannot be batched'.format(name))
+
+        async def call(*args):
+            return await self._call(route, args)
+
+        async for result in fan_out(call, items, max_workers):
+            yield result
+
+    async def _request(self, method_url, body=None, json=None):
+        """Send a request to a 'VERB /path' url of an undeclared endpoint."""
+        if not self._verified:
+            await self.verify()
+
+        if json is not None:
+            body = self._codec.dumps(json)
+
+        method, url = method_url.split(' ')
+        contents = await self._send(method, url, data=body)
+        return to_models(contents) if self._models else contents
+
+    async def _stream_request(self,
+                              route,
+                              args=(),
+                              offset=0,
+                              chunk_size=65536,
+                              resume_attempts=3):
+        """
+        Download the response body of a route in chunks of bytes.
+
+        Same as `AppveyorClient._stream_request`, as an async generator.
+        """
+        if not self._verified:
+            await self.verify()
+
+        aiohttp = self._aiohttp
+        method, url = route.method, route.format(args)
+        deadline = current_deadline()
+        attempts = 0
+        while True:
+            headers = None if self._owns_session else dict(self._headers)
+            if offset:
+                headers = headers or {}
+                headers['Range'] = 'bytes={}-'.format(offset)
+
+            kwargs = {}
+            if deadline is not None:
+                # Limit the download, not only the response headers
+                kwargs['timeout'] = self._client_timeout(self._timeout,
+                                                         deadline)
+
+            status_code, _, response = await self._fetch(
+                method, url, idempotent=route.idempotent, stream=True,
+                headers=headers, **kwargs)
+            received = 0
+            failure = None
+            try:
+                if status_code == 416:
+                    return
+                elif status_code not in (200, 206):
+                    body = await response.read()
+                    received = len(body)
+                    self._parse_body(status_code, body)
+                    return
+
+                skip = offset if status_code == 200 else 0
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    received += len(chunk)
+                    if skip:
+                        if len(chunk) <= skip:
+                            skip -= len(chunk)
+                            continue
+                        chunk, skip = chunk[skip:], 0
+
+                    offset += len(chunk)
+                    yield chunk
+                    if deadline is not None:
+                        self._check_deadline(deadline, method, url)
+                return
+            except (aiohttp.ClientPayloadError,
+                    aiohttp.ClientConnectionError) as error:
+                failure = error
+                if deadline is not None:
+                    self._check_deadline(deadline, method, url)
+                if attempts >= resume_attempts:
+                    raise
+                attempts += 1
+            except asyncio.TimeoutError as error:
+                failure = error
+                raise AppveyorTimeoutError('{} {} timed out'.format(method,
+                                                                    url))
+            finally:
+                await response.close(received, failure)
+
+    async def _authenticate(self):
+        """Authenticate appveyor with bearer token."""
+        # Never validate a token from a cached response
+        contents = await self._send('GET', '/api/roles', cacheable=False)
+        self._verified = True
+        with AppveyorClient._VERIFIED_TOKENS_LOCK:
+            AppveyorClient._VERIFIED_TOKENS.add((self._endpoint, self._token))
+        return contents
+
+    async def verify(self):
+        """
+        Validate the client token.
+
+        Concurrent callers wait on a single validation request, and tokens
+        already validated by any client in the process are not checked again.
+        """
+        if self._verified:
+            return
+
+        if self._verify_lock is None:
+            self._verify_lock = asyncio.Lock()
+
+        async with self._verify_lock:
+            if self._verified:
+                return
+
+            key = (self._endpoint, self._token)
+            with AppveyorClient._VERIFIED_TOKENS_LOCK:
+                verified = key in AppveyorClient._VERIFIED_TOKENS
+
+            if verified:
+                self._verified = True
+            else:
+                await self._authenticate()
+
+
+class _TransportResponse(object):
+    """Minimal aiohttp like response of an in-memory transport."""
+
+    def __init__(self, status, headers, body):
+        """Minimal aiohttp like response of an in-memory transport."""
+        self.status = status
+        self.headers = requests.structures.CaseInsensitiveDict(headers)
+        self.content = self
+        self._body = body
+
+    async def __aenter__(self):
+        """Enter the response context."""
+        return self
+
+    async def __aexit__(self, *exc_info):
+        """Exit the response context."""
+
+    async def read(self):
+        """Return the response body."""
+        return self._body
+
+    async def iter_chunked(self, chunk_size):
+        """Iterate over the response body in chunks."""
+        body = self._body
+        for start in range(0, len(body), chunk_size):
+            yield body[start:start + chunk_size]
+
+
+class _StreamResponse(object):
+    """Response left open to stream its body, see `_fetch`."""
+
+    def __init__(self, context, response, finish=None):
+        """Response left open to stream its body, see `_fetch`."""
+        self.status = response.status
+        self.headers = response.headers
+        self.content = response.content
+        self._context = context
+        self._response = response
+        self._finish = finish
+
+    @classmethod
+    async def open(cls, context, finish=None):
+        """Enter a request context manager, keeping its response open."""
+        return cls(context, await context.__aenter__(), finish)
+
+    async def read(self):
+        """Return the response body."""
+        return await self._response.read()
+
+    async def close(self, bytes_received=0, error=None):
+        """Release the response, running the post request hooks once."""
+        context, self._context = self._context, None
+        finish, self._finish = self._finish, None
+        try:
+            if context is not None:
+                await context.__aexit__(None, None, None)
+        finally:
+            if finish is not None:
+                finish(bytes_received, error)
+
+
+class AsyncSingleFlight(object):
+    """
+    Coalesce concurrent identical coroutine calls into one.
+
+    Tasks awaiting `do` with a key while a call for the same key is in
+    progress receive its result, or its error, instead of making their own
+    call. Cancelling one of the waiting tasks does not cancel the call.
+    """
+
+    def __init__(self):
+        """Coalesce concurrent identical coroutine calls into one."""
+        self._flights = {}
+
+    async def do(self, key, func, *args, **kwargs):
+        """Await `func(*args, **kwargs)` unless a call for key is running."""
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = asyncio.ensure_future(func(*args, **kwargs))
+            self._flights[key] = flight
+
+            def done(future):
+                if self._flights.get(key) is future:
+                    del self._flights[key]
+
+            flight.add_done_callback(done)
+
+        return await asyncio.shield(flight)
+
+    def forget(self):
+        """Make later calls start afresh instead of joining running ones."""
+        self._flights.clear()
+
+
+class AsyncProjects(Projects):
+    """Appveyor project api methods for the asyncio client."""
+
+    async def last_builds(self, projects, max_workers=8):
+        """
+        Get the last build of many projects concurrently.
+
+        Same as `Projects.last_builds`, as an async generator running at most
+        `max_workers` requests at a time.
+        """
+        async for result in self._client.batch('projects.last_build',
+                                               projects, max_workers):
+            yield result
+
+    async def search_logs(self,
+                          account_name,
+                          project_slug,
+                          builds,
+                          pattern,
+                          context=0,
+                          max_matches=None,
+                          max_workers=8):
+        """
+        Search the job logs of project builds concurrently.
+
+        Same as `Projects.search_logs`, as an async generator.
+        """
+        versions = [(account_name, project_slug,
+                     build['version'] if hasattr(build, 'get') else build)
+                    for build in builds]
+        job_ids = []
+        async for result in fan_out(self.build, versions, max_workers):
+            if result.error is not None:
+                raise result.error
+            job_ids.extend(job['jobId'] for job in result.result['build'][
+                'jobs'])
+
+        async for match in self._client.builds.search_logs(
+                job_ids, pattern, context=context, max_matches=max_matches,
+                max_workers=max_workers):
+            yield match
+
+    async def last_branch_builds(self, projects, max_workers=8):
+        """
+        Get the last branch build of many projects concurrently.
+
+        Same as `Projects.last_branch_builds`, as an async generator.
+        """
+        async for result in self._client.batch('projects.last_branch_build',
+                                               projects, max_workers):
+            yield result
+
+    async def iter_history(self,
+                           account_name,
+                           project_slug,
+                           branch=None,
+                           since=None,
+                           limit=None,
+                           records_per_page=50):
+        """
+        Iterate asynchronously over project history builds, newest first.
+
+        Same as `Projects.iter_history`, with the next page fetched in a
+        background task while the current one is consumed.
+        """
+        def fetch(start_build_id):
+            return asyncio.ensure_future(
+                self.history(
+                    account_name,
+                    project_slug,
+                    records_per_page=records_per_page,
+                    start_build_id=start_build_id,
+                    branch=branch))
+
+        since = to_utc(since)
+        count = 0
+        pending = fetch(None)
+        try:
+            while pending is not None:
+                page = await pending
+                builds = page.get('builds') or []
+                remaining = None if limit is None else limit - count
+
+                if len(builds) < records_per_page or (
+                        remaining is not None and remaining <= len(builds)):
+                    pending = None
+                else:
+                    pending = fetch(builds[-1]['buildId'])
+
+                for build in builds:
+                    if (since is not None and
+                            parse_datetime(build['created']) < since):
+                        return
+
+                    yield build
+                    count += 1
+
+                    if limit is not None and count >= limit:
+                        return
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+
+class AsyncBuilds(Builds):
+    """Appveyor build api methods for the asyncio client."""
+
+    async def log(self, job_id):
+        """
+        Download build log.
+
+        Return the full log text.
+        """
+        chunks = [chunk async for chunk in self.log_stream(job_id)]
+        return b''.join(chunks).decode('utf-8', 'replace')
+
+    async def log_lines(self, job_id, offset=0):
+        """Download build log yielding one line of text at a time."""
+        decoder = LineDecoder()
+        async for chunk in self.log_stream(job_id, offset=offset):
+            for line in decoder.feed(chunk):
+                yield line
+
+        for line in decoder.close():
+            yield line
+
+    async def download_log(self, job_id, fileobj, offset=0):
+        """
+        Download build log to a binary file object without buffering it.
+
+        Return the number of bytes written.
+        """
+        written = 0
+        async for chunk in self.log_stream(job_id, offset=offset):
+            fileobj.write(chunk)
+            written += len(chunk)
+        return written
+
+    async def follow_log(self,
+                         account_name,
+                         project_slug,
+                         build_version,
+                         job_id,
+                         offset=0,
+                         min_interval=1,
+                         max_interval=30):
+        """
+        Follow the log of a running job, yielding new lines as they appear.
+
+        Same as `Builds.follow_log`, as an async generator. Run several of
+        them concurrently to follow many jobs.
+        """
+        decoder = LineDecoder()
+        interval = min_interval
+        finished = False
+        while True:
+            received = 0
+            async for chunk in self.log_stream(job_id, offset=offset):
+                offset += len(chunk)
+                received += len(chunk)
+                for line in decoder.feed(chunk):
+                    yield line
+
+            if finished:
+                for line in decoder.close():
+                    yield line
+                return
+
+            if received:
+                interval = min_interval
+            else:
+                result = await self._client.projects.build(
+                    account_name, project_slug, build_version)
+                statuses = dict((job['jobId'], job.get('status'))
+                                for job in result['build']['jobs'])
+                if statuses.get(job_id) in FINAL_STATUSES:
+                    # Read once more, bytes may have been written meanwhile
+                    finished = True
+                    continue
+                interval = min(max_interval, interval * 2)
+
+            await asyncio.sleep(interval)
+
+    async def search_logs(self,
+                          job_ids,
+                          pattern,
+                          context=0,
+                          max_matches=None,
+                          max_workers=8):
+        """
+        Search the logs of many jobs concurrently.
+
+        Same as `Builds.search_logs`, as an async generator.
+        """
+        regex = pattern if hasattr(pattern, 'search') else re.compile(pattern)
+        results = asyncio.Queue(maxsize=_MAX_PENDING)
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def scan(job_id):
+            async with semaphore:
+                scanner = LineScanner(regex, context)
+                async for line in self.log_lines(job_id):
+                    for match in scanner.feed(line):
+                        await results.put(LogMatch(job_id, *match))
+                for match in scanner.close():
+                    await results.put(LogMatch(job_id, *match))
+
+        async def scan_all():
+            errors = await asyncio.gather(
+                *[scan(job_id) for job_id in job_ids], return_exceptions=True)
+            await results.put(_SEARCH_DONE)
+            return [error for error in errors if error is not None]
+
+        task = asyncio.ensure_future(scan_all())
+        count = 0
+        try:
+            while True:
+                item = await results.get()
+                if item is _SEARCH_DONE:
+                    break
+
+                yield item
+                count += 1
+                if max_matches is not None and count >= max_matches:
+                    return
+        finally:
+            task.cancel()
+
+        errors = task.result()
+        if errors:
+            raise errors[0]
+
+    async def download_artifact(self, job_id, file_name, path, size=None):
+        """
+        Download a job artifact to a file without buffering it in memory.
+
+        Same as `Builds.download_artifact`.
+        """
+        offset = self._resume_offset(path, size)
+        if offset is None:
+            return 0
+
+        written = 0
+        with open(path, 'ab' if offset else 'wb') as f:
+            async for chunk in self.artifact_stream(job_id, file_name,
+                                                    offset=offset):
+                f.write(chunk)
+                written += len(chunk)
+
+        self._check_size(path, size, offset + written)
+        return written
+
+    async def download_artifacts(self, job_ids, directory, max_workers=4):
+        """
+        Download all the artifacts of many jobs concurrently.
+
+        Same as `Builds.download_artifacts`, as an async generator.
+        """
+        downloads = []
+        async for listing in fan_out(self.artifacts, [(job_id, )
+                                                      for job_id in job_ids],
+                                     max_workers=max_workers):
+            job_id = listing.item[0]
+            if listing.error is not None:
+                yield BatchResult((job_id, None, None), None, listing.error)
+                continue
+
+            for artifact in listing.result:
+                file_name = artifact['fileName']
+                try:
+                    path = self._artifact_path(directory, job_id, file_name)
+                except AppveyorClientError as error:
+                    yield BatchResult((job_id, file_name, None), None, error)
+                    continue
+
+                downloads.append((job_id, file_name, path,
+                                  artifact.get('size')))
+
+        async for result in fan_out(self.download_artifact, downloads,
+                                    max_workers=max_workers):
+            yield result._replace(item=result.item[:3])
+
+
+async def fan_out(func, items, max_workers=8):
+    """
+    Await `func(*item)` for every item, at most `max_workers` at a time.
+
+    Yield a `BatchResult` for each item as soon as its call completes, with
+    the exception raised by the call (if any) stored in `error`. Pending
+    calls are cancelled if the generator is closed early.
+    """
+    semaphore = asyncio.Semaphore(max_workers)
+
+    async def call(item):
+        async with semaphore:
+            try:
+                return BatchResult(item, await func(*item), None)
+            except Exception as error:
+                return BatchResult(item, None, error)
+
+    tasks = [asyncio.ensure_future(call(item)) for item in items]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,480 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""
+Appveyor Python Client build duration, queue time and failure analytics.
+
+Build histories are stored in compact columns (`array` typed arrays) and
+analyzed per project or per branch in vectorized form with NumPy when it
+is installed, or with plain Python loops otherwise.
+
+::
+
+    analytics = BuildAnalytics()
+    analytics.add_history(client, [('account', 'project')])
+    for key, stats in analytics.summary(by='branch').items():
+        print(key, stats['duration_p95'], stats['failure_rate'])
+"""
+
+# Standard library imports
+import array
+import collections
+import math
+import threading
+
+try:
+    # Third party imports
+    import numpy
+except ImportError:
+    numpy = None
+
+# Local imports
+from appveyor_client.client import AppveyorClientError
+from appveyor_client.utils import epoch_seconds, fan_out, from_epoch_seconds
+
+NAN = float('nan')
+DAY = 86400.0
+
+# Metrics available for percentiles, rolling windows and trends: build
+# duration and queue time in seconds, and 1.0 for failed builds (0.0 for
+# successful ones, other statuses are ignored)
+METRICS = ('duration', 'queue_time', 'failed')
+
+# Group keys: (account_name, project_slug) or (account_name, project_slug,
+# branch)
+GROUPS = ('project', 'branch')
+
+Window = collections.namedtuple('Window',
+                                ['end', 'count', 'failure_rate', 'mean'])
+
+
+def _seconds(value):
+    """Return an api datetime as UTC epoch seconds, NaN if missing."""
+    seconds = epoch_seconds(value)
+    return NAN if seconds is None else seconds
+
+
+# --- Backends
+class _NumpyBackend(object):
+    """Grouped statistics computed with NumPy array operations."""
+
+    name = 'numpy'
+
+    def column(self, values):
+        """Return a typed array as a NumPy array."""
+        return numpy.array(values, dtype=values.typecode)
+
+    def counts(self, codes, groups):
+        """Return the number of rows of each group."""
+        return numpy.bincount(codes, minlength=groups).tolist()
+
+    def sums(self, codes, values, groups):
+        """Return the count and sum of the non NaN values of each group."""
+        valid = ~numpy.isnan(values)
+        codes = codes[valid]
+        counts = numpy.bincount(codes, minlength=groups)
+        sums = numpy.bincount(codes, weights=values[valid], minlength=groups)
+        return counts.tolist(), sums.tolist()
+
+    def percentiles(self, codes, values, groups, qs):
+        """Return the percentiles of the non NaN values of each group."""
+        valid = ~numpy.isnan(values)
+        codes, values = codes[valid], values[valid]
+        values = values[numpy.lexsort((values, codes))]
+        counts = numpy.bincount(codes, minlength=groups)
+        starts = numpy.cumsum(counts) - counts
+        result = numpy.full((groups, len(qs)), NAN)
+        present = counts > 0
+        starts, counts = starts[present], counts[present]
+        for column, q in enumerate(qs):
+            # Linear interpolation between the closest ranks
+            position = starts + (counts - 1) * (q / 100.0)
+            low = numpy.floor(position).astype(numpy.int64)
+            high = numpy.minimum(low + 1, starts + counts - 1)
+            result[present, column] = values[low] + (
+                values[high] - values[low]) * (position - low)
+        return result.tolist()
+
+    def rolling(self, codes, times, values, failed, groups, window, step):
+        """Return the (end, count, failure_rate, mean) windows of groups."""
+        valid = ~numpy.isnan(times)
+        codes, times = codes[valid], times[valid]
+        values, failed = values[valid], failed[valid]
+        order = numpy.lexsort((times, codes))
+        times, values, failed = times[order], values[order], failed[order]
+        ends = numpy.cumsum(numpy.bincount(codes, minlength=groups))
+        starts = ends - numpy.bincount(codes, minlength=groups)
+
+        def cumulative(column):
+            present = ~numpy.isnan(column)
+            sums = numpy.cumsum(numpy.where(present, column, 0.0))
+            counts = numpy.cumsum(present)
+            return (numpy.concatenate(([0.0], sums)),
+                    numpy.concatenate(([0], counts)))
+
+        value_sums, value_counts = cumulative(values)
+        failure_sums, outcome_counts = cumulative(failed)
+
+        result = []
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            for start, end in zip(starts.tolist(), ends.tolist()):
+                if start == end:
+                    result.append([])
+                    continue
+
+                group_times = times[start:end]
+                window_ends = numpy.arange(
+                    math.floor(group_times[0] / step) * step + step,
+                    group_times[-1] + step, step)
+                low = start + numpy.searchsorted(
+                    group_times, window_ends - window, 'right')
+                high = start + numpy.searchsorted(group_times, window_ends,
+                                                  'right')
+                means = (value_sums[high] - value_sums[low]) / (
+                    value_counts[high] - value_counts[low])
+                rates = (failure_sums[high] - failure_sums[low]) / (
+                    outcome_counts[high] - outcome_counts[low])
+                result.append(list(zip(window_ends.tolist(),
+                                       (high - low).tolist(), rates.tolist(),
+                                       means.tolist())))
+        return result
+
+    def trend(self, codes, times, values, groups):
+        """Return the least squares slope of the values of each group."""
+        valid = ~(numpy.isnan(times) | numpy.isnan(values))
+        codes, x, y = codes[valid], times[valid] / DAY, values[valid]
+        counts = numpy.bincount(codes, minlength=groups)
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            # Center each group to keep the sums small
+            x = x - (numpy.bincount(codes, weights=x, minlength=groups) /
+                     counts)[codes]
+            y = y - (numpy.bincount(codes, weights=y, minlength=groups) /
+                     counts)[codes]
+            variance = numpy.bincount(codes, weights=x * x, minlength=groups)
+            covariance = numpy.bincount(codes, weights=x * y,
+                                        minlength=groups)
+            slopes = covariance / variance
+        slopes[~(variance > 0)] = NAN
+        return slopes.tolist()
+
+
+class _ArrayBackend(object):
+    """Grouped statistics computed with Python loops."""
+
+    name = 'array'
+
+    def column(self, values):
+        """Return a typed array unchanged."""
+        return values
+
+    def _split(self, codes, groups, *columns, **kwargs):
+        """
+        Return the rows of each group.
+
+        Rows with NaN values are skipped, only checking the first
+        `required` columns (all by default).
+        """
+        required = kwargs.get('required', len(columns))
+        rows = [[] for _ in range(groups)]
+        for code, row in zip(codes, zip(*columns)):
+            if not any(math.isnan(value) for value in row[:required]):
+                rows[code].append(row)
+        return rows
+
+    def counts(self, codes, groups):
+        """Return the number of rows of each group."""
+        counts = [0] * groups
+        for code in codes:
+            counts[code] += 1
+        return counts
+
+    def sums(self, codes, values, groups):
+        """Return the count and sum of the non NaN values of each group."""
+        counts, sums = [0] * groups, [0.0] * groups
+        for code, value in zip(codes, values):
+            if not math.isnan(value):
+                counts[code] += 1
+                sums[code] += value
+        return counts, sums
+
+    def percentiles(self, codes, values, groups, qs):
+        """Return the percentiles of the non NaN values of each group."""
+        result = []
+        for rows in self._split(codes, groups, values):
+            ordered = sorted(value for value, in rows)
+            row = []
+            for q in qs:
+                if not ordered:
+                    row.append(NAN)
+                    continue
+                position = (len(ordered) - 1) * (q / 100.0)
+                low = int(math.floor(position))
+                high = min(low + 1, len(ordered) - 1)
+                row.append(ordered[low] + (ordered[high] - ordered[low]) *
+                           (position - low))
+            result.append(row)
+        return result
+
+    def rolling(self, codes, times, values, failed, groups, window, step):
+        """Return the (end, count, failure_rate, mean) windows of groups."""
+        result = []
+        for rows in self._split(codes, groups, times, values, failed,
+                                required=1):
+            rows.sort(key=lambda row: row[0])
+            windows = []
+            if rows:
+                first = math.floor(rows[0][0] / step) * step + step
+                low = high = index = 0
+                # Sums and counts of the non NaN values in the window
+                sums = [0.0, 0.0]
+                counts = [0, 0]
+                while True:
+                    end = first + index * step
+                    while high < len(rows) and rows[high][0] <= end:
+                        self._add(rows[high], sums, counts, 1)
+                        high += 1
+                    while low < high and rows[low][0] <= end - window:
+                        self._add(rows[low], sums, counts, -1)
+                        low += 1
+                    windows.append((end, high - low,
+                                    sums[1] / counts[1] if counts[1] else NAN,
+                                    sums[0] / counts[0] if counts[0] else NAN))
+                    if end >= rows[-1][0]:
+                        break
+                    index += 1
+            result.append(windows)
+        return result
+
+    @staticmethod
+    def _add(row, sums, counts, sign):
+        """Add or remove the value and failure of a row from a window."""
+        for column, value in enumerate(row[1:]):
+            if not math.isnan(value):
+                sums[column] += sign * value
+                counts[column] += sign
+
+    def trend(self, codes, times, values, groups):
+        """Return the least squares slope of the values of each group."""
+        slopes = []
+        for rows in self._split(codes, groups, times, values):
+            if not rows:
+                slopes.append(NAN)
+                continue
+            mean_x = sum(time for time, _ in rows) / len(rows) / DAY
+            mean_y = sum(value for _, value in rows) / len(rows)
+            variance = covariance = 0.0
+            for time, value in rows:
+                x = time / DAY - mean_x
+                variance += x * x
+                covariance += x * (value - mean_y)
+            slopes.append(covariance / variance if variance > 0 else NAN)
+        return slopes
+
+
+BACKENDS = {
+    'numpy': _NumpyBackend,
+    'array': _ArrayBackend,
+}
+
+
+# --- Analytics
+class BuildAnalytics(object):
+    """
+    Columnar store of build histories with grouped statistics.
+
+    Builds are added page by page (by `add_builds` or `add_history`) and
+    stored as typed arrays of creation times, queue times, durations and
+    outcomes, so a year of history of hundreds of projects takes a few
+    megabytes. Statistics are grouped by project (`by='project'`, keys are
+    `(account_name, project_slug)` tuples) or by branch (`by='branch'`,
+    keys are `(account_name, project_slug, branch)` tuples).
+
+    `backend` is 'numpy' or 'array' (plain Python), by default NumPy is
+    used when it is installed.
+    """
+
+    def __init__(self, backend=None):
+        """Columnar store of build histories with grouped statistics."""
+        if backend is None:
+            backend = 'array' if numpy is None else 'numpy'
+        elif backend not in BACKENDS:
+            raise ValueError('Unknown analytics backend: {}'.format(backend))
+        elif backend == 'numpy' and numpy is None:
+            raise AppveyorClientError('The numpy backend requires numpy')
+
+        self._backend = BACKENDS[backend]()
+        self._lock = threading.Lock()
+        # Group keys by code, and codes by group key
+        self._keys = {'project': [], 'branch': []}
+        self._codes = {'project': {}, 'branch': {}}
+        self._columns = {
+            'project': array.array('l'),
+            'branch': array.array('l'),
+            'created': array.array('d'),
+            'queue_time': array.array('d'),
+            'duration': array.array('d'),
+            'failed': array.array('d'),
+        }
+
+    def __len__(self):
+        """Return the number of builds stored."""
+        return len(self._columns['created'])
+
+    @property
+    def backend(self):
+        """Return the name of the backend used for the statistics."""
+        return self._backend.name
+
+    # --- Ingestion
+    def _code(self, by, key):
+        """Return the code of a group key, adding it if needed."""
+        code = self._codes[by].get(key)
+        if code is None:
+            code = self._codes[by][key] = len(self._keys[by])
+            self._keys[by].append(key)
+        return code
+
+    def add_builds(self, account_name, project_slug, builds):
+        """Add the builds of a project, like a history page."""
+        rows = []
+        for build in builds:
+            created = _seconds(build.get('created'))
+            started = _seconds(build.get('started'))
+            status = build.get('status')
+            rows.append((build.get('branch'), created, started - created,
+                         _seconds(build.get('finished')) - started,
+                         1.0 if status == 'failed' else
+                         0.0 if status == 'success' else NAN))
+
+        project = (account_name, project_slug)
+        columns = self._columns
+        with self._lock:
+            project_code = self._code('project', project)
+            for branch, created, queue_time, duration, failed in rows:
+                columns['project'].append(project_code)
+                columns['branch'].append(
+                    self._code('branch', project + (branch, )))
+                columns['created'].append(created)
+                columns['queue_time'].append(queue_time)
+                columns['duration'].append(duration)
+                columns['failed'].append(failed)
+
+    def add_history(self,
+                    client,
+                    projects,
+                    branch=None,
+                    since=None,
+                    max_workers=8,
+                    records_per_page=100):
+        """
+        Add the history builds of projects, fetched concurrently.
+
+        `projects` is a list of `(account_name, project_slug)` tuples whose
+        histories are followed (filtered by `branch` and the `since`
+        datetime) by up to `max_workers` threads. Return the
+        `((account_name, project_slug), error)` pairs of the projects that
+        failed, whose builds may be partially added.
+        """
+        def load(account_name, project_slug):
+            page = []
+            for build in client.projects.iter_history(
+                    account_name, project_slug, branch=branch, since=since,
+                    records_per_page=records_per_page):
+                page.append(build)
+                if len(page) >= records_per_page:
+                    self.add_builds(account_name, project_slug, page)
+                    page = []
+            self.add_builds(account_name, project_slug, page)
+
+        return [(result.item, result.error)
+                for result in fan_out(load, [tuple(project)
+                                             for project in projects],
+                                      max_workers=max_workers)
+                if result.error is not None]
+
+    # --- Statistics
+    def _data(self, by, *names):
+        """Return the group codes and keys, and backend columns."""
+        if by not in GROUPS:
+            raise ValueError('Unknown group: {}'.format(by))
+        for name in names:
+            if name not in METRICS and name != 'created':
+                raise ValueError('Unknown metric: {}'.format(name))
+
+        column = self._backend.column
+        with self._lock:
+            keys = list(self._keys[by])
+            codes = column(self._columns[by])
+            columns = [column(self._columns[name]) for name in names]
+        return [codes, keys] + columns
+
+    def summary(self, by='project', percentiles=(50, 95)):
+        """
+        Return the statistics of each group.
+
+        Statistics are a dictionary with the number of builds (`count`),
+        the `failure_rate` among failed and successful builds, and the
+        `duration_p<q>` and `queue_time_p<q>` percentiles in seconds.
+        """
+        backend = self._backend
+        codes, keys, duration, queue_time, failed = self._data(
+            by, 'duration', 'queue_time', 'failed')
+        groups = len(keys)
+        counts = backend.counts(codes, groups)
+        outcomes, failures = backend.sums(codes, failed, groups)
+        stats = collections.OrderedDict()
+        for key, count, outcome, failure in zip(keys, counts, outcomes,
+                                                failures):
+            stats[key] = {
+                'count': count,
+                'failure_rate': failure / outcome if outcome else NAN,
+            }
+
+        for name, column in (('duration', duration),
+                             ('queue_time', queue_time)):
+            values = backend.percentiles(codes, column, groups, percentiles)
+            for key, row in zip(keys, values):
+                for q, value in zip(percentiles, row):
+                    stats[key]['{}_p{:g}'.format(name, q)] = value
+        return stats
+
+    def rolling(self, by='project', metric='duration', window=7 * DAY,
+                step=DAY):
+        """
+        Return rolling window statistics of each group.
+
+        Windows of `window` seconds end every `step` seconds (at multiples
+        of `step` since the epoch, so daily windows end at midnight UTC),
+        from the first to the last build of the group. Each group gets a
+        list of `Window(end, count, failure_rate, mean)` tuples, where
+        `end` is a naive UTC datetime, `count` the number of builds created
+        in the window and `mean` the mean of `metric`.
+        """
+        if window <= 0 or step <= 0:
+            raise ValueError('window and step must be positive')
+
+        codes, keys, created, values, failed = self._data(
+            by, 'created', metric, 'failed')
+        windows = self._backend.rolling(codes, created, values, failed,
+                                        len(keys), window, step)
+        return collections.OrderedDict(
+            (key, [Window(from_epoch_seconds(end), count, rate, mean)
+                   for end, count, rate, mean in rows])
+            for key, rows in zip(keys, windows))
+
+    def trend(self, by='project', metric='duration'):
+        """
+        Return the trend of a metric for each group.
+
+        The trend is the least squares slope of the metric over the build
+        creation times, in metric units per day (seconds per day for
+        durations, failure rate change per day for 'failed'). Groups with
+        less than two distinct creation times get NaN.
+        """
+        codes, keys, created, values = self._data(by, 'created', metric)
+        slopes = self._backend.trend(codes, created, values, len(keys))
+        return collections.OrderedDict(zip(keys, slopes))
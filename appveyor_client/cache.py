@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Appveyor Python Client response cache."""
+
+# Standard library imports
+import collections
+import fnmatch
+import threading
+import time
+
+# Time to live in seconds for endpoints whose data rarely changes. Other
+# endpoints are only cached when the server returns an ETag, and are then
+# revalidated on every request.
+DEFAULT_TTLS = (
+    ('/api/roles', 300),
+    ('/api/roles/*', 300),
+    ('/api/environments', 60),
+    ('/api/environments/*/settings', 60),
+    ('/api/projects', 60),
+    ('/api/projects/*/*/settings/yaml', 60),
+)
+
+
+class CacheEntry(object):
+    """Cached response body."""
+
+    __slots__ = ('body', 'etag', 'expires')
+
+    def __init__(self, body, etag, expires):
+        """Hold a cached response body."""
+        self.body = body
+        self.etag = etag
+        self.expires = expires
+
+
+class ResponseCache(object):
+    """
+    Bounded LRU cache of GET response bodies.
+
+    Entries expire after the time to live of the first pattern in `ttls`
+    matching the request url (`ttl` if none does). Expired entries with an
+    ETag are revalidated with `If-None-Match` instead of being downloaded
+    again. Any PUT, POST or DELETE invalidates the cached entries of the same
+    resource path, its parents and its children.
+
+    Entries are kept apart by `scope`, the `(endpoint, authorization)` of
+    the client storing them, so clients of different accounts can share a
+    cache without seeing each other's responses. Invalidation applies to
+    all scopes.
+
+    ::
+
+        cache = ResponseCache(ttls=[('/api/projects', 30)])
+        client = AppveyorClient(token, cache=cache)
+    """
+
+    def __init__(self, maxsize=256, ttl=0, ttls=DEFAULT_TTLS, clock=None):
+        """Bounded LRU cache of GET response bodies."""
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._ttls = list(ttls or [])
+        self._clock = clock or time.time
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Return the number of cached entries."""
+        return len(self._entries)
+
+    def ttl_for(self, url):
+        """Return the time to live in seconds for the given url."""
+        path = url.split('?', 1)[0]
+        for pattern, ttl in self._ttls:
+            if fnmatch.fnmatchcase(path, pattern):
+                return ttl
+        return self._ttl
+
+    def get(self, url, scope=None):
+        """Return the cache entry for url or None, fresh or not."""
+        key = (scope, url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._move_to_end(key)
+            return entry
+
+    def is_fresh(self, entry):
+        """Return True if the entry can be used without revalidation."""
+        return entry.expires > self._clock()
+
+    def store(self, url, body, etag=None, scope=None):
+        """Cache the response body for url if it is cacheable."""
+        ttl = self.ttl_for(url)
+        if ttl <= 0 and not etag:
+            return
+
+        key = (scope, url)
+        entry = CacheEntry(body, etag, self._clock() + ttl)
+        with self._lock:
+            self._entries[key] = entry
+            self._move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def refresh(self, url, scope=None):
+        """Extend the life of an entry revalidated by the server."""
+        with self._lock:
+            entry = self._entries.get((scope, url))
+            if entry is not None:
+                entry.expires = self._clock() + self.ttl_for(url)
+
+    def invalidate(self, url):
+        """Drop entries related to the resource path modified by url."""
+        path = url.split('?', 1)[0].rstrip('/')
+        with self._lock:
+            for key in list(self._entries):
+                other = key[1].split('?', 1)[0].rstrip('/')
+                if (other == path or other.startswith(path + '/') or
+                        path.startswith(other + '/')):
+                    del self._entries[key]
+
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def _move_to_end(self, key):
+        """Mark the entry of key as the most recently used one."""
+        self._entries[key] = self._entries.pop(key)
@@ -0,0 +1,400 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""
+Appveyor Python Client command line interface.
+
+Every command works on many projects, jobs or environments at once, runs
+its api calls concurrently and writes one json record per line (NDJSON) to
+standard output as results arrive. Failures are reported as records with
+an `error` key and make the command exit with status 1.
+
+::
+
+    appveyor-client status
+    appveyor-client history goanpeca/appveyor-client --branch master
+    appveyor-client export --format csv --dir export --fetch-jobs
+    appveyor-client logs goanpeca/appveyor-client --dir logs
+    appveyor-client cancel --all
+    appveyor-client redeploy production staging
+
+The token is read from `--token` or the `APPVEYOR_TOKEN` environment
+variable. The client is imported only once a command runs, so the
+interface starts fast.
+"""
+
+# Standard library imports
+import argparse
+import json
+import os
+import sys
+import threading
+
+# Latest builds in these states can be cancelled
+CANCELLABLE_STATUSES = frozenset(['queued', 'starting', 'running'])
+
+
+class _Output(object):
+    """Thread safe writer of NDJSON records."""
+
+    def __init__(self, stream):
+        """Thread safe writer of NDJSON records."""
+        self._stream = stream
+        self._lock = threading.Lock()
+        self.errors = 0
+
+    def write(self, record):
+        """Write a record on its own line."""
+        line = json.dumps(record, sort_keys=True, default=str)
+        with self._lock:
+            if 'error' in record:
+                self.errors += 1
+            self._stream.write(line + '\n')
+            self._stream.flush()
+
+    def error(self, error, **record):
+        """Write an error record."""
+        record['error'] = str(error) or type(error).__name__
+        self.write(record)
+
+
+# --- Helpers
+def _make_client(args):
+    """Create the api client of a command."""
+    # Local imports
+    from appveyor_client.client import AppveyorClient
+    from appveyor_client.retry import RetryPolicy
+
+    return AppveyorClient(
+        args.token,
+        endpoint=args.endpoint,
+        lazy=True,
+        retry=RetryPolicy(),
+        pool_maxsize=max(10, args.concurrency))
+
+
+def _fan_out(func, items, args):
+    """Run `func(*item)` concurrently yielding results as they complete."""
+    # Local imports
+    from appveyor_client.utils import fan_out
+
+    return fan_out(func, items, max_workers=args.concurrency)
+
+
+def _split_project(name):
+    """Split an 'account/slug' project name."""
+    account_name, _, project_slug = name.partition('/')
+    if not account_name or not project_slug:
+        raise ValueError('Invalid project name: {}'.format(name))
+    return account_name, project_slug
+
+
+def _projects(client, names):
+    """Return (account_name, project_slug) tuples, all projects if none."""
+    if names:
+        return [_split_project(name) for name in names]
+    return [(project['accountName'], project['slug'])
+            for project in client.projects.get()]
+
+
+def _build_record(account_name, project_slug, build):
+    """Return the summary record of a build."""
+    return {
+        'account': account_name,
+        'project': project_slug,
+        'build_id': build.get('buildId'),
+        'version': build.get('version'),
+        'branch': build.get('branch'),
+        'status': build.get('status'),
+        'created': build.get('created'),
+        'finished': build.get('finished'),
+    }
+
+
+# --- Commands
+def status(client, args, output):
+    """Write the status of the last build of each project."""
+    projects = _projects(client, args.projects)
+    for result in client.projects.last_builds(
+            projects, max_workers=args.concurrency):
+        account_name, project_slug = result.item
+        if result.error is not None:
+            output.error(result.error, account=account_name,
+                         project=project_slug)
+        else:
+            output.write(_build_record(account_name, project_slug,
+                                       result.result.get('build') or {}))
+
+
+def history(client, args, output):
+    """Write the builds of the project histories, newest first."""
+    since = None
+    if args.since:
+        # Local imports
+        from appveyor_client.utils import parse_datetime
+        since = parse_datetime(args.since)
+
+    def export(account_name, project_slug):
+        count = 0
+        for build in client.projects.iter_history(
+                account_name, project_slug, branch=args.branch, since=since,
+                limit=args.limit):
+            record = dict(build)
+            record['account'] = account_name
+            record['project'] = project_slug
+            output.write(record)
+            count += 1
+        return count
+
+    projects = _projects(client, args.projects)
+    for result in _fan_out(export, projects, args):
+        if result.error is not None:
+            account_name, project_slug = result.item
+            output.error(result.error, account=account_name,
+                         project=project_slug)
+
+
+def export(client, args, output):
+    """Export the project histories to chunked files."""
+    # Local imports
+    from appveyor_client.export import export_history
+
+    since = None
+    if args.since:
+        # Local imports
+        from appveyor_client.utils import parse_datetime
+        since = parse_datetime(args.since)
+
+    result = export_history(
+        client, _projects(client, args.projects), args.dir,
+        format=args.format, rows_per_file=args.rows_per_file,
+        branch=args.branch, since=since, fetch_jobs=args.fetch_jobs,
+        max_workers=args.concurrency)
+    for (account_name, project_slug), error in result.errors:
+        output.error(error, account=account_name, project=project_slug)
+    output.write({'paths': result.paths, 'rows': result.rows})
+
+
+def logs(client, args, output):
+    """Download job logs, resuming partial downloads."""
+    jobs = []
+    for target in args.targets:
+        if '/' not in target:
+            jobs.append((target, ))
+            continue
+
+        account_name, project_slug = _split_project(target)
+        try:
+            if args.version:
+                result = client.projects.build(account_name, project_slug,
+                                               args.version)
+            else:
+                result = client.projects.last_build(account_name,
+                                                    project_slug)
+        except Exception as error:
+            output.error(error, account=account_name, project=project_slug)
+            continue
+
+        jobs.extend((job['jobId'], ) for job in result['build']['jobs'])
+
+    if not os.path.isdir(args.dir):
+        os.makedirs(args.dir)
+
+    def download(job_id):
+        path = os.path.join(args.dir, '{}.log'.format(job_id))
+        offset = os.path.getsize(path) if os.path.exists(path) else 0
+        with open(path, 'ab') as f:
+            written = client.builds.download_log(job_id, f, offset=offset)
+        return {'job_id': job_id, 'path': path, 'bytes': offset + written}
+
+    for result in _fan_out(download, jobs, args):
+        if result.error is not None:
+            output.error(result.error, job_id=result.item[0])
+        else:
+            output.write(result.result)
+
+
+def cancel(client, args, output):
+    """Cancel the queued or running last build of each project."""
+    if not args.projects and not args.all:
+        raise ValueError('Pass project names or --all')
+
+    def cancel_project(account_name, project_slug):
+        build = client.projects.last_build(account_name,
+                                           project_slug)['build']
+        record = _build_record(account_name, project_slug, build)
+        record['cancelled'] = build['status'] in CANCELLABLE_STATUSES
+        if record['cancelled'] and not args.dry_run:
+            client.builds.cancel(account_name, project_slug,
+                                 build['version'])
+        return record
+
+    projects = _projects(client, args.projects)
+    for result in _fan_out(cancel_project, projects, args):
+        if result.error is not None:
+            account_name, project_slug = result.item
+            output.error(result.error, account=account_name,
+                         project=project_slug)
+        else:
+            output.write(result.result)
+
+
+def redeploy(client, args, output):
+    """Deploy again the last successful deployment of each environment."""
+    environments = dict((environment['name'], environment)
+                        for environment in client.environments.get())
+
+    def redeploy_environment(name):
+        environment = environments.get(name)
+        if environment is None:
+            raise ValueError('Unknown environment: {}'.format(name))
+
+        result = client.environments.deployments(
+            environment['deploymentEnvironmentId'])
+        for item in result.get('deployments') or []:
+            deployment = item.get('deployment', item)
+            project = item.get('project') or deployment.get('project') or {}
+            if deployment.get('status') == 'success' and project:
+                break
+        else:
+            raise ValueError(
+                'No successful deployment to {}'.format(name))
+
+        version = deployment['build']['version']
+        record = {
+            'environment': name,
+            'account': project['accountName'],
+            'project': project['slug'],
+            'version': version,
+            'deployment_id': None,
+        }
+        if not args.dry_run:
+            started = client.deployments.start(
+                project['accountName'], project['slug'], name, version)
+            record['deployment_id'] = started.get('deploymentId')
+        return record
+
+    items = [(name, ) for name in args.environments]
+    for result in _fan_out(redeploy_environment, items, args):
+        if result.error is not None:
+            output.error(result.error, environment=result.item[0])
+        else:
+            output.write(result.result)
+
+
+# --- Main
+def make_parser():
+    """Create the command line argument parser."""
+    parser = argparse.ArgumentParser(
+        prog='appveyor-client',
+        description='Fleet wide Appveyor operations with NDJSON output.')
+    parser.add_argument('--token', default=os.environ.get('APPVEYOR_TOKEN'),
+                        help='api token (default: $APPVEYOR_TOKEN)')
+    parser.add_argument('--endpoint', help='api endpoint url')
+    parser.add_argument('-j', '--concurrency', type=int, default=8,
+                        help='simultaneous api calls (default: 8)')
+    parser.add_argument('--timeout', type=float,
+                        help='overall time budget of the command in seconds')
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    commands.required = True
+
+    command = commands.add_parser(
+        'status', help='last build status of projects')
+    command.add_argument('projects', nargs='*', metavar='account/project',
+                         help='projects (default: all)')
+    command.set_defaults(func=status)
+
+    command = commands.add_parser('history', help='export project histories')
+    command.add_argument('projects', nargs='*', metavar='account/project',
+                         help='projects (default: all)')
+    command.add_argument('--branch', help='only builds of this branch')
+    command.add_argument('--since', help='only builds created since this '
+                         'ISO 8601 date')
+    command.add_argument('--limit', type=int,
+                         help='maximum builds per project')
+    command.set_defaults(func=history)
+
+    command = commands.add_parser(
+        'export', help='export project histories to files',
+        description='Export project histories to files, one row per build '
+        'with empty job columns unless --fetch-jobs is passed.')
+    command.add_argument('projects', nargs='*', metavar='account/project',
+                         help='projects (default: all)')
+    command.add_argument('--format', default='ndjson',
+                         choices=['ndjson', 'csv', 'parquet'],
+                         help='file format (default: ndjson)')
+    command.add_argument('--dir', default='.',
+                         help='output directory (default: current)')
+    command.add_argument('--rows-per-file', type=int, default=100000,
+                         help='maximum rows per file (default: 100000)')
+    command.add_argument('--branch', help='only builds of this branch')
+    command.add_argument('--since', help='only builds created since this '
+                         'ISO 8601 date')
+    command.add_argument('--fetch-jobs', action='store_true',
+                         help='export one row per job, requesting the jobs '
+                         'of each build (one more api call per build)')
+    command.set_defaults(func=export)
+
+    command = commands.add_parser('logs', help='download job logs')
+    command.add_argument('targets', nargs='+', metavar='job|account/project',
+                         help='job ids, or projects to download all the '
+                         'job logs of their last build')
+    command.add_argument('--version', help='build version of the projects '
+                         '(default: last build)')
+    command.add_argument('--dir', default='.',
+                         help='output directory (default: current)')
+    command.set_defaults(func=logs)
+
+    command = commands.add_parser(
+        'cancel', help='cancel queued or running builds')
+    command.add_argument('projects', nargs='*', metavar='account/project')
+    command.add_argument('--all', action='store_true',
+                         help='cancel the builds of all projects')
+    command.add_argument('--dry-run', action='store_true',
+                         help='only report the builds to cancel')
+    command.set_defaults(func=cancel)
+
+    command = commands.add_parser(
+        'redeploy', help='deploy again the last successful deployments')
+    command.add_argument('environments', nargs='+', metavar='environment',
+                         help='environment names')
+    command.add_argument('--dry-run', action='store_true',
+                         help='only report the deployments to start')
+    command.set_defaults(func=redeploy)
+
+    return parser
+
+
+def main(argv=None):
+    """Run the command line interface."""
+    parser = make_parser()
+    args = parser.parse_args(argv)
+    if not args.token:
+        parser.error('an api token is required (--token or APPVEYOR_TOKEN)')
+    if args.concurrency < 1:
+        parser.error('--concurrency must be at least 1')
+    if args.timeout is not None and args.timeout <= 0:
+        parser.error('--timeout must be positive')
+
+    output = _Output(sys.stdout)
+    try:
+        client = _make_client(args)
+        if args.timeout is None:
+            args.func(client, args, output)
+        else:
+            with client.deadline(args.timeout):
+                args.func(client, args, output)
+    except KeyboardInterrupt:
+        return 130
+    except Exception as error:
+        output.error(error, command=args.command)
+
+    return 1 if output.errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
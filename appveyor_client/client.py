@@ -8,11 +8,28 @@
 """Appveyor Python Client."""
 
 # Standard library imports
-import json
+import os
 import textwrap
+import threading
+import time
 
 # Third party imports
 import requests
+import requests.adapters
+import requests.structures
+
+# Local imports
+from appveyor_client.codec import JsonCodec, get_codec
+from appveyor_client.deadline import Deadline, current_deadline
+from appveyor_client.index import ProjectIndex
+from appveyor_client.metrics import RequestInfo
+from appveyor_client.models import to_models
+from appveyor_client.routes import ROUTES, TEXT
+from appveyor_client.search import search_logs
+from appveyor_client.tail import LogTail
+from appveyor_client.utils import (BatchResult, Prefetch, SingleFlight,
+                                   fan_out, iter_lines, parse_datetime, timer,
+                                   to_utc)
 
 
 # --- Errors
@@ -24,6 +41,56 @@ class AppveyorClientError(Exception):
     pass
 
 
+class AppveyorTimeoutError(AppveyorClientError, requests.Timeout):
+    """Request timed out or the time budget of a `Deadline` is spent."""
+
+
+# --- Helpers
+def _parse_contents(status_code, loads, text):
+    """
+    Convert response contents to json or raise an AppveyorError.
+
+    `loads` and `text` are callables returning the decoded json and the raw
+    text of the response body, so that both the sync and async clients
+    share the same error mapping.
+    """
+    try:
+        if status_code == 200:
+            contents = loads()
+        else:
+            contents = {}
+    except:
+        error_msg = text().strip()
+        if not error_msg:
+            error_msg = textwrap.dedent('''
+                Unexpected error
+                    Possible reasons are:
+                     - Communication with Appveyor has failed.
+                     - Insufficient permissions.
+                     - Invalid contents returned.
+                ''')[1:]
+        contents = {
+            'status_code': status_code,
+            'error': error_msg,
+        }
+        raise AppveyorError(contents)
+
+    if status_code == 200:
+        return contents
+    elif status_code == 204:
+        return
+    else:
+        contents['status_code'] = status_code
+        raise AppveyorError(contents)
+
+
+# Seconds to connect and to wait for each read of a response
+DEFAULT_TIMEOUT = (10, 60)
+
+# Headers of requests with a text body
+TEXT_HEADERS = {'Content-Type': 'text/plain'}
+
+
 # --- Client
 class AppveyorClient(object):
     """
@@ -37,10 +104,93 @@ class AppveyorClient(object):
         'User-Agent': 'Appveyor Python Client',
     }
 
-    def __init__(self, token, endpoint=None):
-        """Appveyor python client."""
+    # Tokens already validated by any client, keyed by (endpoint, token)
+    _VERIFIED_TOKENS = set()
+    _VERIFIED_TOKENS_LOCK = threading.Lock()
+
+    def __init__(self,
+                 token,
+                 endpoint=None,
+                 lazy=False,
+                 cache=None,
+                 retry=None,
+                 rate_limiter=None,
+                 pool_connections=10,
+                 pool_maxsize=10,
+                 pool_block=False,
+                 keep_alive=True,
+                 timeout=DEFAULT_TIMEOUT,
+                 thread_local=False,
+                 single_flight=False,
+                 codec=None,
+                 models=False,
+                 metrics=None,
+                 transport=None):
+        """
+        Appveyor python client.
+
+        If `lazy` is True no request is made on construction, the token is
+        validated on the first api call (or by calling `verify`) instead.
+
+        `cache` is an optional `appveyor_client.cache.ResponseCache` used for
+        GET requests. `retry` and `rate_limiter` are optional
+        `appveyor_client.retry.RetryPolicy` and `RateLimiter` instances
+        applied to every request.
+
+        `pool_connections`, `pool_maxsize` and `pool_block` configure the
+        connection pool of the session adapters, and `keep_alive=False`
+        closes connections after each request. `timeout` is a number of
+        seconds or a `(connect, read)` tuple applied to every request (None
+        to wait forever). Timed out requests raise `AppveyorTimeoutError`.
+        An overall budget for many requests is set with `deadline`.
+
+        The client can be shared by many threads. By default all threads use
+        one session, so `pool_maxsize` should be at least the number of
+        threads (with `pool_block=True` to wait for a free connection instead
+        of opening extra ones). With `thread_local=True` each thread gets its
+        own session and connection pool instead.
+
+        With `single_flight=True` concurrent identical GET requests share a
+        single http call and all receive its result or its error.
+
+        `codec` is the name of the json library used to encode request and
+        decode response bodies ('orjson', 'ujson' or 'json'), or an
+        `appveyor_client.codec.JsonCodec` instance. By default the fastest
+        available library is used.
+
+        With `models=True` api entities are returned as the compact typed
+        objects of `appveyor_client.models` instead of dictionaries.
+
+        `metrics` is an optional `appveyor_client.metrics.MetricsCollector`
+        registered as request hook (see `add_hook`).
+
+        `transport` is a `requests` transport adapter used instead of the
+        pooled `HTTPAdapter`, like the `MemoryTransport` and
+        `CassetteTransport` of `appveyor_client.transport`. The pool options
+        are ignored when a transport is given.
+        """
         self._endpoint = endpoint or 'https://ci.appveyor.com/'
-        self._session = requests.Session()
+        self._transport = transport
+        self._pool_connections = pool_connections
+        self._pool_maxsize = pool_maxsize
+        self._pool_block = pool_block
+        self._timeout = timeout
+        self._thread_local = threading.local() if thread_local else None
+        self._headers = requests.structures.CaseInsensitiveDict(self._HEADERS)
+        if not keep_alive:
+            self._headers['Connection'] = 'close'
+        self._shared_session = None if thread_local else self._make_session()
+        self._token = token
+        self._verified = False
+        self._cache = cache
+        self._retry = retry
+        self._rate_limiter = rate_limiter
+        self._single_flight = SingleFlight() if single_flight else None
+        self._codec = codec if isinstance(codec, JsonCodec) else get_codec(
+            codec)
+        self._models = models
+        self._hooks = {'pre_request': [], 'post_request': []}
+        self._project_index = None
 
         # Groups
         self.users = Users(self)
@@ -52,94 +202,442 @@ class AppveyorClient(object):
         self.deployments = Deployments(self)
 
         # Setup
-        self._session.headers.update(self._HEADERS)
-        self._authenticate(token)
+        if metrics is not None:
+            self.add_hook('pre_request', metrics.pre_request)
+            self.add_hook('post_request', metrics.post_request)
+
+        if lazy:
+            self._headers['Authorization'] = "Bearer {}".format(token)
+        else:
+            self._authenticate(token)
+
+    def add_hook(self, event, hook):
+        """
+        Register a request hook.
+
+        `event` is 'pre_request' or 'post_request'. Hooks are called with an
+        `appveyor_client.metrics.RequestInfo` before and after every request
+        attempt (retries included); after the request, its `elapsed`,
+        `status_code` (None on connection errors), `bytes_received` and
+        `error` attributes are set.
+        """
+        if event not in self._hooks:
+            raise AppveyorClientError('Invalid hook event: {}'.format(event))
+        self._hooks[event].append(hook)
+
+    def remove_hook(self, event, hook):
+        """Unregister a request hook."""
+        self._hooks[event].remove(hook)
 
     # --- Helpers
+    def deadline(self, timeout):
+        """
+        Return a `Deadline` context limiting the requests sent inside it.
+
+        Used as a per-call timeout, or as the overall budget of composite
+        and batch operations, whose sub-requests share the time left::
+
+            with client.deadline(5):
+                client.projects.last_build('account', 'project')
+        """
+        return Deadline(timeout)
+
+    def _make_session(self):
+        """Create a session with the configured connection pool."""
+        session = requests.Session()
+        if self._transport is not None:
+            session.mount('https://', self._transport)
+            session.mount('http://', self._transport)
+        else:
+            adapter_options = dict(
+                pool_connections=self._pool_connections,
+                pool_maxsize=self._pool_maxsize,
+                pool_block=self._pool_block)
+            session.mount('https://', requests.adapters.HTTPAdapter(
+                **adapter_options))
+            session.mount('http://', requests.adapters.HTTPAdapter(
+                **adapter_options))
+        # All sessions share the client headers
+        session.headers = self._headers
+        return session
+
+    @property
+    def _session(self):
+        """Return the session to use in the current thread."""
+        local = self._thread_local
+        if local is None:
+            return self._shared_session
+
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = self._make_session()
+        return session
+
     def _make_url(self, url):
         """Create full api url."""
         return '{}{}'.format(self._endpoint, url)
 
-    @staticmethod
-    def _parse_response_contents(response):
+    def _parse_body(self, status_code, body):
+        """Parse response body bytes and convert to json if possible."""
+        return _parse_contents(status_code, lambda: self._codec.loads(body),
+                               lambda: body.decode('utf-8', 'replace'))
+
+    def _parse_response_contents(self, response):
         """Parse response and convert to json if possible."""
-        status_code = response.status_code
-        try:
-            if status_code == 200:
-                contents = response.json()
+        return self._parse_body(response.status_code, response.content)
+
+    def _send(self, method, url, idempotent=None, **kwargs):
+        """
+        Send request applying the rate limiter and retry policy.
+
+        `idempotent` overrides the idempotency of the method for retries.
+        """
+        retry = self._retry
+        attempt = 0
+        timeout = kwargs.pop('timeout', self._timeout)
+        deadline = current_deadline()
+        while True:
+            if self._rate_limiter is not None:
+                self._rate_limiter.acquire()
+
+            if deadline is not None:
+                self._check_deadline(deadline, method, url)
+                kwargs['timeout'] = deadline.limit(timeout)
             else:
-                contents = {}
-        except:
-            error = response.text.strip()
-            if not error:
-                error_msg = textwrap.dedent('''
-                    Unexpected error
-                        Possible reasons are:
-                         - Communication with Appveyor has failed.
-                         - Insufficient permissions.
-                         - Invalid contents returned.
-                    ''')[1:]
-            contents = {
-                'status_code': status_code,
-                'error': error_msg,
-            }
-            raise AppveyorError(contents)
+                kwargs['timeout'] = timeout
+
+            try:
+                response = self._send_once(method, url, attempt, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as error:
+                if deadline is not None:
+                    self._check_deadline(deadline, method, url)
+                if retry is None or not retry.is_retryable(
+                        method, attempt, idempotent=idempotent):
+                    if isinstance(error, requests.Timeout):
+                        raise AppveyorTimeoutError(
+                            '{} {} timed out: {}'.format(method, url, error))
+                    raise
+                self._sleep(retry.delay(attempt), deadline, method, url)
+            else:
+                status_code = response.status_code
+                if retry is None or not retry.is_retryable(
+                        method, attempt, status_code, idempotent):
+                    return response
+                self._close_stream(response)
+                self._sleep(
+                    retry.delay(attempt, response.headers.get('Retry-After')),
+                    deadline, method, url)
 
-        if status_code == 200:
-            return contents
-        elif status_code == 204:
-            return
+            attempt += 1
+
+    @staticmethod
+    def _check_deadline(deadline, method, url):
+        """Raise an AppveyorTimeoutError if the deadline expired."""
+        if deadline.expired():
+            raise AppveyorTimeoutError(
+                '{} {} deadline of {}s exceeded'.format(method, url,
+                                                        deadline.timeout))
+
+    @staticmethod
+    def _sleep(delay, deadline, method, url):
+        """Wait before a retry, failing early if it outlasts the deadline."""
+        if deadline is not None and delay >= deadline.remaining():
+            raise AppveyorTimeoutError(
+                '{} {} deadline of {}s exceeded before retry'.format(
+                    method, url, deadline.timeout))
+        time.sleep(delay)
+
+    def _send_once(self, method, url, attempt, **kwargs):
+        """Send a single request attempt, running the request hooks."""
+        pre_hooks = self._hooks['pre_request']
+        post_hooks = self._hooks['post_request']
+        if not pre_hooks and not post_hooks:
+            return self._session.request(method, self._make_url(url),
+                                         **kwargs)
+
+        data = kwargs.get('data')
+        info = RequestInfo(method, url, attempt, len(data) if data else 0)
+        for hook in pre_hooks:
+            hook(info)
+
+        info.started = time.time()
+        start = timer()
+
+        def finish(bytes_received, error=None):
+            info.bytes_received = bytes_received
+            info.error = error
+            info.elapsed = timer() - start
+            for hook in post_hooks:
+                hook(info)
+
+        try:
+            response = self._session.request(method, self._make_url(url),
+                                             **kwargs)
+        except Exception as error:
+            finish(0, error)
+            raise
+
+        info.status_code = response.status_code
+        if kwargs.get('stream'):
+            # Count the bytes actually read, see `_close_stream`
+            response.appveyor_finish = finish
         else:
-            contents['status_code'] = status_code
-            raise AppveyorError(contents)
+            finish(len(response.content))
+        return response
+
+    @staticmethod
+    def _close_stream(response, bytes_received=0, error=None):
+        """Close a response, running the post request hooks of streams."""
+        response.close()
+        finish = getattr(response, 'appveyor_finish', None)
+        if finish is not None:
+            response.appveyor_finish = None
+            finish(bytes_received, error)
+
+    def _send_get(self, url, headers=None):
+        """Send GET request, sharing it with identical concurrent ones."""
+        if self._single_flight is None:
+            return self._send('GET', url, headers=headers)
+
+        key = (url, tuple(sorted((headers or {}).items())))
+        return self._single_flight.do(key, self._send, 'GET', url,
+                                      headers=headers)
 
     def _get(self, url, data=None, json=None):
         """Send GET request with given url."""
-        response = self._session.get(self._make_url(url))
-        return self._parse_response_contents(response)
+        cache = self._cache
+        if cache is None:
+            response = self._send_get(url)
+            return self._parse_response_contents(response)
+
+        # Clients of other endpoints or tokens may share the cache
+        scope = (self._endpoint, self._headers.get('Authorization'))
+        entry = cache.get(url, scope)
+        if entry is not None and cache.is_fresh(entry):
+            return self._parse_body(200, entry.body)
+
+        headers = None
+        if entry is not None and entry.etag:
+            headers = {'If-None-Match': entry.etag}
+
+        response = self._send_get(url, headers=headers)
+        if response.status_code == 304 and entry is not None:
+            cache.refresh(url, scope)
+            return self._parse_body(200, entry.body)
+
+        contents = self._parse_response_contents(response)
+        if response.status_code == 200:
+            cache.store(url, response.content, response.headers.get('ETag'),
+                        scope)
+        return contents
 
     def _post(self, url, data=None, json=None):
         """Send POST request with given url and keyword args."""
-        response = self._session.post(
-            self._make_url(url), data=data, json=json)
+        response = self._send('POST', url, data=data, json=json)
+        self._invalidate(url)
         return self._parse_response_contents(response)
 
     def _put(self, url, data=None, json=None):
         """Send PUT request with given url."""
-        response = self._session.put(self._make_url(url), data=data, json=json)
+        response = self._send('PUT', url, data=data, json=json)
+        self._invalidate(url)
         return self._parse_response_contents(response)
 
     def _delete(self, url, data=None, json=None):
         """Send DELETE request with given url."""
-        response = self._session.delete(self._make_url(url))
+        response = self._send('DELETE', url)
+        self._invalidate(url)
         return self._parse_response_contents(response)
 
+    def _invalidate(self, url):
+        """Drop cached responses for the resource modified by url."""
+        if self._cache is not None:
+            self._cache.invalidate(url)
+
+        # GET requests sent after a change must not join earlier ones
+        if self._single_flight is not None:
+            self._single_flight.forget()
+
+    def _call(self, route, args=(), query=None, body=None):
+        """
+        Send a request to an api route and return the response contents.
+
+        `args` fill the path placeholders of the route, `query` holds its
+        query parameters and `body` the request body, encoded as declared
+        by the route. GET routes use the response cache if they are
+        cacheable, and retries follow the route idempotency.
+        """
+        if not self._verified:
+            self.verify()
+
+        url = route.format(args, query)
+        method = route.method
+        if method == 'GET':
+            if route.cacheable:
+                contents = self._get(url)
+            else:
+                contents = self._parse_response_contents(self._send_get(url))
+        else:
+            headers = None
+            if body is not None:
+                if route.body == TEXT:
+                    body, headers = body.encode('utf-8'), TEXT_HEADERS
+                else:
+                    body = self._codec.dumps(body)
+
+            response = self._send(method, url, idempotent=route.idempotent,
+                                  data=body, headers=headers)
+            self._invalidate(url)
+            contents = self._parse_response_contents(response)
+        return to_models(contents) if self._models else contents
+
+    def batch(self, name, items, max_workers=8):
+        """
+        Call an idempotent api route concurrently for many arguments.
+
+        `name` is the name of a route of `appveyor_client.routes.ROUTES`
+        (like 'projects.last_build') and `items` an iterable of tuples of
+        its path arguments. Yield a `BatchResult(item, result, error)` for
+        each item as soon as its request completes.
+        """
+        route = ROUTES[name]
+        if not route.idempotent or route.stream:
+            raise AppveyorClientError(
+                'Route {} cannot be batched'.format(name))
+
+        def call(*args):
+            return self._call(route, args)
+
+        return fan_out(call, items, max_workers=max_workers)
+
     def _request(self, method_url, body=None, json=None):
-        """"""
+        """Send a request to a 'VERB /path' url of an undeclared endpoint."""
+        if not self._verified:
+            self.verify()
+
+        if json is not None:
+            body = self._codec.dumps(json)
+
         method, url = method_url.split(' ')
         func = getattr(self, '_{}'.format(method.lower()))
-        return func(url, data=body, json=json)
+        contents = func(url, data=body)
+        return to_models(contents) if self._models else contents
+
+    def _stream_request(self,
+                        route,
+                        args=(),
+                        offset=0,
+                        chunk_size=65536,
+                        resume_attempts=3):
+        """
+        Download the response body of a route in chunks of bytes.
+
+        The download starts at byte `offset`.
+
+        Dropped connections are resumed with a `Range` request from the last
+        byte received, up to `resume_attempts` times. The download stops with
+        an `AppveyorTimeoutError` once the current deadline expires.
+        """
+        if not self._verified:
+            self.verify()
+
+        method, url = route.method, route.format(args)
+        deadline = current_deadline()
+        attempts = 0
+        while True:
+            headers = None
+            if offset:
+                headers = {'Range': 'bytes={}-'.format(offset)}
+
+            response = self._send(method, url, idempotent=route.idempotent,
+                                  headers=headers, stream=True)
+            received = 0
+            failure = None
+            try:
+                status_code = response.status_code
+                if status_code == 416:
+                    # Offset at or past the end of the contents
+                    return
+                elif status_code not in (200, 206):
+                    received = len(response.content)
+                    self._parse_response_contents(response)
+                    return
+
+                # The server ignored the range, skip the bytes already seen
+                skip = offset if status_code == 200 else 0
+                for chunk in response.iter_content(chunk_size):
+                    received += len(chunk)
+                    if skip:
+                        if len(chunk) <= skip:
+                            skip -= len(chunk)
+                            continue
+                        chunk, skip = chunk[skip:], 0
+
+                    offset += len(chunk)
+                    yield chunk
+                    if deadline is not None:
+                        self._check_deadline(deadline, method, url)
+                return
+            except (requests.ConnectionError,
+                    requests.exceptions.ChunkedEncodingError) as error:
+                failure = error
+                if deadline is not None:
+                    self._check_deadline(deadline, method, url)
+                if attempts >= resume_attempts:
+                    raise
+                attempts += 1
+            finally:
+                self._close_stream(response, received, failure)
 
     def _authenticate(self, token):
         """Authenticate appveyor with bearer token."""
         url = '/api/roles'
-        self._session.headers['Authorization'] = "Bearer {}".format(token)
-        return self._get(url)
+        self._headers['Authorization'] = "Bearer {}".format(token)
+        # Never validate a token from a cached response
+        contents = self._parse_response_contents(self._send_get(url))
+        self._mark_verified()
+        return contents
+
+    def _mark_verified(self):
+        """Remember that the client token has been validated."""
+        self._verified = True
+        with self._VERIFIED_TOKENS_LOCK:
+            self._VERIFIED_TOKENS.add((self._endpoint, self._token))
+
+    def verify(self):
+        """
+        Validate the client token.
+
+        Tokens are validated only once per process, so lazy clients built
+        with an already verified token do not make any extra request.
+        """
+        if self._verified:
+            return
+
+        with self._VERIFIED_TOKENS_LOCK:
+            verified = (self._endpoint, self._token) in self._VERIFIED_TOKENS
+
+        if verified:
+            self._verified = True
+        else:
+            self._authenticate(self._token)
+
+    @property
+    def project_index(self):
+        """Return the in memory project index, created on first use."""
+        if self._project_index is None:
+            self._project_index = ProjectIndex(self.projects)
+        return self._project_index
 
     def account_slug_for_repo(self, repo_full_name):
         """Return the account name and project slug for a repo full name."""
-        projects = self.projects.get()
-        for project in projects:
-            if project['repositoryName'].lower() == repo_full_name.lower():
-                account_name = project['accountName']
-                project_slug = project['slug']
-                break
-
-        if account_name is None and project_slug is None:
-            raise AppveyorError("Repository full name '{}'"
+        project = self.project_index.by_repo(repo_full_name)
+
+        if project is None:
+            raise AppveyorError("Repository full name '{}' "
                                 "is invalid".format(repo_full_name))
 
-        return account_name, project_slug
+        return project['accountName'], project['slug']
 
 
 class _Base(object):
@@ -160,13 +658,9 @@ class Users(_Base):
         https://www.appveyor.com/docs/api/team/#get-users
         https://www.appveyor.com/docs/api/team/#get-user
         """
-        method_url = 'GET /api/users'
-
         if user_id:
-            method_url += '/{user_id}'
-
-        method_url = method_url.format(user_id=user_id)
-        return self._client._request(method_url)
+            return self._client._call(ROUTES['users.get'], (user_id, ))
+        return self._client._call(ROUTES['users.list'])
 
     def add(self,
             full_name,
@@ -179,7 +673,6 @@ class Users(_Base):
 
         https://www.appveyor.com/docs/api/team/#add-user
         """
-        method_url = 'POST /api/users'
         data = {
             "fullName": full_name,
             "email": email,
@@ -194,8 +687,7 @@ class Users(_Base):
             else:
                 error_msg = 'Must provide a password if generate is Fasle'
                 raise AppveyorClientError(error_msg)
-        body = json.dumps(data)
-        return self._client._request(method_url, body=body)
+        return self._client._call(ROUTES['users.add'], body=data)
 
     def update(self, user):
         """
@@ -216,9 +708,7 @@ class Users(_Base):
 
         https://www.appveyor.com/docs/api/team/#update-user
         """
-        method_url = 'PUT /api/users'
-        body = json.dumps(user)
-        return self._client._request(method_url, body=body)
+        return self._client._call(ROUTES['users.update'], body=user)
 
     def delete(self, user_id):
         """
@@ -226,9 +716,7 @@ class Users(_Base):
 
         https://www.appveyor.com/docs/api/team/#delete-user
         """
-        method_url = 'DELETE /api/users/{user_id}'
-        method_url = method_url.format(user_id=user_id)
-        return self._client._request(method_url)
+        return self._client._call(ROUTES['users.delete'], (user_id, ))
 
 
 class Collaborators(_Base):
@@ -241,13 +729,10 @@ class Collaborators(_Base):
         https://www.appveyor.com/docs/api/team/#get-collaborators
         https://www.appveyor.com/docs/api/team/#get-collaborator
         """
-        method_url = 'DELETE /api/users'
-
         if user_id:
-            method_url += '/{user_id}'
-
-        method_url = method_url.format(user_id=user_id)
-        return self._client._request(method_url)
+            return self._client._call(ROUTES['collaborators.get'],
+                                      (user_id, ))
+        return self._client._call(ROUTES['collaborators.list'])
 
     def add(self, email, role_id):
         """
@@ -255,13 +740,11 @@ class Collaborators(_Base):
 
         https://www.appveyor.com/docs/api/team/#add-collaborator
         """
-        method_url = 'POST /api/collaborators'
         data = {
             "email": email,
             "roleId": role_id,
         }
-        body = json.dumps(data)
-        return self._client._request(method_url, body=body)
+        return self._client._call(ROUTES['collaborators.add'], body=data)
 
     def update(self, user_id, role_id):
         """
@@ -269,13 +752,11 @@ class Collaborators(_Base):
 
         https://www.appveyor.com/docs/api/team/#update-collaborator
         """
-        method_url = 'PUT /api/collaborators'
         data = {
             "userId": user_id,
             "roleId": role_id,
         }
-        body = json.dumps(data)
-        return self._client._request(method_url, body=body)
+        return self._client._call(ROUTES['collaborators.update'], body=data)
 
     def delete(self, user_id):
         """
@@ -283,9 +764,7 @@ class Collaborators(_Base):
 
         https://www.appveyor.com/docs/api/team/#delete-collaborator
         """
-        method_url = 'DELETE /api/collaborators/{user_id}'
-        method_url = method_url.format(user_id=user_id)
-        return self._client._request(method_url)
+        return self._client._call(ROUTES['collaborators.delete'], (user_id, ))
 
 
 class Roles(_Base):
@@ -297,12 +776,9 @@ class Roles(_Base):
 
         https://www.appveyor.com/docs/api/team/#get-roles
         """
-        method_url = 'GET /api/roles'
-
         if role_id:
-            method_url += '/{role_id}'
-
-        return self._client._request(method_url)
+            return self._client._call(ROUTES['roles.get'], (role_id, ))
+        return self._client._call(ROUTES['roles.list'])
 
     def add_role(self, name):
         """
@@ -310,10 +786,8 @@ class Roles(_Base):
 
         https://www.appveyor.com/docs/api/team/#add-role
         """
-        method_url = 'POST /api/roles'
         data = {"name": name, }
-        body = json.dumps(data)
-        return self._client._request(method_url, body=body)
+        return self._client._call(ROUTES['roles.add'], body=data)
 
     def update_role(self, role):
         """
@@ -437,9 +911,7 @@ class Roles(_Base):
 
         https://www.appveyor.com/docs/api/team/#update-role
         """
-        method_url = 'PUT /api/roles'
-        body = json.dumps(role)
-        return self._client._request(method_url, body=body)
+        return self._client._call(ROUTES['roles.update'], body=role)
 
     def delete_role(self, role_id):
         """
@@ -447,8 +919,7 @@ class Roles(_Base):
 
         https://www.appveyor.com/docs/api/team/#delete-role
         """
-        method_url = 'DELETE /api/roles/{role_id}'
-        return self._client._request(method_url)
+        return self._client._call(ROUTES['roles.delete'], (role_id, ))
 
 
 class Projects(_Base):
@@ -460,8 +931,7 @@ class Projects(_Base):
 
         https://www.appveyor.com/docs/api/projects-builds/#get-projects
         """
-        method_url = 'GET /api/projects'
-        return self._client._request(method_url)
+        return self._client._call(ROUTES['projects.list'])
 
     def last_build(self, account_name, project_slug):
         """
@@ -469,10 +939,20 @@ class Projects(_Base):
 
         https://www.appveyor.com/docs/api/projects-builds/#get-project-last-build
         """
-        method_url = 'GET /api/projects/{account_name}/{project_slug}'
-        method_url = method_url.format(
-            account_name=account_name, project_slug=project_slug)
-        return self._client._request(method_url)
+        return self._client._call(ROUTES['projects.last_build'],
+                                  (account_name, project_slug))
+
+    def last_builds(self, projects, max_workers=8):
+        """
+        Get the last build of many projects concurrently.
+
+        `projects` is an iterable of `(account_name, project_slug)` tuples.
+        Yield a `BatchResult(item, result, error)` for each project as soon
+        as its request completes. Failed requests are reported in `error`
+        instead of aborting the batch.
+        """
+        return self._client.batch('projects.last_build', projects,
+                                  max_workers=max_workers)
 
     def last_branch_build(self, account_name, project_slug, build_branch):
         """
@@ -480,13 +960,18 @@ class Projects(_Base):
 
         https://www.appveyor.com/docs/api/projects-builds/#get-project-last-branch-build
         """
-        method_url = ('GET /api/projects/{account_name}/{project_slug}'
-                      '/branch/{build_branch}')
-        method_url = method_url.format(
-            account_name=account_name,
-            project_slug=project_slug,
-            build_branch=build_branch)
-        return self._client._request(method_url)
+        return self._client._call(ROUTES['projects.last_branch_build'],
+                                  (account_name, project_slug, build_branch))
+
+    def last_branch_builds(self, projects, max_workers=8):
+        """
+        Get the last branch build of many projects concurrently.
+
+        `projects` is an iterable of `(account_name, project_slug,
+        build_branch)` tuples. Results are yielded as in `last_builds`.
+        """
+        return self._client.batch('projects.last_branch_build', projects,
+                                  max_workers=max_workers)
 
     def build(self, account_name, project_slug, build_version):
         """
@@ -494,13 +979,8 @@ class Projects(_Base):
 
         https://www.appveyor.com/docs/api/projects-builds/#get-project-build-by-version
         """
-        method_url = ('GET /api/projects/{account_name}/{project_slug}'
-                      '/build/{build_version}')
-        method_url = method_url.format(
-            account_name=account_name,
-            project_slug=project_slug,
-            build_version=build_version)
-        return self._client._request(method_url)
+        return self._client._call(ROUTES['projects.build'],
+                                  (account_name, project_slug, build_version))
 
     def history(self,
                 account_name,
@@ -513,28 +993,90 @@ class Projects(_Base):
 
         https://www.appveyor.com/docs/api/projects-builds/#get-project-history
         """
-        method_url = ('GET /api/projects/{account_name}/{project_slug}'
-                      '/history?recordsNumber={records_per_page}')
+        query = {
+            'records_per_page': records_per_page,
+            'start_build_id': start_build_id,
+            'branch': branch,
+        }
+        return self._client._call(ROUTES['projects.history'],
+                                  (account_name, project_slug), query)
+
+    def iter_history(self,
+                     account_name,
+                     project_slug,
+                     branch=None,
+                     since=None,
+                     limit=None,
+                     records_per_page=50):
+        """
+        Iterate over project history builds, newest first.
+
+        Pages are requested lazily following the `startBuildId` cursor, and
+        the next page is fetched in a background thread while the current
+        one is consumed. Iteration stops after `limit` builds, or at the
+        first build created before the `since` datetime.
+        """
+        def fetch(start_build_id):
+            return self.history(
+                account_name,
+                project_slug,
+                records_per_page=records_per_page,
+                start_build_id=start_build_id,
+                branch=branch)
+
+        since = to_utc(since)
+        count = 0
+        page = fetch(None)
+        while page is not None:
+            builds = page.get('builds') or []
+            remaining = None if limit is None else limit - count
+
+            if len(builds) < records_per_page or (remaining is not None and
+                                                  remaining <= len(builds)):
+                pending = None
+            else:
+                pending = Prefetch(fetch, builds[-1]['buildId'])
 
-        if start_build_id:
-            method_url += '&startBuildId={start_build_id}'
-        else:
-            start_build_id = ''
-            method_url += '{start_build_id}'
+            for build in builds:
+                if (since is not None and
+                        parse_datetime(build['created']) < since):
+                    return
 
-        if branch:
-            method_url += '&branch={branch}'
-        else:
-            branch = ''
-            method_url += '{branch}'
+                yield build
+                count += 1
+
+                if limit is not None and count >= limit:
+                    return
+
+            page = pending.result() if pending is not None else None
+
+    def search_logs(self,
+                    account_name,
+                    project_slug,
+                    builds,
+                    pattern,
+                    context=0,
+                    max_matches=None,
+                    max_workers=8):
+        """
+        Search the job logs of project builds concurrently.
 
-        method_url = method_url.format(
-            account_name=account_name,
-            project_slug=project_slug,
-            records_per_page=records_per_page,
-            start_build_id=start_build_id,
-            branch=branch)
-        return self._client._request(method_url)
+        `builds` is an iterable of build versions or build dictionaries (like
+        the ones returned by `history` or `iter_history`). Matches are
+        yielded as in `Builds.search_logs`.
+        """
+        versions = [(account_name, project_slug,
+                     build['version'] if hasattr(build, 'get') else build)
+                    for build in builds]
+        job_ids = []
+        for result in fan_out(self.build, versions, max_workers=max_workers):
+            if result.error is not None:
+                raise result.error
+            job_ids.extend(job['jobId'] for job in result.result['build'][
+                'jobs'])
+
+        return search_logs(self._client, job_ids, pattern, context=context,
+                           max_matches=max_matches, max_workers=max_workers)
 
     def deployments(self, account_name, project_slug):
         """
@@ -542,11 +1084,8 @@ class Projects(_Base):
 
         https://www.appveyor.com/docs/api/projects-builds/#get-project-deployments
         """
-        method_url = ('GET /api/projects/{account_name}/{project_slug}'
-                      '/deployments')
-        method_url = method_url.format(
-            account_name=account_name, project_slug=project_slug)
-        return self._client._request(method_url)
+        return self._client._call(ROUTES['projects.deployments'],
+                                  (account_name, project_slug))
 
     def settings(self, account_name, project_slug):
         """
@@ -554,11 +1093,8 @@ class Projects(_Base):
 
         https://www.appveyor.com/docs/api/projects-builds/#get-project-settings-in-yaml
         """
-        method_url = ('GET /api/projects/{account_name}/{project_slug}'
-                      '/settings/yaml')
-        method_url = method_url.format(
-            account_name=account_name, project_slug=project_slug)
-        return self._client._request(method_url)
+        return self._client._call(ROUTES['projects.settings'],
+                                  (account_name, project_slug))
 
     def add(self, repository_provider, repository_name):
         """
@@ -566,7 +1102,6 @@ class Projects(_Base):
 
         https://www.appveyor.com/docs/api/projects-builds/#add-project
         """
-        method_url = 'POST /api/projects'
         providers = [
             'gitHub', 'bitBucket', 'vso', 'gitLab', 'kiln', 'stash', 'git',
             'mercurial', 'subversion'
@@ -582,8 +1117,7 @@ class Projects(_Base):
             "repositoryName": repository_name,
         }
 
-        body = json.dumps(data)
-        return self._client._request(method_url, body=body)
+        return self._client._call(ROUTES['projects.add'], body=data)
 
     def update(self, account_name, project_slug, project):
         """
@@ -730,12 +1264,7 @@ class Projects(_Base):
 
         https://www.appveyor.com/docs/api/projects-builds/#update-project
         """
-        method_url = ('PUT /api/projects/{account_name}/{project_slug}'
-                      '/settings/build-number')
-        method_url = method_url.format(
-            account_name=account_name, project_slug=project_slug)
-        body = json.dumps(project)
-        return self._client._request(method_url, body=body)
+        return self._client._call(ROUTES['projects.update'], body=project)
 
     def update_settings(self, account_name, project_slug, settings):
         """
@@ -753,13 +1282,8 @@ class Projects(_Base):
 
         https://www.appveyor.com/docs/api/projects-builds/#update-project-settings-in-yaml
         """
-        method_url = ('PUT /api/projects/{account_name}/{project_slug}'
-                      '/settings/build-number')
-        method_url = method_url.format(
-            account_name=account_name, project_slug=project_slug)
-
-        body = json.dumps(settings)
-        return self._client._request(method_url, body=body)
+        return self._client._call(ROUTES['projects.update_settings'],
+                                  (account_name, project_slug), body=settings)
 
     def update_build_number(self, account_name, project_slug,
                             next_build_number):
@@ -768,12 +1292,9 @@ class Projects(_Base):
 
         https://www.appveyor.com/docs/api/projects-builds/#update-project-build-number
         """
-        method_url = ('PUT /api/projects/{account_name}/{project_slug}'
-                      '/settings/build-number')
-        method_url = method_url.format(
-            account_name=account_name, project_slug=project_slug)
         data = {'nextBuildNumber': next_build_number}
-        return self._client._request(method_url, json=data)
+        return self._client._call(ROUTES['projects.update_build_number'],
+                                  (account_name, project_slug), body=data)
 
     def delete_build_cache(self, account_name, project_slug):
         """
@@ -781,11 +1302,8 @@ class Projects(_Base):
 
         https://www.appveyor.com/docs/api/projects-builds/#delete-project-build-cache
         """
-        method_url = ('DELETE /api/projects/{account_name}/{project_slug}'
-                      '/buildcache')
-        method_url = method_url.format(
-            account_name=account_name, project_slug=project_slug)
-        return self._client._request(method_url)
+        return self._client._call(ROUTES['projects.delete_build_cache'],
+                                  (account_name, project_slug))
 
     def delete(self, account_name, project_slug):
         """
@@ -793,10 +1311,8 @@ class Projects(_Base):
 
         https://www.appveyor.com/docs/api/projects-builds/#delete-project
         """
-        method_url = 'DELETE /api/projects/{account_name}/{project_slug}'
-        method_url = method_url.format(
-            account_name=account_name, project_slug=project_slug)
-        return self._client._request(method_url)
+        return self._client._call(ROUTES['projects.delete'],
+                                  (account_name, project_slug))
 
 
 class Builds(_Base):
@@ -816,7 +1332,6 @@ class Builds(_Base):
         https://www.appveyor.com/docs/api/projects-builds/#start-build-of-specific-branch-commit
         https://www.appveyor.com/docs/api/projects-builds/#start-build-of-pull-request-github-only
         """
-        method_url = 'POST /api/builds'
         data = {
             'accountName': account_name,
             'projectSlug': project_slug,
@@ -841,8 +1356,7 @@ class Builds(_Base):
         if environment_variables:
             data['environmentVariables'] = environment_variables
 
-        body = json.dumps(data)
-        return self._client._request(method_url, body=body)
+        return self._client._call(ROUTES['builds.start'], body=data)
 
     def cancel(self, account_name, project_slug, build_version):
         """
@@ -850,13 +1364,8 @@ class Builds(_Base):
 
         https://www.appveyor.com/docs/api/projects-builds/#cancel-build
         """
-        method_url = ('DELETE /api/builds/{account_name}/{project_slug}'
-                      '/{build_version}')
-        method_url = method_url.format(
-            account_name=account_name,
-            project_slug=project_slug,
-            build_version=build_version)
-        return self._client._request(method_url)
+        return self._client._call(ROUTES['builds.cancel'],
+                                  (account_name, project_slug, build_version))
 
     def delete(self, account_name, buildId):
         """
@@ -864,21 +1373,208 @@ class Builds(_Base):
 
         https://www.appveyor.com/docs/api/projects-builds/#delete-project
         """
-        method_url = ('DELETE /api/builds/{buildId}')
-        method_url = method_url.format(
-            account_name=account_name,
-            buildId=buildId)
-        return self._client._request(method_url)
+        return self._client._call(ROUTES['builds.delete'], (buildId, ))
 
     def log(self, job_id):
         """
         Download build log.
 
+        Return the full log text. Use `log_stream`, `log_lines` or
+        `download_log` for large logs.
+
         https://www.appveyor.com/docs/api/projects-builds/#download-build-log
         """
-        method_url = 'GET /api/buildjobs/{job_id}/log'
-        method_url = method_url.format(job_id=job_id)
-        return self._client._request(method_url)
+        return b''.join(self.log_stream(job_id)).decode('utf-8', 'replace')
+
+    def log_stream(self, job_id, offset=0, chunk_size=65536):
+        """
+        Download build log in chunks of bytes as they arrive.
+
+        The download starts at byte `offset`, and dropped connections are
+        resumed from the last byte received using HTTP range requests.
+
+        https://www.appveyor.com/docs/api/projects-builds/#download-build-log
+        """
+        return self._client._stream_request(
+            ROUTES['builds.log'], (job_id, ), offset=offset,
+            chunk_size=chunk_size)
+
+    def log_lines(self, job_id, offset=0):
+        """Download build log yielding one line of text at a time."""
+        return iter_lines(self.log_stream(job_id, offset=offset))
+
+    def download_log(self, job_id, fileobj, offset=0):
+        """
+        Download build log to a binary file object without buffering it.
+
+        Pass the current size of a partially downloaded file as `offset` (and
+        open it in append mode) to resume the download. Return the number of
+        bytes written.
+        """
+        written = 0
+        for chunk in self.log_stream(job_id, offset=offset):
+            fileobj.write(chunk)
+            written += len(chunk)
+        return written
+
+    def follow_log(self,
+                   account_name,
+                   project_slug,
+                   build_version,
+                   job_id,
+                   offset=0,
+                   min_interval=1,
+                   max_interval=30):
+        """
+        Follow the log of a running job, yielding new lines as they appear.
+
+        Only the bytes after the last seen offset are requested. Polling
+        backs off while the log does not grow, and stops once the job
+        finished and its log was read to the end. Use
+        `appveyor_client.tail.LogTail` to follow many jobs concurrently.
+        """
+        tail = LogTail(self._client, min_interval=min_interval,
+                       max_interval=max_interval)
+        tail.add_job(account_name, project_slug, build_version, job_id,
+                     offset=offset)
+        for _, line in tail:
+            yield line
+
+    def search_logs(self,
+                    job_ids,
+                    pattern,
+                    context=0,
+                    max_matches=None,
+                    max_workers=8):
+        """
+        Search the logs of many jobs concurrently.
+
+        Yield a `LogMatch(job_id, line_number, line, before, after)` for each
+        line matching the `pattern` regular expression as soon as it is
+        found, with up to `context` lines before and after it. Logs are
+        scanned as they download and never held in memory, and the search
+        stops after `max_matches` matches. See
+        `appveyor_client.search.search_logs`.
+        """
+        return search_logs(self._client, job_ids, pattern, context=context,
+                           max_matches=max_matches, max_workers=max_workers)
+
+    def artifacts(self, job_id):
+        """
+        Get job artifacts.
+
+        https://www.appveyor.com/docs/api/projects-builds/#get-job-artifacts
+        """
+        return self._client._call(ROUTES['builds.artifacts'], (job_id, ))
+
+    def artifact_stream(self, job_id, file_name, offset=0, chunk_size=65536):
+        """
+        Download a job artifact in chunks of bytes as they arrive.
+
+        The download starts at byte `offset`, and dropped connections are
+        resumed from the last byte received using HTTP range requests.
+
+        https://www.appveyor.com/docs/api/projects-builds/#download-job-artifact
+        """
+        return self._client._stream_request(
+            ROUTES['builds.artifact'], (job_id, file_name), offset=offset,
+            chunk_size=chunk_size)
+
+    def download_artifact(self, job_id, file_name, path, size=None):
+        """
+        Download a job artifact to a file without buffering it in memory.
+
+        With the expected `size` in bytes (as listed by `artifacts`), a file
+        of that size already at `path` is skipped, a shorter one is resumed
+        with a range request, and the size of the download is verified.
+        Return the number of bytes downloaded.
+        """
+        offset = self._resume_offset(path, size)
+        if offset is None:
+            return 0
+
+        written = 0
+        with open(path, 'ab' if offset else 'wb') as f:
+            for chunk in self.artifact_stream(job_id, file_name,
+                                              offset=offset):
+                f.write(chunk)
+                written += len(chunk)
+
+        self._check_size(path, size, offset + written)
+        return written
+
+    def download_artifacts(self, job_ids, directory, max_workers=4):
+        """
+        Download all the artifacts of many jobs in parallel.
+
+        Artifacts are saved to `directory/<job_id>/<artifact file name>`,
+        skipping complete files and resuming partial ones (see
+        `download_artifact`). Yield a `BatchResult` for each artifact as
+        soon as its download completes, with `item` set to `(job_id,
+        file_name, path)` and `result` to the number of bytes downloaded.
+        Failed listings are reported with a None file name.
+        """
+        downloads = []
+        for listing in fan_out(self.artifacts, [(job_id, )
+                                                for job_id in job_ids],
+                               max_workers=max_workers):
+            job_id = listing.item[0]
+            if listing.error is not None:
+                yield BatchResult((job_id, None, None), None, listing.error)
+                continue
+
+            for artifact in listing.result:
+                file_name = artifact['fileName']
+                try:
+                    path = self._artifact_path(directory, job_id, file_name)
+                except AppveyorClientError as error:
+                    yield BatchResult((job_id, file_name, None), None, error)
+                    continue
+
+                downloads.append((job_id, file_name, path,
+                                  artifact.get('size')))
+
+        for result in fan_out(self.download_artifact, downloads,
+                              max_workers=max_workers):
+            yield result._replace(item=result.item[:3])
+
+    @staticmethod
+    def _artifact_path(directory, job_id, file_name):
+        """Return the local path of an artifact, inside `directory`."""
+        root = os.path.abspath(os.path.join(directory, str(job_id)))
+        path = os.path.abspath(os.path.join(root, file_name))
+        if not path.startswith(root + os.sep):
+            raise AppveyorClientError(
+                'Invalid artifact file name: {}'.format(file_name))
+
+        parent = os.path.dirname(path)
+        if not os.path.isdir(parent):
+            try:
+                os.makedirs(parent)
+            except OSError:
+                # Created concurrently by another download
+                if not os.path.isdir(parent):
+                    raise
+        return path
+
+    @staticmethod
+    def _resume_offset(path, size):
+        """Return the download offset of a file, or None if complete."""
+        if size is None or not os.path.exists(path):
+            return 0
+
+        current = os.path.getsize(path)
+        if current == size:
+            return None
+        return current if current < size else 0
+
+    @staticmethod
+    def _check_size(path, size, actual):
+        """Verify the size of a downloaded file."""
+        if size is not None and actual != size:
+            raise AppveyorClientError(
+                'Incomplete download of {}: expected {} bytes, got {}'.format(
+                    path, size, actual))
 
 
 class Environments(_Base):
@@ -894,8 +1590,7 @@ class Environments(_Base):
 
         https://www.appveyor.com/docs/api/environments-deployments/#get-environments
         """
-        method_url = 'GET /api/environments'
-        return self._client._request(method_url)
+        return self._client._call(ROUTES['environments.list'])
 
     def settings(self, deployment_environment_id):
         """
@@ -903,11 +1598,8 @@ class Environments(_Base):
 
         https://www.appveyor.com/docs/api/environments-deployments/#get-environment-settings
         """
-        method_url = ('GET /api/environments/'
-                      '{deployment_environment_id}/settings')
-        method_url = method_url.format(
-            deployment_environment_id=deployment_environment_id, )
-        return self._client._request(method_url)
+        return self._client._call(ROUTES['environments.settings'],
+                                  (deployment_environment_id, ))
 
     def deployments(self, deployment_environment_id):
         """
@@ -915,11 +1607,8 @@ class Environments(_Base):
 
         https://www.appveyor.com/docs/api/environments-deployments/#get-environment-deployments
         """
-        method_url = ('GET /api/environments/'
-                      '{deployment_environment_id}/deployments')
-        method_url = method_url.format(
-            deployment_environment_id=deployment_environment_id, )
-        return self._client._request(method_url)
+        return self._client._call(ROUTES['environments.deployments'],
+                                  (deployment_environment_id, ))
 
     def add(self, environment):
         """
@@ -968,9 +1657,7 @@ class Environments(_Base):
 
         https://www.appveyor.com/docs/api/environments-deployments/#add-environment
         """
-        method_url = 'POST /api/environments'
-        body = json.dumps(environment)
-        return self._client._request(method_url, body=body)
+        return self._client._call(ROUTES['environments.add'], body=environment)
 
     def update(self, environment):
         """
@@ -1019,9 +1706,8 @@ class Environments(_Base):
 
         https://www.appveyor.com/docs/api/environments-deployments/#update-environment
         """
-        method_url = 'PUT /api/environments'
-        body = json.dumps(environment)
-        return self._client._request(method_url, body=body)
+        return self._client._call(ROUTES['environments.update'],
+                                  body=environment)
 
     def delete(self, deployment_environment_id):
         """
@@ -1029,10 +1715,8 @@ class Environments(_Base):
 
         https://www.appveyor.com/docs/api/environments-deployments/#delete-environment
         """
-        method_url = 'DELETE /api/environments/{deployment_environment_id}'
-        method_url = method_url.format(
-            deployment_environment_id=deployment_environment_id, )
-        return self._client._request(method_url)
+        return self._client._call(ROUTES['environments.delete'],
+                                  (deployment_environment_id, ))
 
 
 class Deployments(_Base):
@@ -1048,9 +1732,7 @@ class Deployments(_Base):
 
         https://www.appveyor.com/docs/api/environments-deployments/#get-deployment
         """
-        method_url = 'GET /api/deployments/{deployment_id}'
-        method_url = method_url.format(deployment_id=deployment_id)
-        return self._client._request(method_url)
+        return self._client._call(ROUTES['deployments.get'], (deployment_id, ))
 
     def start(self,
               account_name,
@@ -1064,7 +1746,6 @@ class Deployments(_Base):
 
         https://www.appveyor.com/docs/api/environments-deployments/#start-deployment
         """
-        method_url = 'POST /api/deployments'
         data = {
             "environmentName": environment_name,
             "accountName": account_name,
@@ -1077,8 +1758,7 @@ class Deployments(_Base):
         if build_job_id:
             data["buildJobId"] = build_job_id
 
-        body = json.dumps(data)
-        return self._client._request(method_url, body=body)
+        return self._client._call(ROUTES['deployments.start'], body=data)
 
     def cancel(self, deployment_id):
         """
@@ -1086,7 +1766,5 @@ class Deployments(_Base):
 
         https://www.appveyor.com/docs/api/environments-deployments/#cancel-deployment
         """
-        method_url = 'PUT /api/deployments/stop'
         data = {"deploymentId": deployment_id}
-        body = json.dumps(data)
-        return self._client._request(method_url, body=body)
+        return self._client._call(ROUTES['deployments.cancel'], body=data)
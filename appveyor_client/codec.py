@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Appveyor Python Client json codecs."""
+
+# Standard library imports
+import json
+import sys
+
+
+class JsonCodec(object):
+    """
+    Standard library json codec.
+
+    Codecs encode request bodies straight to bytes and decode response
+    bodies from bytes. Subclasses can plug in faster json libraries.
+    """
+
+    name = 'json'
+
+    def dumps(self, obj):
+        """Encode obj to json bytes."""
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+    def loads(self, body):
+        """Decode json bytes."""
+        if sys.version_info < (3, 6):
+            body = body.decode('utf-8')
+        return json.loads(body)
+
+
+class OrjsonCodec(JsonCodec):
+    """Json codec using orjson."""
+
+    name = 'orjson'
+
+    def __init__(self):
+        """Json codec using orjson."""
+        # Third party imports
+        import orjson
+        self._orjson = orjson
+
+    def dumps(self, obj):
+        """Encode obj to json bytes."""
+        return self._orjson.dumps(obj)
+
+    def loads(self, body):
+        """Decode json bytes."""
+        return self._orjson.loads(body)
+
+
+class UjsonCodec(JsonCodec):
+    """Json codec using ujson."""
+
+    name = 'ujson'
+
+    def __init__(self):
+        """Json codec using ujson."""
+        # Third party imports
+        import ujson
+        self._ujson = ujson
+
+    def dumps(self, obj):
+        """Encode obj to json bytes."""
+        return self._ujson.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+    def loads(self, body):
+        """Decode json bytes."""
+        return self._ujson.loads(body)
+
+
+CODECS = (OrjsonCodec, UjsonCodec, JsonCodec)
+
+
+def get_codec(name=None):
+    """
+    Return a json codec instance.
+
+    With no name, return the fastest codec available, trying orjson, ujson
+    and then the standard library json module.
+    """
+    for codec in CODECS:
+        if name is not None and codec.name != name:
+            continue
+
+        try:
+            return codec()
+        except ImportError:
+            if name is not None:
+                raise
+
+    raise ValueError('Unknown json codec: {}'.format(name))
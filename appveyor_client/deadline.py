@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Appveyor Python Client time budgets shared by groups of requests."""
+
+# Standard library imports
+import functools
+import threading
+import time
+
+try:
+    # Standard library imports
+    import contextvars
+except ImportError:  # Python < 3.7
+    contextvars = None
+
+# Monotonic clock the deadlines are measured with
+clock = getattr(time, 'monotonic', time.time)
+
+if contextvars is not None:
+    # Context variables are also inherited by asyncio tasks
+    _CURRENT = contextvars.ContextVar('appveyor_client_deadline',
+                                      default=None)
+
+    def current_deadline():
+        """Return the deadline of the current context, if any."""
+        return _CURRENT.get()
+
+    def _activate(deadline):
+        """Make a deadline current, returning a token to restore."""
+        return _CURRENT.set(deadline)
+
+    def _restore(token):
+        """Restore the deadline active before `_activate`."""
+        _CURRENT.reset(token)
+else:
+    _LOCAL = threading.local()
+
+    def current_deadline():
+        """Return the deadline of the current thread, if any."""
+        return getattr(_LOCAL, 'deadline', None)
+
+    def _activate(deadline):
+        """Make a deadline current, returning a token to restore."""
+        token = current_deadline()
+        _LOCAL.deadline = deadline
+        return token
+
+    def _restore(token):
+        """Restore the deadline active before `_activate`."""
+        _LOCAL.deadline = token
+
+
+class Deadline(object):
+    """
+    Time budget shared by all the requests made inside its context.
+
+    Every request sent in the context, including the sub-requests of
+    paginated and batch operations and the ones sent by their worker
+    threads or tasks, gets the time left as timeout. Once the budget is
+    spent, requests in flight are interrupted and new ones fail right away
+    with `AppveyorTimeoutError`.
+
+    ::
+
+        with Deadline(30):
+            builds = list(client.projects.iter_history('account', 'project'))
+
+    Nested deadlines can only shorten the budget of the enclosing one.
+    """
+
+    def __init__(self, timeout, clock=clock):
+        """Time budget shared by all the requests made inside its context."""
+        self.timeout = timeout
+        self._clock = clock
+        self.expires = clock() + timeout
+        self._tokens = []
+
+    def __repr__(self):
+        """Return the representation of the deadline."""
+        return '<Deadline {:.3f}s left>'.format(self.remaining())
+
+    def __enter__(self):
+        """Make the deadline current."""
+        outer = current_deadline()
+        if outer is not None and outer.expires <= self.expires:
+            self._tokens.append(_activate(outer))
+        else:
+            self._tokens.append(_activate(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        """Restore the enclosing deadline."""
+        _restore(self._tokens.pop())
+
+    def remaining(self):
+        """Return the seconds left, negative once expired."""
+        return self.expires - self._clock()
+
+    def expired(self):
+        """Return True once the budget is spent."""
+        return self.remaining() <= 0
+
+    def limit(self, timeout):
+        """
+        Return a request timeout shortened to the time left.
+
+        `timeout` is a number of seconds, a `(connect, read)` tuple or None.
+        """
+        remaining = max(0, self.remaining())
+        if timeout is None:
+            return remaining
+        elif isinstance(timeout, tuple):
+            return tuple(remaining if value is None else min(value, remaining)
+                         for value in timeout)
+        return min(timeout, remaining)
+
+
+def propagate(func):
+    """
+    Return `func` wrapped to run inside the deadline of the caller.
+
+    Used for calls made in other threads, which do not inherit it.
+    """
+    deadline = current_deadline()
+    if deadline is None:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _activate(deadline)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _restore(token)
+
+    return wrapper
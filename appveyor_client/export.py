@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""
+Appveyor Python Client streaming build history export.
+
+Project histories are read page by page, flattened to one row per job and
+written to NDJSON, CSV or Parquet files (the latter requires `pyarrow`)
+without ever holding a full history in memory.
+
+History pages list builds without their jobs, so by default each build
+gives a single row with empty job columns. Pass `fetch_jobs=True` to
+request the jobs of each build and get one row per job instead.
+
+::
+
+    result = export_history(client, [('account', 'project')], 'export',
+                            format='csv', rows_per_file=100000,
+                            fetch_jobs=True)
+    print(result.paths, result.rows, result.errors)
+"""
+
+# Standard library imports
+import collections
+import csv
+import datetime
+import io
+import json
+import os
+import sys
+
+# Local imports
+from appveyor_client.client import AppveyorClientError
+from appveyor_client.utils import parse_datetime, produce
+
+# (column, api key, kind) of the exported build and job fields
+BUILD_COLUMNS = (
+    ('build_id', 'buildId', 'int'),
+    ('build_number', 'buildNumber', 'int'),
+    ('version', 'version', 'str'),
+    ('branch', 'branch', 'str'),
+    ('is_tag', 'isTag', 'bool'),
+    ('commit_id', 'commitId', 'str'),
+    ('author', 'authorUsername', 'str'),
+    ('status', 'status', 'str'),
+    ('created', 'created', 'datetime'),
+    ('started', 'started', 'datetime'),
+    ('finished', 'finished', 'datetime'),
+)
+JOB_COLUMNS = (
+    ('job_id', 'jobId', 'str'),
+    ('job_name', 'name', 'str'),
+    ('os_type', 'osType', 'str'),
+    ('allow_failure', 'allowFailure', 'bool'),
+    ('job_status', 'status', 'str'),
+    ('job_started', 'started', 'datetime'),
+    ('job_finished', 'finished', 'datetime'),
+    ('tests_count', 'testsCount', 'int'),
+    ('passed_tests_count', 'passedTestsCount', 'int'),
+    ('failed_tests_count', 'failedTestsCount', 'int'),
+    ('artifacts_count', 'artifactsCount', 'int'),
+)
+COLUMNS = ((('account_name', None, 'str'), ('project_slug', None, 'str')) +
+           BUILD_COLUMNS + JOB_COLUMNS)
+
+ExportResult = collections.namedtuple('ExportResult',
+                                      ['paths', 'rows', 'errors'])
+
+
+def _text(value):
+    """Return a field value with datetimes as ISO 8601 strings."""
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+
+def flatten_build(account_name, project_slug, build):
+    """
+    Return the export rows of a build, one per job.
+
+    Rows are tuples ordered as `COLUMNS`. Builds without jobs give a single
+    row with empty job fields.
+    """
+    head = (account_name, project_slug) + tuple(
+        _text(build.get(key)) for _, key, _ in BUILD_COLUMNS)
+    jobs = build.get('jobs') or ()
+    if not jobs:
+        return [head + (None, ) * len(JOB_COLUMNS)]
+    return [head + tuple(_text(job.get(key)) for _, key, _ in JOB_COLUMNS)
+            for job in jobs]
+
+
+def _import_pyarrow():
+    """Return the pyarrow module, with its parquet module imported."""
+    try:
+        # Third party imports
+        import pyarrow
+        import pyarrow.parquet  # noqa
+    except ImportError:
+        raise AppveyorClientError('Parquet export requires pyarrow')
+    return pyarrow
+
+
+# --- Writers
+class NdjsonWriter(object):
+    """Write rows as one json object per line."""
+
+    extension = 'ndjson'
+
+    def __init__(self, path, columns=COLUMNS):
+        """Write rows as one json object per line."""
+        self._names = [name for name, _, _ in columns]
+        self._file = io.open(path, 'w', encoding='utf-8')
+
+    def write_rows(self, rows):
+        """Write a list of rows."""
+        names = self._names
+        self._file.write(u''.join(
+            json.dumps(dict(zip(names, row)), ensure_ascii=False) + u'\n'
+            for row in rows))
+
+    def close(self):
+        """Close the file."""
+        self._file.close()
+
+
+class CsvWriter(object):
+    """Write rows as comma separated values with a header line."""
+
+    extension = 'csv'
+
+    def __init__(self, path, columns=COLUMNS):
+        """Write rows as comma separated values with a header line."""
+        # The Python 2 csv module writes bytes, text is encoded to utf-8
+        self._encode = sys.version_info[0] < 3
+        if self._encode:
+            self._file = open(path, 'wb')
+        else:
+            self._file = io.open(path, 'w', encoding='utf-8', newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow([name for name, _, _ in columns])
+
+    def write_rows(self, rows):
+        """Write a list of rows."""
+        if self._encode:
+            rows = [[value.encode('utf-8')
+                     if isinstance(value, unicode) else value  # noqa
+                     for value in row] for row in rows]
+        self._writer.writerows(rows)
+
+    def close(self):
+        """Close the file."""
+        self._file.close()
+
+
+class ParquetWriter(object):
+    """
+    Write rows to a Parquet file, one row group per list of rows.
+
+    Datetime columns are stored as UTC timestamps. Requires `pyarrow`.
+    """
+
+    extension = 'parquet'
+
+    def __init__(self, path, columns=COLUMNS):
+        """Write rows to a Parquet file, one row group per list of rows."""
+        pyarrow = _import_pyarrow()
+        types = {
+            'str': pyarrow.string(),
+            'int': pyarrow.int64(),
+            'bool': pyarrow.bool_(),
+            'datetime': pyarrow.timestamp('us', tz='UTC'),
+        }
+        self._pyarrow = pyarrow
+        self._kinds = [kind for _, _, kind in columns]
+        self._schema = pyarrow.schema([(name, types[kind])
+                                       for name, _, kind in columns])
+        self._writer = pyarrow.parquet.ParquetWriter(path, self._schema)
+
+    def write_rows(self, rows):
+        """Write a list of rows."""
+        arrays = []
+        for index, (kind, field) in enumerate(zip(self._kinds,
+                                                  self._schema)):
+            values = [row[index] for row in rows]
+            if kind == 'datetime':
+                values = [parse_datetime(value) for value in values]
+            arrays.append(self._pyarrow.array(values, type=field.type))
+        self._writer.write_table(self._pyarrow.Table.from_arrays(
+            arrays, schema=self._schema))
+
+    def close(self):
+        """Close the file."""
+        self._writer.close()
+
+
+WRITERS = {
+    'ndjson': NdjsonWriter,
+    'csv': CsvWriter,
+    'parquet': ParquetWriter,
+}
+
+
+class ChunkedOutput(object):
+    """
+    Split rows over numbered files of at most `rows_per_file` rows.
+
+    Files are named `<prefix>-00000.<extension>`, `<prefix>-00001...` and
+    are only created once they have rows to hold.
+    """
+
+    def __init__(self,
+                 directory,
+                 writer_class,
+                 rows_per_file=100000,
+                 prefix='history',
+                 columns=COLUMNS):
+        """Split rows over numbered files of at most `rows_per_file` rows."""
+        if rows_per_file < 1:
+            raise ValueError('rows_per_file must be at least 1')
+
+        self.directory = directory
+        self.writer_class = writer_class
+        self.rows_per_file = rows_per_file
+        self.prefix = prefix
+        self.columns = columns
+        self.paths = []
+        self.rows = 0
+        self._writer = None
+        self._free = 0
+
+    def write_rows(self, rows):
+        """Write a list of rows, opening new files as needed."""
+        start = 0
+        while start < len(rows):
+            if not self._free:
+                self._open()
+            chunk = rows[start:start + self._free]
+            self._writer.write_rows(chunk)
+            start += len(chunk)
+            self._free -= len(chunk)
+            self.rows += len(chunk)
+
+    def close(self):
+        """Close the current file."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            self._free = 0
+
+    def _open(self):
+        """Close the current file and open the next one."""
+        self.close()
+        path = os.path.join(self.directory, '{}-{:05d}.{}'.format(
+            self.prefix, len(self.paths), self.writer_class.extension))
+        self._writer = self.writer_class(path, self.columns)
+        self.paths.append(path)
+        self._free = self.rows_per_file
+
+    def __enter__(self):
+        """Enter the context."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close the current file on exit of the context."""
+        self.close()
+
+
+# --- Export
+def export_history(client,
+                   projects,
+                   directory,
+                   format='ndjson',
+                   rows_per_file=100000,
+                   branch=None,
+                   since=None,
+                   fetch_jobs=False,
+                   max_workers=8,
+                   max_pending=16,
+                   records_per_page=100,
+                   prefix='history'):
+    """
+    Export project histories to chunked NDJSON, CSV or Parquet files.
+
+    `projects` is a list of `(account_name, project_slug)` tuples, exported
+    concurrently by up to `max_workers` threads following their history
+    pages (filtered by `branch` and the `since` datetime). Each page is
+    flattened to one row per job and handed to the writer, at most
+    `max_pending` pages waiting at a time, so memory stays bounded no
+    matter the size of the histories.
+
+    History pages list builds without their jobs, which are exported as a
+    single row with empty job columns. With `fetch_jobs=True` the jobs of
+    such builds are requested, one request per build, to export one row
+    per job.
+
+    Return an `ExportResult` with the written file paths, the number of
+    rows and the `((account_name, project_slug), error)` pairs of the
+    projects that failed, whose rows may be partially exported.
+    """
+    writer_class = WRITERS.get(format)
+    if writer_class is None:
+        raise ValueError('Unknown export format: {}'.format(format))
+    if writer_class is ParquetWriter:
+        _import_pyarrow()
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    def rows_of(account_name, project_slug, build):
+        if fetch_jobs and not build.get('jobs'):
+            build = client.projects.build(account_name, project_slug,
+                                          build['version'])['build']
+        return flatten_build(account_name, project_slug, build)
+
+    def export(project, put, stop):
+        rows = []
+        try:
+            for build in client.projects.iter_history(
+                    project[0], project[1], branch=branch, since=since,
+                    records_per_page=records_per_page):
+                rows.extend(rows_of(project[0], project[1], build))
+                if len(rows) >= records_per_page:
+                    if not put(rows):
+                        return
+                    rows = []
+        except Exception as error:
+            put(rows)
+            put((project, error))
+        else:
+            put(rows)
+
+    errors = []
+    output = ChunkedOutput(directory, writer_class, rows_per_file, prefix)
+    pages = produce(export, [tuple(project) for project in projects],
+                    max_workers, max_pending)
+    try:
+        with output:
+            for item in pages:
+                if isinstance(item, tuple):
+                    errors.append(item)
+                elif item:
+                    output.write_rows(item)
+    finally:
+        pages.close()
+
+    return ExportResult(output.paths, output.rows, errors)
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Appveyor Python Client project index."""
+
+# Standard library imports
+import threading
+import time
+
+
+class ProjectIndex(object):
+    """
+    In memory index of the account projects.
+
+    Projects are looked up by repository full name (case insensitive),
+    project id or slug. A slug shared by projects of several accounts is
+    ambiguous and only found together with its account name. The project
+    list is downloaded again once `ttl` seconds have passed, or on a lookup
+    miss if the index is older than `miss_ttl` seconds, so unknown keys
+    cause at most one refresh per `miss_ttl`.
+
+    Only one download runs at a time. Lookups answered by the current index
+    do not wait for it, lookups needing a newer index do.
+    """
+
+    def __init__(self, projects, ttl=300, miss_ttl=10, clock=None):
+        """In memory index of the account projects."""
+        self._projects = projects
+        self._ttl = ttl
+        self._miss_ttl = miss_ttl
+        self._clock = clock or time.time
+        self._changed = threading.Condition()
+        self._refreshing = False
+        self._updated = None
+        self._by_repo = {}
+        self._by_id = {}
+        self._by_slug = {}
+
+    def refresh(self):
+        """Download the project list and rebuild the index."""
+        self._refresh()
+
+    def _refresh(self, wait=True):
+        """
+        Rebuild the index from a new download of the project list.
+
+        If a download is already running, wait for it to finish instead of
+        starting another one, or return right away without `wait`.
+        """
+        with self._changed:
+            if self._refreshing:
+                while wait and self._refreshing:
+                    self._changed.wait()
+                return
+            self._refreshing = True
+
+        tables = None
+        try:
+            tables = self._build(self._projects.get())
+        finally:
+            with self._changed:
+                if tables is not None:
+                    self._by_repo, self._by_id, self._by_slug = tables
+                    self._updated = self._clock()
+                self._refreshing = False
+                self._changed.notify_all()
+
+    @staticmethod
+    def _build(projects):
+        """Return the lookup tables of a project list."""
+        by_repo, by_id, by_slug = {}, {}, {}
+        for project in projects:
+            repository_name = project.get('repositoryName')
+            if repository_name:
+                by_repo[repository_name.lower()] = project
+            by_id[project['projectId']] = project
+            by_slug[(project['accountName'], project['slug'])] = project
+
+            # Slugs shared by several accounts map to None
+            slug = project['slug']
+            by_slug[slug] = None if slug in by_slug else project
+        return by_repo, by_id, by_slug
+
+    def _expired(self, ttl):
+        """Return True if the index is older than ttl seconds."""
+        updated = self._updated
+        return updated is None or self._clock() - updated >= ttl
+
+    def _lookup(self, table_name, key):
+        """Return the project for key in the given table or None."""
+        if self._expired(self._ttl):
+            # Keep answering from the previous index while it is refreshed
+            self._refresh(wait=self._updated is None)
+
+        table = getattr(self, table_name)
+        if key in table:
+            return table[key]
+
+        if self._expired(self._miss_ttl):
+            self._refresh()
+            return getattr(self, table_name).get(key)
+        return None
+
+    def by_repo(self, repo_full_name):
+        """Return the project for a repository full name or None."""
+        return self._lookup('_by_repo', repo_full_name.lower())
+
+    def by_id(self, project_id):
+        """Return the project for a project id or None."""
+        return self._lookup('_by_id', project_id)
+
+    def by_slug(self, project_slug, account_name=None):
+        """
+        Return the project for a slug, optionally within an account.
+
+        Return None for a slug shared by projects of several accounts if
+        `account_name` is not given.
+        """
+        key = project_slug if account_name is None else (account_name,
+                                                         project_slug)
+        return self._lookup('_by_slug', key)
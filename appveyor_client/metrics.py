@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Appveyor Python Client request instrumentation."""
+
+# Standard library imports
+import bisect
+import collections
+import re
+import threading
+
+# Local imports
+from appveyor_client.routes import ENDPOINTS, template_pattern
+
+# Path templates of the api endpoints, used to group metrics
+ENDPOINT_TEMPLATES = tuple(
+    collections.OrderedDict((template, None)
+                            for _, _, template, _ in ENDPOINTS))
+
+# Latency histogram bucket upper bounds in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _compile_templates(templates):
+    """Compile path templates to regular expressions, literal ones first."""
+    compiled = []
+    for template in templates:
+        # Artifact file names may contain slashes
+        pattern = template_pattern(template, patterns={'file_name': '.+'})
+        literal = template.count('{')
+        compiled.append((literal, re.compile(pattern + '$'), template))
+    return [(regex, template) for _, regex, template in sorted(
+        compiled, key=lambda item: item[0])]
+
+
+_TEMPLATES = _compile_templates(ENDPOINT_TEMPLATES)
+
+
+def endpoint_template(url):
+    """Return the api path template matching a request url."""
+    path = url.split('?', 1)[0]
+    for regex, template in _TEMPLATES:
+        if regex.match(path):
+            return template
+    return path
+
+
+class RequestInfo(object):
+    """Details of a single request attempt passed to request hooks."""
+
+    __slots__ = ('method', 'url', 'endpoint', 'attempt', 'started', 'elapsed',
+                 'status_code', 'bytes_sent', 'bytes_received', 'error')
+
+    def __init__(self, method, url, attempt=0, bytes_sent=0):
+        """Details of a single request attempt passed to request hooks."""
+        self.method = method
+        self.url = url
+        self.endpoint = endpoint_template(url)
+        self.attempt = attempt
+        self.started = None
+        self.elapsed = None
+        self.status_code = None
+        self.bytes_sent = bytes_sent
+        self.bytes_received = 0
+        self.error = None
+
+
+class MetricsCollector(object):
+    """
+    Collect request metrics from the client request hooks.
+
+    Records per endpoint template latency histograms, status code counters,
+    retry counts, bytes transferred and the number of requests in flight.
+
+    ::
+
+        metrics = MetricsCollector()
+        client = AppveyorClient(token, metrics=metrics)
+        ...
+        print(metrics.prometheus())
+    """
+
+    def __init__(self, buckets=BUCKETS, prefix='appveyor_client'):
+        """Collect request metrics from the client request hooks."""
+        self.buckets = tuple(buckets)
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Reset all metrics."""
+        with self._lock:
+            self._requests = collections.Counter()
+            self._retries = collections.Counter()
+            self._bytes_sent = collections.Counter()
+            self._bytes_received = collections.Counter()
+            self._histograms = {}
+            self._in_flight = 0
+
+    # --- Hooks
+    def pre_request(self, info):
+        """Record the start of a request attempt."""
+        with self._lock:
+            self._in_flight += 1
+            if info.attempt:
+                self._retries[(info.method, info.endpoint)] += 1
+
+    def post_request(self, info):
+        """Record the end of a request attempt."""
+        key = (info.method, info.endpoint)
+        status = 'error' if info.status_code is None else str(
+            info.status_code)
+        with self._lock:
+            self._in_flight -= 1
+            self._requests[key + (status, )] += 1
+            self._bytes_sent[key] += info.bytes_sent
+            self._bytes_received[key] += info.bytes_received
+
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [
+                    [0] * (len(self.buckets) + 1), 0.0, 0
+                ]
+            counts = histogram[0]
+            counts[bisect.bisect_left(self.buckets, info.elapsed)] += 1
+            histogram[1] += info.elapsed
+            histogram[2] += 1
+
+    # --- Output
+    def snapshot(self):
+        """Return the current metrics as a dictionary."""
+        with self._lock:
+            latency = {}
+            for key, (counts, total, count) in self._histograms.items():
+                cumulative, buckets = 0, []
+                for bound, bucket_count in zip(self.buckets + (None, ),
+                                               counts):
+                    cumulative += bucket_count
+                    buckets.append((bound, cumulative))
+                latency[key] = {
+                    'buckets': buckets,
+                    'sum': total,
+                    'count': count,
+                }
+
+            return {
+                'requests': dict(self._requests),
+                'retries': dict(self._retries),
+                'bytes_sent': dict(self._bytes_sent),
+                'bytes_received': dict(self._bytes_received),
+                'latency': latency,
+                'in_flight': self._in_flight,
+            }
+
+    def prometheus(self):
+        """Return the current metrics in the Prometheus text format."""
+        snapshot = self.snapshot()
+        prefix = self.prefix
+        lines = []
+
+        def labels(method, endpoint, **extra):
+            items = [('method', method), ('endpoint', endpoint)]
+            items.extend(sorted(extra.items()))
+            return '{' + ','.join('{}="{}"'.format(name, value)
+                                  for name, value in items) + '}'
+
+        def counter(name, help_text, values, extra=None):
+            lines.append('# HELP {}_{} {}'.format(prefix, name, help_text))
+            lines.append('# TYPE {}_{} counter'.format(prefix, name))
+            for key, value in sorted(values.items()):
+                kwargs = {extra: key[2]} if extra else {}
+                lines.append('{}_{}{} {}'.format(
+                    prefix, name, labels(key[0], key[1], **kwargs), value))
+
+        counter('requests_total', 'Requests by status code.',
+                snapshot['requests'], extra='status')
+        counter('retries_total', 'Retried requests.', snapshot['retries'])
+        counter('sent_bytes_total', 'Request body bytes sent.',
+                snapshot['bytes_sent'])
+        counter('received_bytes_total', 'Response body bytes received.',
+                snapshot['bytes_received'])
+
+        name = prefix + '_request_duration_seconds'
+        lines.append('# HELP {} Request latency.'.format(name))
+        lines.append('# TYPE {} histogram'.format(name))
+        for (method, endpoint), data in sorted(snapshot['latency'].items()):
+            for bound, count in data['buckets']:
+                le = '+Inf' if bound is None else repr(bound)
+                lines.append('{}_bucket{} {}'.format(
+                    name, labels(method, endpoint, le=le), count))
+            lines.append('{}_sum{} {}'.format(name, labels(method, endpoint),
+                                              data['sum']))
+            lines.append('{}_count{} {}'.format(
+                name, labels(method, endpoint), data['count']))
+
+        lines.append('# HELP {}_in_flight Requests in flight.'.format(prefix))
+        lines.append('# TYPE {}_in_flight gauge'.format(prefix))
+        lines.append('{}_in_flight {}'.format(prefix, snapshot['in_flight']))
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Appveyor Python Client deployment environment mirror."""
+
+# Standard library imports
+import collections
+import time
+
+# Local imports
+from appveyor_client.utils import fan_out
+
+# Change kinds
+ENVIRONMENT_ADDED = 'environment_added'
+ENVIRONMENT_REMOVED = 'environment_removed'
+SETTINGS_CHANGED = 'settings_changed'
+DEPLOYMENT_ADDED = 'deployment_added'
+STATUS_CHANGED = 'status_changed'
+
+Change = collections.namedtuple('Change',
+                                ['kind', 'environment', 'deployment',
+                                 'previous'])
+
+
+def _deployment(item):
+    """Return the deployment of an environment deployments list item."""
+    return item.get('deployment', item)
+
+
+class DeploymentMirror(object):
+    """
+    Local copy of the deployment environments and their deployments.
+
+    Each `refresh` fetches the environment list and the deployments of
+    every environment concurrently, diffs them against the previous
+    snapshot and returns only the `Change` events. Environment settings are
+    fetched again only when the `updated` date of an environment changes,
+    and deployment lists whose ids and statuses did not change are skipped
+    without any further work.
+
+    ::
+
+        mirror = DeploymentMirror(client)
+        for change in mirror.watch(interval=30):
+            print(change.kind, change.environment['name'])
+
+    The `previous` field holds the former deployment of `status_changed`
+    events and the former settings of `settings_changed` ones. Project
+    deployments are answered from the local copy by `project_deployments`.
+    Works with the synchronous `AppveyorClient`.
+    """
+
+    def __init__(self, client, max_workers=8):
+        """Local copy of the deployment environments and deployments."""
+        self._client = client
+        self.max_workers = max_workers
+        # deployment_environment_id -> environment
+        self._environments = {}
+        # deployment_environment_id -> environment settings
+        self._settings = {}
+        # deployment_environment_id -> `updated` date of the stored settings
+        self._updated = {}
+        # deployment_environment_id -> {deployment_id: list item}
+        self._deployments = {}
+        # deployment_environment_id -> ((deployment_id, status), ...)
+        self._signatures = {}
+        # (deployment_environment_id, error) of the last refresh
+        self.errors = []
+
+    # --- Snapshot
+    def environments(self):
+        """Return the mirrored environments."""
+        return list(self._environments.values())
+
+    def settings(self, environment_id):
+        """Return the mirrored settings of an environment."""
+        return self._settings.get(environment_id)
+
+    def deployments(self, environment_id):
+        """Return the mirrored deployments of an environment, newest first."""
+        return list(self._deployments.get(environment_id, {}).values())
+
+    def project_deployments(self, account_name, project_slug):
+        """Return the mirrored deployments of a project, newest first."""
+        items = []
+        for deployments in self._deployments.values():
+            for item in deployments.values():
+                project = item.get('project') or {}
+                if (project.get('accountName') == account_name and
+                        project.get('slug') == project_slug):
+                    items.append(item)
+        return sorted(items, key=lambda item: _deployment(item)[
+            'deploymentId'], reverse=True)
+
+    # --- Refresh
+    def refresh(self):
+        """
+        Update the mirror and return the list of changes.
+
+        Environments whose requests fail keep their previous state (so their
+        changes are reported by a later refresh), and the errors are stored
+        in `errors`.
+        """
+        changes = []
+        environments = collections.OrderedDict(
+            (environment['deploymentEnvironmentId'], environment)
+            for environment in self._client.environments.get())
+
+        for environment_id in list(self._environments):
+            if environment_id not in environments:
+                changes.append(Change(ENVIRONMENT_REMOVED,
+                                      self._environments[environment_id],
+                                      None, None))
+                self._forget(environment_id)
+
+        tasks = []
+        for environment_id, environment in environments.items():
+            previous = self._environments.get(environment_id)
+            if previous is None:
+                changes.append(Change(ENVIRONMENT_ADDED, environment, None,
+                                      None))
+            # Settings that failed to load are fetched again next time
+            if (environment_id not in self._updated or
+                    self._updated[environment_id] != environment.get(
+                        'updated')):
+                tasks.append(('settings', environment_id))
+            tasks.append(('deployments', environment_id))
+            self._environments[environment_id] = environment
+
+        def fetch(kind, environment_id):
+            if kind == 'settings':
+                result = self._client.environments.settings(environment_id)
+                return result.get('environment', result)
+            return self._client.environments.deployments(environment_id)
+
+        self.errors = []
+        for result in fan_out(fetch, tasks, max_workers=self.max_workers):
+            kind, environment_id = result.item
+            if result.error is not None:
+                self.errors.append((environment_id, result.error))
+            elif kind == 'settings':
+                changes.extend(self._update_settings(environment_id,
+                                                     result.result))
+                self._updated[environment_id] = environments[
+                    environment_id].get('updated')
+            else:
+                changes.extend(self._update_deployments(
+                    environment_id, result.result.get('deployments') or []))
+        return changes
+
+    def watch(self, interval=60, sleep=None):
+        """Refresh every `interval` seconds, yielding changes forever."""
+        sleep = sleep or time.sleep
+        while True:
+            for change in self.refresh():
+                yield change
+            sleep(interval)
+
+    def _forget(self, environment_id):
+        """Drop the state of a removed environment."""
+        for state in (self._environments, self._settings, self._updated,
+                      self._deployments, self._signatures):
+            state.pop(environment_id, None)
+
+    def _update_settings(self, environment_id, environment):
+        """Store fetched settings and return the change, if any."""
+        settings = environment.get('settings')
+        known = environment_id in self._settings
+        previous = self._settings.get(environment_id)
+        self._settings[environment_id] = settings
+        if known and settings != previous:
+            return [Change(SETTINGS_CHANGED,
+                           self._environments[environment_id], None,
+                           previous)]
+        return []
+
+    def _update_deployments(self, environment_id, items):
+        """Store a fetched deployment list and return its changes."""
+        signature = tuple((_deployment(item)['deploymentId'],
+                           _deployment(item).get('status')) for item in items)
+        if signature == self._signatures.get(environment_id):
+            return []
+
+        environment = self._environments[environment_id]
+        previous = self._deployments.get(environment_id, {})
+        current = collections.OrderedDict()
+        changes = []
+        for item in items:
+            deployment = _deployment(item)
+            deployment_id = deployment['deploymentId']
+            old = previous.get(deployment_id)
+            if old is None:
+                changes.append(Change(DEPLOYMENT_ADDED, environment, item,
+                                      None))
+            elif _deployment(old).get('status') != deployment.get('status'):
+                changes.append(Change(STATUS_CHANGED, environment, item,
+                                      old))
+            current[deployment_id] = item
+
+        self._deployments[environment_id] = current
+        self._signatures[environment_id] = signature
+        return changes
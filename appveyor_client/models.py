@@ -0,0 +1,466 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""
+Appveyor Python Client typed models.
+
+Compact alternatives to the raw api dictionaries. Fields are stored in
+`__slots__`, repeated values like statuses, branches, author and job names
+are interned, nested records (jobs, messages, artifacts, ...) are models
+too, and datetime fields are stored as epoch seconds and returned as naive
+UTC datetimes. A page of history builds takes about a third of the memory
+of the same page as dictionaries.
+
+Models are also read only mappings keyed by the api field names (unset
+fields are left out), so code written for the raw dictionaries keeps
+working. Use `to_dict` to get plain dictionaries, for instance to serialize
+them to json.
+
+::
+
+    client = AppveyorClient(token, models=True)
+    build = client.projects.last_build('account', 'project')['build']
+    build.jobs[0].status, build['jobs'][0]['status']
+"""
+
+# Standard library imports
+import sys
+
+try:
+    # Standard library imports
+    from collections.abc import Mapping
+except ImportError:  # Python 2
+    from collections import Mapping
+
+# Local imports
+from appveyor_client.utils import epoch_seconds, from_epoch_seconds
+
+# Field kinds, besides the name of a nested model
+DATETIME = 'datetime'
+INTERN = 'intern'
+
+try:
+    _intern = sys.intern
+except AttributeError:  # Python 2
+    _intern = intern  # noqa
+
+
+def intern_string(value):
+    """Intern low cardinality strings so records share a single copy."""
+    try:
+        return _intern(value)
+    except TypeError:
+        return value
+
+
+def _camel_case(name):
+    """Convert a snake case attribute name to the api camel case key."""
+    first, rest = name.split('_')[0], name.split('_')[1:]
+    return first + ''.join(word[:1].upper() + word[1:] for word in rest)
+
+
+class _ModelMeta(type):
+    """Build slots and field properties from the model field spec."""
+
+    def __new__(mcs, name, bases, namespace):
+        """Build slots and field properties from the model field spec."""
+        fields = namespace.pop('fields', ())
+        specs = []
+        for field in fields:
+            if isinstance(field, tuple):
+                attr, kind = field
+            else:
+                attr, kind = field, None
+            specs.append((attr, _camel_case(attr), kind))
+
+        namespace['__slots__'] = tuple(namespace.get('__slots__', ())) + tuple(
+            '_' + attr for attr, _, _ in specs)
+        cls = type.__new__(mcs, name, bases, namespace)
+        for attr, key, kind in specs:
+            setattr(cls, attr, _field_property('_' + attr, kind))
+
+        cls._specs = tuple(specs)
+        cls._keys = dict((key, attr) for attr, key, _ in specs)
+        cls._slots = dict((key, ('_' + attr, kind))
+                          for attr, key, kind in specs)
+        return cls
+
+
+def _field_property(slot, kind):
+    """Return a property reading a field."""
+    if kind == DATETIME:
+
+        def getter(self):
+            value = getattr(self, slot, None)
+            if value.__class__ is float:
+                return from_epoch_seconds(value)
+            return value
+    else:
+
+        def getter(self):
+            return getattr(self, slot, None)
+
+    return property(getter)
+
+
+def _convert(kind, value):
+    """Return the stored form of a field value of the given kind."""
+    if kind == INTERN:
+        return intern_string(value)
+    elif kind == DATETIME:
+        try:
+            return epoch_seconds(value)
+        except (TypeError, ValueError):
+            return value
+
+    model = MODELS[kind]
+    if isinstance(value, dict):
+        return model.from_dict(value)
+    elif isinstance(value, list):
+        return [model.from_dict(item) if isinstance(item, dict) else item
+                for item in value]
+    return value
+
+
+Base = _ModelMeta('Base', (object, ), {'__slots__': ()})
+
+
+class Model(Base):
+    """Base class of api models."""
+
+    __slots__ = ('_extra', )
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create a model from an api dictionary."""
+        # Fields missing from the dictionary are left unset, and read as None
+        self = cls.__new__(cls)
+        slots = cls._slots
+        extra = None
+        for key, value in data.items():
+            spec = slots.get(key)
+            if spec is None:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+            else:
+                slot, kind = spec
+                if kind is not None and value is not None:
+                    value = _convert(kind, value)
+                setattr(self, slot, value)
+
+        self._extra = extra
+        return self
+
+    def to_dict(self):
+        """Convert the model back to an api dictionary."""
+        data = dict(self._extra or {})
+        for attr, key, kind in self._specs:
+            value = getattr(self, '_' + attr, None)
+            if value is None:
+                continue
+            elif kind == DATETIME and value.__class__ is float:
+                value = from_epoch_seconds(value).isoformat() + '+00:00'
+            elif isinstance(value, Model):
+                value = value.to_dict()
+            elif isinstance(value, list):
+                value = [item.to_dict() if isinstance(item, Model) else item
+                         for item in value]
+            data[key] = value
+        return data
+
+    # --- Mapping interface
+    def __getitem__(self, key):
+        """Return a field by api key."""
+        attr = self._keys.get(key)
+        if attr is not None:
+            return getattr(self, attr)
+        elif self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        """Return True if the api key is set."""
+        attr = self._keys.get(key)
+        if attr is not None:
+            return getattr(self, '_' + attr, None) is not None
+        return bool(self._extra) and key in self._extra
+
+    def get(self, key, default=None):
+        """Return a field by api key, or default if not set."""
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return default if value is None else value
+
+    def __iter__(self):
+        """Iterate over the api keys that are set."""
+        for attr, key, _ in self._specs:
+            if getattr(self, '_' + attr, None) is not None:
+                yield key
+        if self._extra:
+            for key in self._extra:
+                yield key
+
+    def __len__(self):
+        """Return the number of api keys that are set."""
+        return sum(1 for _ in self)
+
+    def keys(self):
+        """Return the api keys that are set."""
+        return list(self)
+
+    def values(self):
+        """Return the values of the api keys that are set."""
+        return [self[key] for key in self]
+
+    def items(self):
+        """Return the `(key, value)` pairs of the api keys that are set."""
+        return [(key, self[key]) for key in self]
+
+    def __eq__(self, other):
+        """Compare models, or a model and a dictionary, by their api keys."""
+        if isinstance(other, Model):
+            return self.to_dict() == other.to_dict()
+        elif isinstance(other, Mapping):
+            return self.to_dict() == dict(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        """Compare models, or a model and a dictionary, by their api keys."""
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    # Equal to dictionaries, which are not hashable
+    __hash__ = None
+
+    def __repr__(self):
+        """Return a short representation showing the model id."""
+        attr = self._specs[0][0]
+        return '<{} {}={!r}>'.format(
+            type(self).__name__, attr, getattr(self, attr))
+
+
+Mapping.register(Model)
+
+
+class Message(Model):
+    """Build or job message."""
+
+    fields = (
+        'message',
+        ('category', INTERN),
+        'details',
+        ('created', DATETIME),
+    )
+
+
+class Artifact(Model):
+    """Job artifact."""
+
+    fields = (
+        'file_name',
+        'name',
+        ('type', INTERN),
+        'size',
+        ('created', DATETIME),
+    )
+
+
+class Job(Model):
+    """Build job."""
+
+    fields = (
+        'job_id',
+        ('name', INTERN),
+        ('os_type', INTERN),
+        'allow_failure',
+        'messages_count',
+        'compilation_messages_count',
+        'compilation_errors_count',
+        'compilation_warnings_count',
+        'tests_count',
+        'passed_tests_count',
+        'failed_tests_count',
+        'artifacts_count',
+        ('status', INTERN),
+        ('messages', 'Message'),
+        ('artifacts', 'Artifact'),
+        ('started', DATETIME),
+        ('finished', DATETIME),
+        ('created', DATETIME),
+        ('updated', DATETIME),
+    )
+
+
+class Build(Model):
+    """Project build."""
+
+    fields = (
+        'build_id',
+        'build_number',
+        'version',
+        'message',
+        'message_extended',
+        ('branch', INTERN),
+        'is_tag',
+        'tag',
+        'commit_id',
+        ('author_name', INTERN),
+        ('author_username', INTERN),
+        ('committer_name', INTERN),
+        ('committer_username', INTERN),
+        ('status', INTERN),
+        'pull_request_id',
+        'pull_request_name',
+        'pull_request_head_branch',
+        'pull_request_head_commit_id',
+        'pull_request_head_repository',
+        ('jobs', 'Job'),
+        ('messages', 'Message'),
+        ('committed', DATETIME),
+        ('started', DATETIME),
+        ('finished', DATETIME),
+        ('created', DATETIME),
+        ('updated', DATETIME),
+    )
+
+
+class Project(Model):
+    """Appveyor project."""
+
+    fields = (
+        'project_id',
+        'account_id',
+        ('account_name', INTERN),
+        'name',
+        'slug',
+        ('repository_type', INTERN),
+        ('repository_scm', INTERN),
+        'repository_name',
+        ('repository_branch', INTERN),
+        'is_private',
+        'skip_branches_without_appveyor_yml',
+        ('builds', 'Build'),
+        ('created', DATETIME),
+        ('updated', DATETIME),
+    )
+
+
+class Environment(Model):
+    """Deployment environment."""
+
+    fields = (
+        'deployment_environment_id',
+        'name',
+        ('provider', INTERN),
+        'environment_access_key',
+        'settings',
+        ('created', DATETIME),
+        ('updated', DATETIME),
+    )
+
+
+class Deployment(Model):
+    """Environment deployment."""
+
+    fields = (
+        'deployment_id',
+        ('status', INTERN),
+        ('build', 'Build'),
+        ('environment', 'Environment'),
+        ('jobs', 'Job'),
+        ('started', DATETIME),
+        ('finished', DATETIME),
+        ('created', DATETIME),
+        ('updated', DATETIME),
+    )
+
+
+class User(Model):
+    """Account user."""
+
+    fields = (
+        'user_id',
+        'account_id',
+        ('account_name', INTERN),
+        'full_name',
+        'email',
+        'role_id',
+        ('role_name', INTERN),
+        ('successful_build_notification', INTERN),
+        ('failed_build_notification', INTERN),
+        'notify_when_build_status_changed_only',
+        ('created', DATETIME),
+        ('updated', DATETIME),
+    )
+
+
+class Role(Model):
+    """Account role."""
+
+    fields = (
+        'role_id',
+        'name',
+        'is_system',
+        'groups',
+        ('created', DATETIME),
+        ('updated', DATETIME),
+    )
+
+
+MODELS = dict((model.__name__, model) for model in (
+    Artifact, Build, Deployment, Environment, Job, Message, Project, Role,
+    User))
+
+# Keys identifying the model of an api dictionary, most specific first
+ID_KEYS = (
+    ('deploymentId', Deployment),
+    ('deploymentEnvironmentId', Environment),
+    ('jobId', Job),
+    ('buildId', Build),
+    ('projectId', Project),
+    ('userId', User),
+    ('roleId', Role),
+)
+
+
+def model_for(data):
+    """Return the model class for an api dictionary, or None."""
+    for key, model in ID_KEYS:
+        if key in data:
+            return model
+    return None
+
+
+def to_models(contents):
+    """
+    Convert api response contents to models where possible.
+
+    Lists of entities are converted item by item, and envelope dictionaries
+    (like `{'project': ..., 'builds': [...]}`, or the items of environment
+    deployment lists) keep their keys with each value converted.
+    """
+    if isinstance(contents, dict) and model_for(contents) is None:
+        return dict((key, _to_model(value))
+                    for key, value in contents.items())
+    return _to_model(contents)
+
+
+def _to_model(value):
+    """Convert an api dictionary or list of dictionaries to models."""
+    if isinstance(value, dict):
+        model = model_for(value)
+        if model is not None:
+            return model.from_dict(value)
+    elif isinstance(value, list) and value and isinstance(value[0], dict):
+        model = model_for(value[0])
+        if model is not None:
+            return [model.from_dict(item) for item in value]
+        return [to_models(item) for item in value]
+    return value
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Appveyor Python Client retry policy and rate limiter."""
+
+# Standard library imports
+import calendar
+import email.utils
+import random
+import threading
+import time
+
+
+class RetryPolicy(object):
+    """
+    Retry policy with exponential backoff and jitter.
+
+    Failed requests are retried up to `max_retries` times when the response
+    status is in `status_forcelist` or the connection failed. Only
+    idempotent methods are retried, unless `retry_post` is True. Throttled
+    requests (429) are always retried, as the server did not process them.
+
+    The delay before retry number `n` (starting at 0) is a random value
+    between 0 and `min(max_backoff, backoff_factor * 2 ** n)` (full jitter),
+    or the `Retry-After` header value when the server sends one, capped to
+    `max_retry_after`.
+    """
+
+    IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+    def __init__(self,
+                 max_retries=3,
+                 backoff_factor=0.5,
+                 max_backoff=30,
+                 status_forcelist=(429, 500, 502, 503, 504),
+                 retry_post=False,
+                 max_retry_after=120,
+                 jitter=True):
+        """Retry policy with exponential backoff and jitter."""
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.status_forcelist = frozenset(status_forcelist)
+        self.retry_post = retry_post
+        self.max_retry_after = max_retry_after
+        self.jitter = jitter
+
+    def is_retryable(self, method, attempt, status_code=None,
+                     idempotent=None):
+        """
+        Return True if a failed attempt should be retried.
+
+        `status_code` is None when the request failed to connect.
+        `idempotent` overrides the idempotency of the method, as declared
+        by the api route.
+        """
+        if attempt >= self.max_retries:
+            return False
+
+        if (status_code is not None and
+                status_code not in self.status_forcelist):
+            return False
+
+        if status_code == 429:
+            return True
+
+        if idempotent is None:
+            idempotent = method.upper() in self.IDEMPOTENT_METHODS
+        return idempotent or (self.retry_post and method.upper() == 'POST')
+
+    def delay(self, attempt, retry_after=None):
+        """Return the seconds to wait before retrying the given attempt."""
+        seconds = parse_retry_after(retry_after)
+        if seconds is not None:
+            return min(seconds, self.max_retry_after)
+
+        backoff = min(self.max_backoff, self.backoff_factor * (2**attempt))
+        if self.jitter:
+            backoff = random.uniform(0, backoff)
+        return backoff
+
+
+def parse_retry_after(value):
+    """Return the seconds to wait given a `Retry-After` header value."""
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    parsed = email.utils.parsedate_tz(value)
+    if parsed is None:
+        return None
+
+    timestamp = calendar.timegm(parsed[:9]) - (parsed[9] or 0)
+    return max(0.0, timestamp - time.time())
+
+
+class RateLimiter(object):
+    """
+    Client side token bucket rate limiter.
+
+    Allows `rate` requests per second on average with bursts of up to
+    `burst` requests. Thread safe.
+
+    ::
+
+        # Stay under 600 requests per minute
+        limiter = RateLimiter(rate=10, burst=20)
+        client = AppveyorClient(token, rate_limiter=limiter)
+    """
+
+    def __init__(self, rate, burst=1, clock=None):
+        """Client side token bucket rate limiter."""
+        self.rate = float(rate)
+        self.burst = burst
+        self._clock = clock or time.time
+        self._tokens = float(burst)
+        self._updated = self._clock()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Take a token and return the seconds to wait before using it.
+
+        Tokens can be reserved ahead of time, so callers waiting concurrently
+        are spaced out instead of waking up at once.
+        """
+        with self._lock:
+            now = self._clock()
+            elapsed = max(0.0, now - self._updated)
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        """Block until a request is allowed."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""
+Appveyor Python Client api endpoint registry.
+
+Every api endpoint is declared once with its verb, path template, query
+parameters, body kind, idempotency and cacheability, and compiled at
+import time. The api groups send their requests through these routes, and
+the clients use the metadata to decide what to cache, retry and batch.
+
+https://www.appveyor.com/docs/api/
+"""
+
+# Standard library imports
+import re
+
+# Third party imports
+from requests.compat import quote
+
+# Local imports
+from appveyor_client.retry import RetryPolicy
+
+PLACEHOLDER_RE = re.compile(r'\{(\w+)\}')
+
+IDEMPOTENT_METHODS = RetryPolicy.IDEMPOTENT_METHODS
+
+# Request body kinds
+JSON = 'json'
+TEXT = 'text'
+
+# Characters that never need quoting in a path argument or query value
+_SAFE_PATH_RE = re.compile(r'[A-Za-z0-9_.~/-]*$')
+_SAFE_QUERY_RE = re.compile(r'[A-Za-z0-9_.~-]*$')
+
+
+# Quoted path arguments and query values, as account names, project slugs
+# and page sizes repeat from call to call
+_QUOTED_MAX = 4096
+_QUOTED_PATH = {}
+_QUOTED_QUERY = {}
+
+
+def _quote(value, quoted=_QUOTED_PATH, safe_re=_SAFE_PATH_RE, safe='/'):
+    """Quote a path argument, keeping slashes."""
+    # Only exact strings and integers are memoized, as True == 1 == 1.0
+    memoize = value.__class__ is str or value.__class__ is int
+    if memoize:
+        try:
+            return quoted[value]
+        except KeyError:
+            pass
+
+    text = value if isinstance(value, str) else str(value)
+    result = text if safe_re.match(text) else quote(text, safe=safe)
+    if memoize:
+        if len(quoted) >= _QUOTED_MAX:
+            quoted.clear()
+        quoted[value] = result
+    return result
+
+
+def template_pattern(template, default='[^/]+', patterns=None):
+    """
+    Return a regular expression pattern matching the paths of a template.
+
+    `{placeholders}` match the pattern of their name in `patterns`, or
+    `default`, and the rest of the template matches literally.
+    """
+    patterns = patterns or {}
+    # Split into literal text at even indices and placeholder names between
+    pieces = PLACEHOLDER_RE.split(template)
+    return ''.join(
+        patterns.get(piece, default) if index % 2 else re.escape(piece)
+        for index, piece in enumerate(pieces))
+
+
+class Route(object):
+    """
+    Api endpoint compiled from its declaration.
+
+    `template` is the url path with `{name}` placeholders, filled in order
+    by the positional arguments of `url`. `query` holds the `(argument,
+    api_parameter)` pairs of the optional query string parameters, and
+    `body` is the kind of request body, `JSON` or `TEXT` (None for no
+    body).
+
+    `idempotent` routes (by default those using an idempotent verb) are
+    safe to retry and to batch, `cacheable` ones (by default GET routes that
+    are not streamed) can be answered from the response cache, and `stream`
+    routes download their body in chunks.
+    """
+
+    __slots__ = ('name', 'method', 'template', 'params', 'query', 'body',
+                 'idempotent', 'cacheable', 'stream', '_path',
+                 '_query_names')
+
+    def __init__(self,
+                 name,
+                 method,
+                 template,
+                 query=(),
+                 body=None,
+                 idempotent=None,
+                 cacheable=None,
+                 stream=False):
+        """Compile an api endpoint from its declaration."""
+        self.name = name
+        self.method = method
+        self.template = template
+        self.params = tuple(PLACEHOLDER_RE.findall(template))
+        self.query = tuple(query)
+        self._query_names = frozenset(name for name, _ in self.query)
+        self.body = body
+        self.idempotent = (method in IDEMPOTENT_METHODS
+                           if idempotent is None else idempotent)
+        self.cacheable = (method == 'GET' and not stream
+                          if cacheable is None else cacheable)
+        self.stream = stream
+        # Positional format string, or the path itself without placeholders
+        self._path = PLACEHOLDER_RE.sub('{}', template)
+
+    def __repr__(self):
+        """Return the representation of the route."""
+        return '<Route {} {} {}>'.format(self.name, self.method,
+                                         self.template)
+
+    def url(self, *args, **query):
+        """
+        Return the url of the route.
+
+        Positional arguments fill the path placeholders, keyword arguments
+        the query parameters. Query parameters that are None or empty are
+        left out.
+        """
+        return self.format(args, query)
+
+    def format(self, args, query=None):
+        """Return the url of the route for a tuple of path arguments."""
+        if len(args) != len(self.params):
+            raise TypeError('{} takes the {} arguments ({} given)'.format(
+                self.name, ', '.join(self.params) or 'no', len(args)))
+
+        url = self._path.format(*map(_quote, args)) if args else self._path
+        if query:
+            items = []
+            found = 0
+            for name, key in self.query:
+                if name in query:
+                    found += 1
+                    value = query[name]
+                    if value is not None and value != '':
+                        items.append(key + '=' + _quote(
+                            value, _QUOTED_QUERY, _SAFE_QUERY_RE, ''))
+            if found != len(query):
+                raise TypeError('{} got unknown query parameters: {}'.format(
+                    self.name, ', '.join(sorted(
+                        set(query) - self._query_names))))
+            if items:
+                url += '?' + '&'.join(items)
+        return url
+
+
+# (name, method, template, options) of all the api endpoints
+ENDPOINTS = (
+    # Users
+    ('users.list', 'GET', '/api/users', {}),
+    ('users.get', 'GET', '/api/users/{user_id}', {}),
+    ('users.add', 'POST', '/api/users', {'body': JSON}),
+    ('users.update', 'PUT', '/api/users', {'body': JSON}),
+    ('users.delete', 'DELETE', '/api/users/{user_id}', {}),
+    # Collaborators
+    ('collaborators.list', 'GET', '/api/collaborators', {}),
+    ('collaborators.get', 'GET', '/api/collaborators/{user_id}', {}),
+    ('collaborators.add', 'POST', '/api/collaborators', {'body': JSON}),
+    ('collaborators.update', 'PUT', '/api/collaborators', {'body': JSON}),
+    ('collaborators.delete', 'DELETE', '/api/collaborators/{user_id}', {}),
+    # Roles
+    ('roles.list', 'GET', '/api/roles', {}),
+    ('roles.get', 'GET', '/api/roles/{role_id}', {}),
+    ('roles.add', 'POST', '/api/roles', {'body': JSON}),
+    ('roles.update', 'PUT', '/api/roles', {'body': JSON}),
+    ('roles.delete', 'DELETE', '/api/roles/{role_id}', {}),
+    # Projects
+    ('projects.list', 'GET', '/api/projects', {}),
+    ('projects.last_build', 'GET',
+     '/api/projects/{account_name}/{project_slug}', {}),
+    ('projects.last_branch_build', 'GET',
+     '/api/projects/{account_name}/{project_slug}/branch/{build_branch}', {}),
+    ('projects.build', 'GET',
+     '/api/projects/{account_name}/{project_slug}/build/{build_version}', {}),
+    ('projects.history', 'GET',
+     '/api/projects/{account_name}/{project_slug}/history', {
+         'query': (('records_per_page', 'recordsNumber'),
+                   ('start_build_id', 'startBuildId'),
+                   ('branch', 'branch')),
+     }),
+    ('projects.deployments', 'GET',
+     '/api/projects/{account_name}/{project_slug}/deployments', {}),
+    ('projects.settings', 'GET',
+     '/api/projects/{account_name}/{project_slug}/settings/yaml', {}),
+    ('projects.add', 'POST', '/api/projects', {'body': JSON}),
+    ('projects.update', 'PUT', '/api/projects', {'body': JSON}),
+    ('projects.update_settings', 'PUT',
+     '/api/projects/{account_name}/{project_slug}/settings/yaml',
+     {'body': TEXT}),
+    ('projects.update_build_number', 'PUT',
+     '/api/projects/{account_name}/{project_slug}/settings/build-number',
+     {'body': JSON}),
+    ('projects.delete_build_cache', 'DELETE',
+     '/api/projects/{account_name}/{project_slug}/buildcache', {}),
+    ('projects.delete', 'DELETE',
+     '/api/projects/{account_name}/{project_slug}', {}),
+    # Builds
+    ('builds.start', 'POST', '/api/builds', {'body': JSON}),
+    ('builds.cancel', 'DELETE',
+     '/api/builds/{account_name}/{project_slug}/{build_version}', {}),
+    ('builds.delete', 'DELETE', '/api/builds/{build_id}', {}),
+    ('builds.log', 'GET', '/api/buildjobs/{job_id}/log', {'stream': True}),
+    ('builds.artifacts', 'GET', '/api/buildjobs/{job_id}/artifacts', {}),
+    ('builds.artifact', 'GET', '/api/buildjobs/{job_id}/artifacts/{file_name}',
+     {'stream': True}),
+    # Environments
+    ('environments.list', 'GET', '/api/environments', {}),
+    ('environments.settings', 'GET',
+     '/api/environments/{deployment_environment_id}/settings', {}),
+    ('environments.deployments', 'GET',
+     '/api/environments/{deployment_environment_id}/deployments', {}),
+    ('environments.add', 'POST', '/api/environments', {'body': JSON}),
+    ('environments.update', 'PUT', '/api/environments', {'body': JSON}),
+    ('environments.delete', 'DELETE',
+     '/api/environments/{deployment_environment_id}', {}),
+    # Deployments
+    ('deployments.get', 'GET', '/api/deployments/{deployment_id}', {}),
+    ('deployments.start', 'POST', '/api/deployments', {'body': JSON}),
+    ('deployments.cancel', 'PUT', '/api/deployments/stop', {'body': JSON}),
+)
+
+
+def compile_routes(endpoints):
+    """Return the routes of endpoint declarations by name."""
+    routes = {}
+    for name, method, template, options in endpoints:
+        if name in routes:
+            raise ValueError('Duplicate route: {}'.format(name))
+        routes[name] = Route(name, method, template, **options)
+    return routes
+
+
+ROUTES = compile_routes(ENDPOINTS)
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Appveyor Python Client concurrent job log search."""
+
+# Standard library imports
+import collections
+import re
+
+# Local imports
+from appveyor_client.utils import produce
+
+LogMatch = collections.namedtuple(
+    'LogMatch', ['job_id', 'line_number', 'line', 'before', 'after'])
+
+_Failure = collections.namedtuple('_Failure', ['job_id', 'error'])
+
+# Matches found but not yet consumed, searches pause beyond it
+_MAX_PENDING = 100
+
+
+class LineScanner(object):
+    """
+    Incrementally find the lines matching a regular expression.
+
+    Matches are `(line_number, line, before, after)` tuples, where `before`
+    and `after` hold up to `context` lines around the match. Only the
+    context lines are kept in memory.
+    """
+
+    def __init__(self, regex, context=0):
+        """Incrementally find the lines matching a regular expression."""
+        self._regex = regex
+        self._context = context
+        self._before = collections.deque(maxlen=context)
+        self._pending = collections.deque()
+        self._number = 0
+
+    def feed(self, line):
+        """Return the matches completed by adding a line."""
+        context = self._context
+        pending = self._pending
+        self._number += 1
+        matches = []
+        for match in pending:
+            match[3].append(line)
+        while pending and len(pending[0][3]) >= context:
+            matches.append(tuple(pending.popleft()))
+
+        if self._regex.search(line):
+            match = [self._number, line, list(self._before), []]
+            if context:
+                pending.append(match)
+            else:
+                matches.append(tuple(match))
+
+        if context:
+            self._before.append(line)
+        return matches
+
+    def close(self):
+        """Return the matches still waiting for their context lines."""
+        matches = [tuple(match) for match in self._pending]
+        self._pending.clear()
+        return matches
+
+
+def scan_lines(lines, regex, context=0):
+    """Yield the `LineScanner` matches of an iterable of lines."""
+    scanner = LineScanner(regex, context)
+    for line in lines:
+        for match in scanner.feed(line):
+            yield match
+
+    for match in scanner.close():
+        yield match
+
+
+def search_logs(client,
+                job_ids,
+                pattern,
+                context=0,
+                max_matches=None,
+                max_workers=8,
+                flags=0,
+                max_pending=_MAX_PENDING):
+    """
+    Search job logs concurrently, yielding a `LogMatch` per matching line.
+
+    Logs are downloaded by up to `max_workers` threads and scanned line by
+    line as the bytes arrive, so full logs are never held in memory.
+    Matches are yielded as soon as they are found (after their `context`
+    lines arrived), and all downloads stop once `max_matches` matches were
+    yielded or the generator is closed. At most `max_pending` matches wait
+    to be consumed, the downloads pause until the caller catches up.
+    `pattern` is a regular expression string (compiled with `flags`) or a
+    compiled regular expression.
+
+    If some logs could not be downloaded, the first error is raised after
+    the other logs were searched. The downloads share the deadline of the
+    caller, if any.
+    """
+    regex = pattern if hasattr(pattern, 'search') else re.compile(
+        pattern, flags)
+
+    def search(job_id, put, stop):
+        lines = client.builds.log_lines(job_id)
+        scanner = LineScanner(regex, context)
+        try:
+            # Stop reading the log as soon as the search is over
+            for line in lines:
+                if stop.is_set():
+                    return
+                for match in scanner.feed(line):
+                    put(LogMatch(job_id, *match))
+            for match in scanner.close():
+                put(LogMatch(job_id, *match))
+        except Exception as error:
+            put(_Failure(job_id, error))
+        finally:
+            lines.close()
+
+    failure = None
+    count = 0
+    results = produce(search, job_ids, max_workers, max_pending)
+    try:
+        for item in results:
+            if isinstance(item, _Failure):
+                failure = failure or item
+            else:
+                yield item
+                count += 1
+                if max_matches is not None and count >= max_matches:
+                    return
+    finally:
+        results.close()
+
+    if failure is not None:
+        raise failure.error
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Appveyor Python Client persistent build history store."""
+
+# Standard library imports
+import json
+import sqlite3
+
+# Local imports
+from appveyor_client.client import AppveyorError
+from appveyor_client.utils import parse_datetime, to_utc
+from appveyor_client.waiter import FINAL_STATUSES
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS builds (
+    account_name TEXT NOT NULL,
+    project_slug TEXT NOT NULL,
+    build_id INTEGER NOT NULL,
+    version TEXT,
+    branch TEXT,
+    status TEXT,
+    created TEXT,
+    started TEXT,
+    finished TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (account_name, project_slug, build_id)
+);
+CREATE INDEX IF NOT EXISTS builds_branch
+    ON builds (account_name, project_slug, branch, build_id);
+CREATE INDEX IF NOT EXISTS builds_status
+    ON builds (account_name, project_slug, status, build_id);
+CREATE INDEX IF NOT EXISTS builds_created
+    ON builds (account_name, project_slug, created);
+'''
+
+
+def _timestamp(value):
+    """Return a sortable UTC ISO 8601 string for an api datetime."""
+    value = parse_datetime(value)
+    return None if value is None else value.isoformat()
+
+
+class HistoryStore(object):
+    """
+    Local SQLite copy of project build histories.
+
+    `sync` downloads only the builds newer than the latest stored one, and
+    refreshes stored builds that had not finished yet. History queries are
+    then answered locally using indexes.
+
+    ::
+
+        store = HistoryStore('history.db', client)
+        store.sync('account', 'project')
+        failed = store.history('account', 'project', status='failed')
+    """
+
+    def __init__(self, path, client=None):
+        """Local SQLite copy of project build histories."""
+        self._client = client
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript(SCHEMA)
+        # (version, error) of the unfinished builds the last sync could not
+        # refresh
+        self.errors = []
+
+    def close(self):
+        """Close the database."""
+        self._connection.close()
+
+    def high_water_build_id(self, account_name, project_slug):
+        """Return the newest stored build id of a project, or None."""
+        row = self._connection.execute(
+            'SELECT MAX(build_id) FROM builds '
+            'WHERE account_name = ? AND project_slug = ?',
+            (account_name, project_slug)).fetchone()
+        return row[0]
+
+    def sync(self, account_name, project_slug, records_per_page=100):
+        """
+        Bring the stored history of a project up to date.
+
+        New builds are written inside a single transaction, so an
+        interrupted sync leaves no gap below the high water build id. Return
+        the number of builds added or updated.
+
+        Unfinished builds that no longer exist on the server are removed.
+        Those that fail to refresh for another reason are kept for the next
+        sync, and their errors are stored in `errors`.
+        """
+        high_water = self.high_water_build_id(account_name, project_slug)
+        unfinished = self._connection.execute(
+            'SELECT version FROM builds '
+            'WHERE account_name = ? AND project_slug = ? '
+            'AND (status IS NULL OR status NOT IN ({}))'.format(', '.join(
+                '?' * len(FINAL_STATUSES))),
+            (account_name, project_slug) + tuple(FINAL_STATUSES)).fetchall()
+
+        self.errors = []
+        count = 0
+        with self._connection:
+            history = self._client.projects.iter_history(
+                account_name, project_slug, records_per_page=records_per_page)
+            for build in history:
+                if high_water is not None and build['buildId'] <= high_water:
+                    break
+                self._save(account_name, project_slug, build)
+                count += 1
+
+            for version, in unfinished:
+                try:
+                    result = self._client.projects.build(
+                        account_name, project_slug, version)
+                except AppveyorError as error:
+                    contents = error.args[0] if error.args else None
+                    if (isinstance(contents, dict) and
+                            contents.get('status_code') == 404):
+                        self._delete(account_name, project_slug, version)
+                    else:
+                        self.errors.append((version, error))
+                    continue
+
+                self._save(account_name, project_slug, result['build'])
+                count += 1
+
+        return count
+
+    def sync_all(self):
+        """Sync the history of every project of the account."""
+        count = 0
+        for project in self._client.projects.get():
+            count += self.sync(project['accountName'], project['slug'])
+        return count
+
+    def _save(self, account_name, project_slug, build):
+        """Insert or replace a build."""
+        if hasattr(build, 'to_dict'):
+            build = build.to_dict()
+
+        self._connection.execute(
+            'INSERT OR REPLACE INTO builds VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, '
+            '?)', (account_name, project_slug, build['buildId'],
+                   build.get('version'), build.get('branch'),
+                   build.get('status'), _timestamp(build.get('created')),
+                   _timestamp(build.get('started')),
+                   _timestamp(build.get('finished')), json.dumps(build)))
+
+    def _delete(self, account_name, project_slug, version):
+        """Delete a build by version."""
+        self._connection.execute(
+            'DELETE FROM builds '
+            'WHERE account_name = ? AND project_slug = ? AND version = ?',
+            (account_name, project_slug, version))
+
+    def history(self,
+                account_name,
+                project_slug,
+                branch=None,
+                status=None,
+                since=None,
+                until=None,
+                limit=None):
+        """
+        Iterate over stored builds of a project, newest first.
+
+        Builds can be filtered by branch, status and a creation date range
+        (`since` inclusive, `until` exclusive datetimes).
+        """
+        query = ['SELECT data FROM builds '
+                 'WHERE account_name = ? AND project_slug = ?']
+        params = [account_name, project_slug]
+
+        if branch is not None:
+            query.append('AND branch = ?')
+            params.append(branch)
+
+        if status is not None:
+            query.append('AND status = ?')
+            params.append(status)
+
+        if since is not None:
+            query.append('AND created >= ?')
+            params.append(to_utc(since).isoformat())
+
+        if until is not None:
+            query.append('AND created < ?')
+            params.append(to_utc(until).isoformat())
+
+        query.append('ORDER BY build_id DESC')
+        if limit is not None:
+            query.append('LIMIT ?')
+            params.append(limit)
+
+        for data, in self._connection.execute(' '.join(query), params):
+            yield json.loads(data)
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Appveyor Python Client live log tailing."""
+
+# Standard library imports
+import collections
+import time
+
+# Local imports
+from appveyor_client.utils import LineDecoder, fan_out
+from appveyor_client.waiter import FINAL_STATUSES
+
+LogLine = collections.namedtuple('LogLine', ['job_id', 'line'])
+
+
+class _TailedJob(object):
+    """Job whose log is being followed."""
+
+    __slots__ = ('job_id', 'build', 'offset', 'decoder', 'interval',
+                 'finished', 'errors')
+
+    def __init__(self, job_id, build, offset, interval):
+        """Job whose log is being followed."""
+        self.job_id = job_id
+        self.build = build
+        self.offset = offset
+        self.decoder = LineDecoder()
+        self.interval = interval
+        self.finished = False
+        self.errors = 0
+
+
+class LogTail(object):
+    """
+    Follow the logs of running jobs, yielding new lines as they appear.
+
+    Each poll requests only the bytes after the last seen offset with a
+    range request. Jobs whose log did not grow are polled less often, their
+    interval doubling from `min_interval` up to `max_interval` seconds, and
+    their build is checked (one request per build) to stop following jobs
+    that finished. Due jobs are polled concurrently, with at most
+    `max_workers` requests at a time. Failed requests are retried at the
+    next poll, and raised after `max_errors` consecutive failures.
+
+    ::
+
+        tail = LogTail(client)
+        tail.add_build('account', 'project', '1.0.42')
+        for job_id, line in tail:
+            print(job_id, line)
+
+    Works with the synchronous `AppveyorClient`.
+    """
+
+    def __init__(self,
+                 client,
+                 min_interval=1,
+                 max_interval=30,
+                 max_workers=8,
+                 max_errors=3,
+                 clock=None,
+                 sleep=None):
+        """Follow the logs of running jobs."""
+        self._client = client
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_workers = max_workers
+        self.max_errors = max_errors
+        self._clock = clock or time.time
+        self._sleep = sleep or time.sleep
+        # job_id -> _TailedJob
+        self._jobs = collections.OrderedDict()
+        # job_id -> next poll time
+        self._schedule = {}
+
+    def __len__(self):
+        """Return the number of jobs followed."""
+        return len(self._jobs)
+
+    def add_job(self, account_name, project_slug, build_version, job_id,
+                offset=0):
+        """Follow the log of a job of a build, from byte `offset`."""
+        build = (account_name, project_slug, build_version)
+        self._jobs[job_id] = _TailedJob(job_id, build, offset,
+                                        self.min_interval)
+        self._schedule[job_id] = self._clock()
+
+    def add_build(self, account_name, project_slug, build_version):
+        """Follow the logs of all the jobs of a build."""
+        result = self._client.projects.build(account_name, project_slug,
+                                             build_version)
+        for job in result['build']['jobs']:
+            self.add_job(account_name, project_slug, build_version,
+                         job['jobId'])
+
+    def offset(self, job_id):
+        """Return the log bytes received so far for a followed job."""
+        return self._jobs[job_id].offset
+
+    def __iter__(self):
+        """Iterate over new log lines until all the jobs finish."""
+        return self.iter_lines()
+
+    def iter_lines(self, timeout=None):
+        """
+        Yield a `LogLine(job_id, line)` for each new line of the logs.
+
+        Stop when all the jobs finished and their logs were read to the
+        end, or after `timeout` seconds.
+        """
+        deadline = None if timeout is None else self._clock() + timeout
+        while self._schedule:
+            due = min(self._schedule.values())
+            now = self._clock()
+            if deadline is not None and due >= deadline:
+                self._sleep(max(0, deadline - now))
+                return
+
+            if due > now:
+                self._sleep(due - now)
+                now = self._clock()
+
+            jobs = [self._jobs[job_id]
+                    for job_id, when in self._schedule.items() if when <= now]
+            for line in self._poll(jobs):
+                yield line
+
+    # --- Polling
+    def _read(self, job):
+        """Return the log bytes of a job after its offset."""
+        return b''.join(self._client.builds.log_stream(job.job_id,
+                                                       offset=job.offset))
+
+    def _job_statuses(self, account_name, project_slug, build_version):
+        """Return the statuses of the jobs of a build by job id."""
+        result = self._client.projects.build(account_name, project_slug,
+                                             build_version)
+        return dict((job['jobId'], job.get('status'))
+                    for job in result['build']['jobs'])
+
+    def _poll(self, jobs):
+        """Read the new log bytes of jobs and return their new lines."""
+        lines = []
+        idle = []
+        for result in fan_out(self._read, [(job, ) for job in jobs],
+                              max_workers=self.max_workers):
+            job = result.item[0]
+            if result.error is not None:
+                job.errors += 1
+                if job.errors >= self.max_errors:
+                    raise result.error
+                self._backoff(job)
+                continue
+
+            job.errors = 0
+            data = result.result
+            if data:
+                job.offset += len(data)
+                lines.extend(LogLine(job.job_id, line)
+                             for line in job.decoder.feed(data))
+
+            if job.finished:
+                # Log read to the end after the job finished
+                lines.extend(LogLine(job.job_id, line)
+                             for line in job.decoder.close())
+                del self._jobs[job.job_id]
+                del self._schedule[job.job_id]
+            elif data:
+                job.interval = self.min_interval
+                self._schedule[job.job_id] = self._clock() + job.interval
+            else:
+                idle.append(job)
+
+        self._check_finished(idle)
+        return lines
+
+    def _check_finished(self, jobs):
+        """Check the builds of idle jobs, and back off unfinished ones."""
+        builds = collections.OrderedDict()
+        for job in jobs:
+            builds.setdefault(job.build, []).append(job)
+
+        for result in fan_out(self._job_statuses, list(builds),
+                              max_workers=self.max_workers):
+            statuses = result.result or {}
+            for job in builds[result.item]:
+                if result.error is not None:
+                    job.errors += 1
+                    if job.errors >= self.max_errors:
+                        raise result.error
+
+                if statuses.get(job.job_id) in FINAL_STATUSES:
+                    # Read once more, bytes may have been written meanwhile
+                    job.finished = True
+                    self._schedule[job.job_id] = self._clock()
+                else:
+                    self._backoff(job)
+
+    def _backoff(self, job):
+        """Poll a job less often."""
+        job.interval = min(self.max_interval, job.interval * 2)
+        self._schedule[job.job_id] = self._clock() + job.interval
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Appveyor Python Client test fixtures."""
+
+# Standard library imports
+import sys
+
+# Third party imports
+import pytest
+
+# Local imports
+from appveyor_client.client import AppveyorClient
+from appveyor_client.retry import RetryPolicy
+from appveyor_client.transport import MemoryTransport
+
+# The async client tests use asyncio.run
+collect_ignore = ['test_aio.py'] if sys.version_info < (3, 7) else []
+
+
+@pytest.fixture(autouse=True)
+def forget_tokens():
+    """Validate the client tokens again in every test."""
+    AppveyorClient._VERIFIED_TOKENS.clear()
+    yield
+    AppveyorClient._VERIFIED_TOKENS.clear()
+
+
+@pytest.fixture
+def transport():
+    """Return an empty in-memory transport."""
+    return MemoryTransport()
+
+
+@pytest.fixture
+def retry():
+    """Return a retry policy retrying right away."""
+    return RetryPolicy(max_retries=3, backoff_factor=0, jitter=False)
+
+
+@pytest.fixture
+def sequence():
+    """
+    Return a factory of fixture callables answering responses in order.
+
+    Responses are `(status_code, headers, body)` tuples, the last one being
+    repeated.
+    """
+    def factory(*responses):
+        responses = list(responses)
+
+        def respond(method, url, headers, body):
+            if len(responses) > 1:
+                return responses.pop(0)
+            return responses[0]
+
+        return respond
+
+    return factory
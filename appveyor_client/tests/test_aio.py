@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Asyncio client tests."""
+
+# Standard library imports
+import asyncio
+
+# Third party imports
+import pytest
+
+# Local imports
+from appveyor_client.cache import ResponseCache
+from appveyor_client.client import AppveyorTimeoutError
+from appveyor_client.deadline import Deadline, current_deadline
+from appveyor_client.metrics import MetricsCollector
+
+aio = pytest.importorskip('appveyor_client.aio')
+pytest.importorskip('aiohttp')
+
+LOG = b'line\n' * 10000
+
+LOG_URL = '/api/buildjobs/{job_id}/log'
+
+
+def call(transport, func, **kwargs):
+    """Await `func(client)` with an async client of the transport."""
+    async def main():
+        async with aio.AsyncAppveyorClient('token', transport=transport,
+                                           **kwargs) as client:
+            return await func(client)
+
+    return asyncio.run(main())
+
+
+async def collect(generator):
+    """Return the values of an async generator."""
+    return [value async for value in generator]
+
+
+def test_get_retried(transport, retry, sequence):
+    """Failed GET requests are retried."""
+    transport.add('GET /api/projects',
+                  sequence((503, {}, b''), (200, {}, b'[1]')))
+
+    assert call(transport, lambda client: client.projects.get(),
+                retry=retry) == [1]
+    assert transport.calls.count(('GET', '/api/projects', None)) == 2
+
+
+def test_write_invalidates_cache(transport):
+    """Writes drop the cached entries of the modified resource."""
+    cache = ResponseCache(ttls=[('/api/*', 60)])
+    transport.add('GET /api/projects', [])
+    transport.add('DELETE /api/projects/{account}/{slug}', status_code=204)
+
+    async def main(client):
+        await client.projects.get()
+        await client.projects.get()
+        await client.projects.delete('account', 'project')
+        await client.projects.get()
+
+    call(transport, main, cache=cache)
+    assert transport.calls.count(('GET', '/api/projects', None)) == 2
+
+
+def test_streams_instrumented_and_retried(transport, retry, sequence):
+    """Streamed downloads follow the retry policy and count bytes read."""
+    metrics = MetricsCollector()
+    transport.add('GET ' + LOG_URL, sequence((503, {}, b''), (200, {}, LOG)))
+
+    async def main(client):
+        chunks = await collect(client.builds.log_stream('1'))
+        stream = client.builds.log_stream('1', chunk_size=100)
+        await stream.__anext__()
+        await stream.aclose()
+        return b''.join(chunks)
+
+    assert call(transport, main, retry=retry, metrics=metrics) == LOG
+    snapshot = metrics.snapshot()
+    assert snapshot['bytes_received'][('GET', LOG_URL)] == len(LOG) + 100
+    assert transport.calls.count(('GET', '/api/buildjobs/1/log', None)) == 3
+
+
+def test_stream_offset(transport):
+    """Downloads start at the requested offset."""
+    transport.add('GET ' + LOG_URL, LOG, headers={'Content-Type': 'text'})
+
+    async def main(client):
+        return b''.join(await collect(client.builds.log_stream('1', 100)))
+
+    assert call(transport, main) == LOG[100:]
+
+
+def test_search_logs_max_matches(transport):
+    """Searches stop after max_matches matches."""
+    transport.add('GET ' + LOG_URL, b'ERROR\n' * 1000,
+                  headers={'Content-Type': 'text'})
+
+    async def main(client):
+        return await collect(client.builds.search_logs(
+            ['1', '2', '3'], 'ERROR', max_matches=500))
+
+    assert len(call(transport, main)) == 500
+
+
+def test_fan_out_propagates_deadline():
+    """Tasks of fan_out share the deadline of the caller."""
+    async def main():
+        async def deadline():
+            return current_deadline()
+
+        with Deadline(30) as expected:
+            results = await collect(aio.fan_out(deadline, [(), ()]))
+        return expected, [result.result for result in results]
+
+    expected, deadlines = asyncio.run(main())
+    assert deadlines == [expected, expected]
+
+
+def test_expired_deadline(transport):
+    """Requests fail once the budget is spent."""
+    transport.add('GET /api/projects', [])
+
+    async def main(client):
+        with client.deadline(0.01):
+            await asyncio.sleep(0.02)
+            await client.projects.get()
+
+    with pytest.raises(AppveyorTimeoutError):
+        call(transport, main)
+
+
+def test_single_flight():
+    """Concurrent identical calls share a single call."""
+    calls = []
+
+    async def fetch():
+        calls.append(None)
+        await asyncio.sleep(0.05)
+        return len(calls)
+
+    async def main():
+        flight = aio.AsyncSingleFlight()
+        return await asyncio.gather(
+            *[flight.do('key', fetch) for _ in range(5)])
+
+    assert asyncio.run(main()) == [1] * 5
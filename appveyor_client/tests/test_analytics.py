@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Build analytics tests."""
+
+# Standard library imports
+import datetime
+import json
+import math
+
+# Third party imports
+import pytest
+
+# Local imports
+from appveyor_client.analytics import DAY, BuildAnalytics
+from appveyor_client.client import AppveyorClient
+from appveyor_client.utils import from_epoch_seconds
+
+START = 1500000000.0
+
+
+def timestamp(seconds):
+    """Return an api datetime of epoch seconds."""
+    return from_epoch_seconds(seconds).isoformat() + 'Z'
+
+
+def build(day, queue_time, duration, status='success', branch='master'):
+    """Return a history build created at a day offset from START."""
+    created = START + day * DAY
+    return {'branch': branch, 'status': status,
+            'created': timestamp(created),
+            'started': timestamp(created + queue_time),
+            'finished': (None if duration is None else
+                         timestamp(created + queue_time + duration))}
+
+
+BUILDS = [
+    build(0, 10, 100),
+    build(0.5, 20, 200, 'failed'),
+    build(1, 30, 300, branch='dev'),
+    build(2.5, 40, None, 'running'),
+    build(3, 50, 500, 'failed'),
+    build(9, 60, 600, 'cancelled', branch='dev'),
+]
+
+
+def analytics(backend):
+    """Return analytics of the test builds."""
+    result = BuildAnalytics(backend=backend)
+    result.add_builds('account', 'one', BUILDS)
+    result.add_builds('account', 'two', BUILDS[:2])
+    return result
+
+
+def same(first, second):
+    """Compare statistics, NaNs included, with a float tolerance."""
+    if isinstance(first, dict):
+        return (list(first) == list(second) and
+                all(same(first[key], second[key]) for key in first))
+    elif isinstance(first, (list, tuple)):
+        return (len(first) == len(second) and
+                all(same(a, b) for a, b in zip(first, second)))
+    elif isinstance(first, float):
+        if math.isnan(first):
+            return math.isnan(second)
+        return abs(first - second) < 1e-9 * max(1, abs(first))
+    return first == second
+
+
+def test_summary():
+    """Counts, failure rates and percentiles are grouped."""
+    stats = analytics('array').summary(percentiles=(50, 100))
+    assert list(stats) == [('account', 'one'), ('account', 'two')]
+    one = stats[('account', 'one')]
+    assert one['count'] == 6
+    assert one['failure_rate'] == 0.5
+    assert one['duration_p50'] == 300
+    assert one['duration_p100'] == 600
+    assert one['queue_time_p50'] == 35
+
+    stats = analytics('array').summary(by='branch', percentiles=(25, ))
+    assert stats[('account', 'one', 'dev')]['duration_p25'] == 375
+    assert stats[('account', 'one', 'dev')]['failure_rate'] == 0
+
+
+def test_rolling():
+    """Rolling windows end every step from the first to the last build."""
+    windows = analytics('array').rolling(metric='queue_time',
+                                         window=2 * DAY)[('account', 'one')]
+    first = from_epoch_seconds(math.floor(START / DAY) * DAY + DAY)
+    assert windows[0].end == first
+    assert windows[-1].end == first + datetime.timedelta(days=9)
+    assert [window.count for window in windows[:4]] == [2, 3, 2, 2]
+    assert windows[0].mean == 15
+    assert windows[0].failure_rate == 0.5
+    assert windows[6].count == 0
+    assert math.isnan(windows[6].mean)
+
+
+def test_trend():
+    """Trends are least squares slopes per day."""
+    result = BuildAnalytics(backend='array')
+    result.add_builds('account', 'one', [build(day, 0, 100 + 10 * day)
+                                         for day in range(5)])
+    result.add_builds('account', 'two', [build(0, 0, 100)])
+    trend = result.trend()
+    assert abs(trend[('account', 'one')] - 10) < 1e-9
+    assert math.isnan(trend[('account', 'two')])
+
+
+@pytest.mark.parametrize('method, kwargs', [
+    ('summary', {'percentiles': (0, 25, 50, 95, 100)}),
+    ('summary', {'by': 'branch'}),
+    ('rolling', {}),
+    ('rolling', {'by': 'branch', 'metric': 'failed', 'window': DAY / 2,
+                 'step': DAY / 4}),
+    ('trend', {}),
+    ('trend', {'by': 'branch', 'metric': 'queue_time'}),
+])
+def test_numpy_and_array_backends_agree(method, kwargs):
+    """Both backends compute the same statistics."""
+    pytest.importorskip('numpy')
+    expected = getattr(analytics('array'), method)(**kwargs)
+    assert same(getattr(analytics('numpy'), method)(**kwargs), expected)
+
+
+def test_arguments():
+    """Unknown backends, groups and metrics raise."""
+    with pytest.raises(ValueError):
+        BuildAnalytics(backend='pandas')
+    result = analytics('array')
+    with pytest.raises(ValueError):
+        result.summary(by='author')
+    with pytest.raises(ValueError):
+        result.trend(metric='size')
+    with pytest.raises(ValueError):
+        result.rolling(window=0)
+
+
+def test_add_history(transport):
+    """Histories are added concurrently, failed projects returned."""
+    transport.add('GET /api/projects/account/one/history',
+                  lambda method, url, headers, body: (
+                      200, {}, json.dumps({'builds': [] if 'startBuildId'
+                                           in url else [
+                          dict(item, buildId=6 - index)
+                          for index, item in enumerate(BUILDS)]})))
+    client = AppveyorClient('token', transport=transport)
+    result = BuildAnalytics(backend='array')
+
+    errors = result.add_history(client, [('account', 'one'),
+                                         ('account', 'missing')],
+                                records_per_page=4)
+    assert [project for project, _ in errors] == [('account', 'missing')]
+    assert len(result) == 6
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Artifact download tests."""
+
+# Third party imports
+import pytest
+
+# Local imports
+from appveyor_client.client import AppveyorClient, AppveyorClientError
+
+ARTIFACTS = 'GET /api/buildjobs/{job_id}/artifacts'
+ARTIFACT = 'GET /api/buildjobs/{job_id}/artifacts/{file_name}'
+
+
+def test_download_artifact_resumes_partial_file(transport, tmpdir):
+    """Partial artifact files are completed with a range request."""
+    transport.add(ARTIFACT, b'0123456789', headers={'Content-Type': 'text'})
+    client = AppveyorClient('token', transport=transport, lazy=True)
+    path = tmpdir.join('artifact.zip')
+    path.write_binary(b'0123')
+
+    written = client.builds.download_artifact('1', 'artifact.zip',
+                                              str(path), size=10)
+    assert written == 6
+    assert path.read_binary() == b'0123456789'
+    assert client.builds.download_artifact('1', 'artifact.zip', str(path),
+                                           size=10) == 0
+
+
+def test_download_artifact_verifies_size(transport, tmpdir):
+    """Downloads of an unexpected size raise."""
+    transport.add(ARTIFACT, b'01234', headers={'Content-Type': 'text'})
+    client = AppveyorClient('token', transport=transport, lazy=True)
+    path = tmpdir.join('artifact.zip')
+
+    with pytest.raises(AppveyorClientError):
+        client.builds.download_artifact('1', 'artifact.zip', str(path),
+                                        size=10)
+
+    # Files longer than expected are downloaded again from the start
+    path.write_binary(b'0123456789')
+    assert client.builds.download_artifact('1', 'artifact.zip',
+                                           str(path)) == 5
+    assert path.read_binary() == b'01234'
+
+
+def test_download_artifacts(transport, tmpdir):
+    """Artifacts of many jobs are downloaded to a directory per job."""
+    transport.add(ARTIFACTS, [{'fileName': 'app.zip', 'size': 3},
+                              {'fileName': 'log.txt', 'size': 2},
+                              {'fileName': '../escape.txt', 'size': 1}])
+    transport.add('GET /api/buildjobs/3/artifacts', status_code=404,
+                  body={'message': 'Job not found'})
+    transport.add(ARTIFACT,
+                  lambda method, url, headers, body: (
+                      200, {'Content-Type': 'text'},
+                      b'abc' if url.endswith('app.zip') else b'ok'))
+    client = AppveyorClient('token', transport=transport, lazy=True)
+    tmpdir.join('2').mkdir().join('app.zip').write_binary(b'abc')
+
+    results = list(client.builds.download_artifacts(
+        ['1', '2', '3'], str(tmpdir), max_workers=2))
+    written = dict(((job_id, file_name), result.result)
+                   for result in results if result.error is None
+                   for job_id, file_name, _ in [result.item])
+    assert written == {('1', 'app.zip'): 3, ('1', 'log.txt'): 2,
+                       ('2', 'app.zip'): 0, ('2', 'log.txt'): 2}
+    errors = sorted(result.item[:2] for result in results if result.error)
+    assert errors == [('1', '../escape.txt'), ('2', '../escape.txt'),
+                      ('3', None)]
+    assert tmpdir.join('1', 'log.txt').read_binary() == b'ok'
+    assert not tmpdir.join('escape.txt').check()
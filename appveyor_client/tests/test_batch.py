@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Bulk fan out tests."""
+
+# Standard library imports
+import threading
+
+# Third party imports
+import pytest
+
+# Local imports
+from appveyor_client.client import AppveyorClient, AppveyorClientError
+from appveyor_client.utils import fan_out
+
+
+def test_fan_out_collects_errors():
+    """Errors of fan_out calls are returned instead of raised."""
+    def call(value):
+        if value == 2:
+            raise ValueError(value)
+        return value * 10
+
+    results = dict((result.item, result)
+                   for result in fan_out(call, [(1, ), (2, ), (3, )]))
+    assert results[(1, )].result == 10
+    assert isinstance(results[(2, )].error, ValueError)
+    assert results[(3, )].result == 30
+
+
+def test_fan_out_bounds_concurrency():
+    """At most max_workers calls run at a time."""
+    lock = threading.Lock()
+    running = [0, 0]
+
+    def call():
+        with lock:
+            running[0] += 1
+            running[1] = max(running)
+        threading.Event().wait(0.01)
+        with lock:
+            running[0] -= 1
+
+    assert len(list(fan_out(call, [()] * 12, max_workers=3))) == 12
+    assert running[1] <= 3
+
+
+def test_last_builds(transport):
+    """The last builds of many projects are fetched concurrently."""
+    def respond(method, url, headers, body):
+        if 'missing' in url:
+            return 404, {}, b''
+        return 200, {}, '{{"build": "{}"}}'.format(url.split('/')[-1])
+
+    transport.add('GET /api/projects/{account}/{slug}', respond)
+    client = AppveyorClient('token', transport=transport)
+    projects = [('account', 'app'), ('account', 'lib'),
+                ('account', 'missing')]
+
+    results = dict((result.item, result)
+                   for result in client.projects.last_builds(projects))
+    assert results[('account', 'app')].result == {'build': 'app'}
+    assert results[('account', 'lib')].result == {'build': 'lib'}
+    assert results[('account', 'missing')].error is not None
+
+
+def test_batch_rejects_writes(transport):
+    """Only idempotent routes can be batched."""
+    client = AppveyorClient('token', transport=transport)
+    with pytest.raises(AppveyorClientError):
+        client.batch('builds.start', [()])
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Response cache tests."""
+
+# Local imports
+from appveyor_client.cache import ResponseCache
+from appveyor_client.client import AppveyorClient
+
+
+class Clock(object):
+    """Manually advanced clock."""
+
+    def __init__(self):
+        """Manually advanced clock."""
+        self.now = 1000.0
+
+    def __call__(self):
+        """Return the current time."""
+        return self.now
+
+
+def count(transport, url, method='GET'):
+    """Return the number of requests sent for a method and url."""
+    return transport.calls.count((method, url, None))
+
+
+def test_ttl(transport):
+    """Entries are used until their time to live expires."""
+    clock = Clock()
+    cache = ResponseCache(ttls=[('/api/projects', 60)], clock=clock)
+    transport.add('GET /api/projects', [1])
+    client = AppveyorClient('token', transport=transport, cache=cache)
+
+    assert client.projects.get() == [1]
+    clock.now += 59
+    assert client.projects.get() == [1]
+    assert count(transport, '/api/projects') == 1
+
+    clock.now += 2
+    assert client.projects.get() == [1]
+    assert count(transport, '/api/projects') == 2
+
+
+def test_not_cached_without_ttl_or_etag(transport):
+    """Responses without time to live nor ETag are not cached."""
+    transport.add('GET /api/projects', [1])
+    client = AppveyorClient('token', transport=transport,
+                            cache=ResponseCache(ttls=[]))
+
+    client.projects.get()
+    client.projects.get()
+    assert count(transport, '/api/projects') == 2
+
+
+def test_etag_revalidation(transport):
+    """Expired entries with an ETag are revalidated with If-None-Match."""
+    clock = Clock()
+    cache = ResponseCache(ttls=[], clock=clock)
+    sent = []
+
+    def respond(method, url, headers, body):
+        sent.append(headers.get('If-None-Match'))
+        if headers.get('If-None-Match') == '"v1"':
+            return 304, {}, b''
+        return 200, {'ETag': '"v1"'}, b'[1]'
+
+    transport.add('GET /api/projects', respond)
+    client = AppveyorClient('token', transport=transport, cache=cache)
+
+    assert client.projects.get() == [1]
+    assert client.projects.get() == [1]
+    assert sent == [None, '"v1"']
+
+
+def test_write_invalidates_related_entries(transport):
+    """Writes drop the cached entries of the resource and its parents."""
+    cache = ResponseCache(ttls=[('/api/*', 60)])
+    transport.add('GET /api/projects', [1])
+    transport.add('GET /api/projects/{account}/{slug}', {'project': {}})
+    transport.add('GET /api/environments', [])
+    transport.add('DELETE /api/projects/{account}/{slug}', status_code=204)
+    client = AppveyorClient('token', transport=transport, cache=cache)
+
+    client.projects.get()
+    client.environments.get()
+    assert len(cache) == 2
+
+    client.projects.delete('account', 'project')
+    assert len(cache) == 1
+    client.projects.get()
+    assert count(transport, '/api/projects') == 2
+    client.environments.get()
+    assert count(transport, '/api/environments') == 1
+
+
+def test_invalidate():
+    """Invalidation matches the path, its parents and its children."""
+    cache = ResponseCache(ttl=60)
+    for url in ('/api/projects', '/api/projects/a/b',
+                '/api/projects/a/b/history?recordsNumber=10',
+                '/api/projects/a/c', '/api/roles'):
+        cache.store(url, b'{}', scope='scope')
+
+    cache.invalidate('/api/projects/a/b/')
+    assert cache.get('/api/projects', 'scope') is None
+    assert cache.get('/api/projects/a/b', 'scope') is None
+    assert cache.get('/api/projects/a/b/history?recordsNumber=10',
+                     'scope') is None
+    assert cache.get('/api/projects/a/c', 'scope') is not None
+    assert cache.get('/api/roles', 'scope') is not None
+
+
+def test_scoped_by_token(transport):
+    """Clients with other tokens sharing a cache do not see the entries."""
+    def respond(method, url, headers, body):
+        return 200, {}, '["{}"]'.format(headers['Authorization'])
+
+    transport.add('GET /api/projects', respond)
+    cache = ResponseCache()
+    first = AppveyorClient('first', transport=transport, cache=cache)
+    second = AppveyorClient('second', transport=transport, cache=cache)
+
+    assert first.projects.get() == ['Bearer first']
+    assert second.projects.get() == ['Bearer second']
+    assert first.projects.get() == ['Bearer first']
+
+
+def test_lru_bound():
+    """The least recently used entries are dropped beyond maxsize."""
+    cache = ResponseCache(maxsize=2, ttl=60)
+    cache.store('/a', b'1')
+    cache.store('/b', b'2')
+    cache.get('/a')
+    cache.store('/c', b'3')
+
+    assert len(cache) == 2
+    assert cache.get('/b') is None
+    assert cache.get('/a').body == b'1'
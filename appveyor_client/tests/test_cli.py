@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Command line interface tests."""
+
+# Standard library imports
+import json
+
+# Third party imports
+import pytest
+
+# Local imports
+from appveyor_client import cli
+from appveyor_client.client import AppveyorClient
+
+LAST_BUILD = 'GET /api/projects/{account}/{slug}'
+
+
+@pytest.fixture
+def run(transport, monkeypatch, capsys):
+    """Run the command line against the memory transport."""
+    monkeypatch.setattr(cli, '_make_client', lambda args: AppveyorClient(
+        args.token, lazy=True, transport=transport))
+
+    def run(*argv):
+        capsys.readouterr()
+        code = cli.main(['--token', 'token'] + list(argv))
+        lines = capsys.readouterr()[0].splitlines()
+        return code, [json.loads(line) for line in lines]
+
+    return run
+
+
+def last_build(status):
+    """Answer last build requests with a build of the project slug."""
+    def respond(method, url, headers, body):
+        slug = url.split('/')[4]
+        if slug == 'missing':
+            return 404, {}, json.dumps({'message': 'Project not found'})
+        return 200, {}, json.dumps({'build': {
+            'buildId': 1, 'version': '1.0', 'status': status,
+            'branch': slug}})
+
+    return respond
+
+
+def test_status(transport, run):
+    """Each project gets a record, failures an error record."""
+    transport.add(LAST_BUILD, last_build('success'))
+
+    code, records = run('status', 'account/one', 'account/missing')
+    assert code == 1
+    records = sorted(records, key=lambda record: record['project'])
+    assert records[0]['error']
+    assert records[0]['project'] == 'missing'
+    assert records[1]['status'] == 'success'
+    assert records[1]['branch'] == 'one'
+
+    transport.add('GET /api/projects', [
+        {'accountName': 'account', 'slug': 'one'}])
+    assert run('status') == (0, [dict(records[1])])
+
+
+def test_cancel(transport, run):
+    """Only queued or running builds are cancelled."""
+    transport.add(LAST_BUILD, last_build('running'))
+    transport.add('DELETE /api/builds/{account}/{slug}/{version}',
+                  status_code=204)
+
+    code, records = run('cancel', 'account/one', '--dry-run')
+    assert (code, records[0]['cancelled']) == (0, True)
+    assert not [call for call in transport.calls if call[0] == 'DELETE']
+
+    assert run('cancel', 'account/one')[0] == 0
+    assert [url for method, url, _ in transport.calls
+            if method == 'DELETE'] == ['/api/builds/account/one/1.0']
+
+    code, records = run('cancel')
+    assert code == 1
+    assert records[0]['command'] == 'cancel'
+
+
+def test_redeploy(transport, run):
+    """The last successful deployment of each environment is started."""
+    transport.add('GET /api/environments', [
+        {'deploymentEnvironmentId': 1, 'name': 'production'}])
+    transport.add('GET /api/environments/{id}/deployments', {'deployments': [
+        {'deployment': {'status': 'failed', 'build': {'version': '1.1'}},
+         'project': {'accountName': 'account', 'slug': 'one'}},
+        {'deployment': {'status': 'success', 'build': {'version': '1.0'}},
+         'project': {'accountName': 'account', 'slug': 'one'}}]})
+    transport.add('POST /api/deployments',
+                  lambda method, url, headers, body: (
+                      200, {}, {'deploymentId': 9}))
+
+    code, records = run('redeploy', 'production', 'staging')
+    assert code == 1
+    records = sorted(records, key=lambda record: record['environment'])
+    assert records[0]['version'] == '1.0'
+    assert records[0]['deployment_id'] == 9
+    assert records[1]['environment'] == 'staging'
+    assert 'error' in records[1]
+    started = [json.loads(body.decode('utf-8'))
+               for method, _, body in transport.calls if method == 'POST']
+    assert [(body['projectSlug'], body['environmentName'],
+             body['buildVersion']) for body in started] == [
+        ('one', 'production', '1.0')]
+
+
+def test_logs(transport, run, tmpdir):
+    """Job logs are downloaded and partial ones resumed."""
+    transport.add('GET /api/buildjobs/{job_id}/log', b'0123456789',
+                  headers={'Content-Type': 'text/plain'})
+    tmpdir.join('b.log').write_binary(b'0123')
+
+    code, records = run('logs', 'a', 'b', '--dir', str(tmpdir))
+    assert code == 0
+    assert sorted((r['job_id'], r['bytes']) for r in records) == [
+        ('a', 10), ('b', 10)]
+    assert tmpdir.join('b.log').read_binary() == b'0123456789'
+
+
+def test_arguments(monkeypatch):
+    """Invalid arguments exit with a usage error."""
+    monkeypatch.delenv('APPVEYOR_TOKEN', raising=False)
+    for argv in (['status'], ['--token', 't', '-j', '0', 'status'],
+                 ['--token', 't', '--timeout', '0', 'status'],
+                 ['--token', 't']):
+        with pytest.raises(SystemExit):
+            cli.main(argv)
+
+    args = cli.make_parser().parse_args(['--token', 't', 'export'])
+    assert (args.format, args.fetch_jobs) == ('ndjson', False)
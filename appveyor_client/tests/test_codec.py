@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Json codec tests."""
+
+# Standard library imports
+import json
+
+# Third party imports
+import pytest
+
+# Local imports
+from appveyor_client.client import AppveyorClient
+from appveyor_client.codec import CODECS, JsonCodec, get_codec
+
+DATA = {'name': u'caf\xe9', 'jobs': [1, 2.5, None, True], 'empty': {}}
+
+
+@pytest.fixture(params=[codec.name for codec in CODECS])
+def codec(request):
+    """Return each available codec."""
+    pytest.importorskip(request.param)
+    return get_codec(request.param)
+
+
+def test_round_trip(codec):
+    """Codecs encode to bytes and decode bytes."""
+    body = codec.dumps(DATA)
+    assert isinstance(body, bytes)
+    assert json.loads(body.decode('utf-8')) == DATA
+    assert codec.loads(body) == DATA
+
+
+def test_json_codec_compact():
+    """The standard library codec leaves out whitespace."""
+    assert JsonCodec().dumps({'a': [1, 2]}) == b'{"a":[1,2]}'
+
+
+def test_get_codec():
+    """The fastest codec is the default, unknown codecs raise."""
+    assert get_codec().name in [codec.name for codec in CODECS]
+    assert get_codec('json').name == 'json'
+    with pytest.raises(ValueError):
+        get_codec('yaml')
+
+
+def test_get_missing_codec(monkeypatch):
+    """Codecs asked for by name raise when their library is missing."""
+    def missing(self):
+        raise ImportError('No module named ujson')
+
+    monkeypatch.setattr(CODECS[1], '__init__', missing)
+    with pytest.raises(ImportError):
+        get_codec('ujson')
+
+
+def test_client_codec(transport):
+    """Clients encode requests and decode responses with their codec."""
+    transport.add('POST /api/builds',
+                  lambda method, url, headers, body: (200, {}, body))
+    client = AppveyorClient('token', codec='json', transport=transport)
+
+    client.builds.start('account', 'project', branch='master')
+    body = transport.calls[-1][2]
+    assert b' ' not in body
+    assert json.loads(body.decode('utf-8')) == {
+        'accountName': 'account', 'projectSlug': 'project',
+        'branch': 'master'}
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Deadline propagation tests."""
+
+# Standard library imports
+import time
+
+# Third party imports
+import pytest
+
+# Local imports
+from appveyor_client.client import AppveyorClient, AppveyorTimeoutError
+from appveyor_client.deadline import Deadline, current_deadline
+from appveyor_client.retry import RetryPolicy
+from appveyor_client.utils import Prefetch, fan_out
+
+
+def test_fan_out_propagates_deadline():
+    """Calls made by fan_out threads share the deadline of the caller."""
+    with Deadline(30) as deadline:
+        results = list(fan_out(lambda item: current_deadline(),
+                               [(item, ) for item in range(4)]))
+
+    assert [result.result for result in results] == [deadline] * 4
+    assert list(fan_out(lambda: current_deadline(), [()]))[0].result is None
+
+
+def test_prefetch_propagates_deadline():
+    """Prefetched calls share the deadline of the caller."""
+    with Deadline(30) as deadline:
+        prefetch = Prefetch(current_deadline)
+    assert prefetch.result() is deadline
+    assert Prefetch(current_deadline).result() is None
+
+
+def test_nested_deadline_only_shortens():
+    """Nested deadlines cannot extend the enclosing budget."""
+    with Deadline(1) as outer:
+        with Deadline(60):
+            assert current_deadline() is outer
+        with Deadline(0.5) as inner:
+            assert current_deadline() is inner
+    assert current_deadline() is None
+
+
+def test_expired_deadline_fails_requests(transport):
+    """Requests fail right away once the budget is spent."""
+    transport.add('GET /api/projects', [])
+    client = AppveyorClient('token', transport=transport)
+
+    with client.deadline(0.01):
+        time.sleep(0.02)
+        with pytest.raises(AppveyorTimeoutError):
+            client.projects.get()
+    assert ('GET', '/api/projects', None) not in transport.calls
+
+
+def test_retry_outlasting_deadline(transport):
+    """Retries whose delay outlasts the deadline fail early."""
+    transport.add('GET /api/projects', b'', status_code=503,
+                  headers={'Retry-After': '60'})
+    client = AppveyorClient('token', transport=transport,
+                            retry=RetryPolicy())
+
+    start = time.time()
+    with client.deadline(5):
+        with pytest.raises(AppveyorTimeoutError):
+            client.projects.get()
+    assert time.time() - start < 1
+
+
+def test_batch_shares_deadline(transport):
+    """The requests of batch operations fail once the budget is spent."""
+    def respond(method, url, headers, body):
+        time.sleep(0.1)
+        return 200, {}, b'{}'
+
+    transport.add('GET /api/projects/{account}/{slug}/branch/{branch}',
+                  respond)
+    client = AppveyorClient('token', transport=transport)
+    items = [('account', 'project', str(branch)) for branch in range(8)]
+
+    with client.deadline(0.05):
+        results = list(client.batch('projects.last_branch_build', items,
+                                    max_workers=2))
+
+    errors = [result.error for result in results]
+    assert any(isinstance(error, AppveyorTimeoutError) for error in errors)
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Build history export tests."""
+
+# Standard library imports
+import io
+import json
+import re
+
+# Third party imports
+import pytest
+
+# Local imports
+from appveyor_client.client import AppveyorClient
+from appveyor_client.export import (COLUMNS, ChunkedOutput, CsvWriter,
+                                    NdjsonWriter, ParquetWriter,
+                                    export_history, flatten_build)
+
+NAMES = [name for name, _, _ in COLUMNS]
+BUILD = {
+    'buildId': 2,
+    'version': '1.0.2',
+    'branch': 'master',
+    'isTag': False,
+    'status': 'success',
+    'created': '2017-07-14T02:40:00.5+00:00',
+    'jobs': [{'jobId': 'a', 'name': u'caf\xe9', 'testsCount': 3},
+             {'jobId': 'b', 'status': 'failed'}],
+}
+
+
+def rows():
+    """Return the rows of the test build."""
+    return flatten_build('account', 'project', BUILD)
+
+
+def test_flatten_build():
+    """Builds give one row per job, or one row without jobs."""
+    first, second = rows()
+    row = dict(zip(NAMES, first))
+    assert row['account_name'] == 'account'
+    assert row['build_id'] == 2
+    assert row['created'] == '2017-07-14T02:40:00.5+00:00'
+    assert (row['job_id'], row['job_name'], row['tests_count']) == (
+        'a', u'caf\xe9', 3)
+    assert dict(zip(NAMES, second))['job_status'] == 'failed'
+
+    row, = flatten_build('account', 'project', {'buildId': 1})
+    assert len(row) == len(COLUMNS)
+    assert row[NAMES.index('job_id')] is None
+
+
+def test_ndjson_writer(tmpdir):
+    """Rows are written as json objects keyed by column name."""
+    path = str(tmpdir.join('rows.ndjson'))
+    writer = NdjsonWriter(path)
+    writer.write_rows(rows())
+    writer.close()
+
+    with io.open(path, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    assert [record['job_id'] for record in records] == ['a', 'b']
+    assert records[0]['job_name'] == u'caf\xe9'
+
+
+def test_csv_writer(tmpdir):
+    """Rows are written after a header line."""
+    path = str(tmpdir.join('rows.csv'))
+    writer = CsvWriter(path)
+    writer.write_rows(rows())
+    writer.close()
+
+    with io.open(path, 'rb') as f:
+        lines = f.read().decode('utf-8').splitlines()
+    assert lines[0] == u','.join(NAMES)
+    assert [line.split(u',')[NAMES.index('job_name')]
+            for line in lines[1:]] == [u'caf\xe9', u'']
+
+
+def test_parquet_writer(tmpdir):
+    """Rows are written as row groups with typed columns."""
+    parquet = pytest.importorskip('pyarrow.parquet')
+    path = str(tmpdir.join('rows.parquet'))
+    writer = ParquetWriter(path)
+    writer.write_rows(rows())
+    writer.write_rows(rows()[:1])
+    writer.close()
+
+    parquet_file = parquet.ParquetFile(path)
+    assert parquet_file.metadata.num_row_groups == 2
+    table = parquet_file.read()
+    assert table.column('job_id').to_pylist() == ['a', 'b', 'a']
+    created = table.column('created').to_pylist()[0]
+    assert (created.hour, created.microsecond) == (2, 500000)
+
+
+def test_chunked_output(tmpdir):
+    """Rows are split over numbered files."""
+    with ChunkedOutput(str(tmpdir), NdjsonWriter, rows_per_file=3) as output:
+        output.write_rows(rows())
+        output.write_rows(rows() * 2)
+    assert output.rows == 6
+    assert [path.rsplit('-', 1)[-1] for path in output.paths] == [
+        '00000.ndjson', '00001.ndjson']
+    with pytest.raises(ValueError):
+        ChunkedOutput(str(tmpdir), NdjsonWriter, rows_per_file=0)
+
+
+def history(builds):
+    """Answer paged history requests from a list of builds, newest first."""
+    def respond(method, url, headers, body):
+        query = dict(re.findall(r'(\w+)=([\w.]+)', url))
+        start = int(query.get('startBuildId', 0))
+        page = [dict(build, jobs=[]) for build in builds
+                if not start or build['buildId'] < start]
+        return 200, {}, json.dumps(
+            {'builds': page[:int(query['recordsNumber'])]})
+
+    return respond
+
+
+def test_export_history(transport, tmpdir):
+    """Histories are exported one row per build, or per job on request."""
+    builds = [dict(BUILD, buildId=build_id, version='1.0.{}'.format(build_id))
+              for build_id in range(5, 0, -1)]
+    transport.add('GET /api/projects/{account}/{slug}/history',
+                  history(builds))
+    transport.add('GET /api/projects/{account}/{slug}/build/{version}',
+                  {'build': BUILD})
+    transport.add('GET /api/projects/account/broken/history',
+                  status_code=403, body={'message': 'Forbidden'})
+    client = AppveyorClient('token', transport=transport)
+    projects = [('account', 'one'), ('account', 'two'),
+                ('account', 'broken')]
+
+    result = export_history(client, projects, str(tmpdir.join('builds')),
+                            format='csv', rows_per_file=4,
+                            records_per_page=2, max_workers=2)
+    assert result.rows == 10
+    assert len(result.paths) == 3
+    assert [project for project, _ in result.errors] == [
+        ('account', 'broken')]
+
+    result = export_history(client, projects[:1], str(tmpdir.join('jobs')),
+                            fetch_jobs=True, records_per_page=2)
+    assert result.rows == 10
+    with io.open(result.paths[0], encoding='utf-8') as f:
+        assert set(json.loads(line)['job_id'] for line in f) == {'a', 'b'}
+
+    with pytest.raises(ValueError):
+        export_history(client, projects, str(tmpdir), format='xml')
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Project index tests."""
+
+# Standard library imports
+import threading
+
+# Third party imports
+import pytest
+
+# Local imports
+from appveyor_client.client import AppveyorClient, AppveyorError
+from appveyor_client.index import ProjectIndex
+
+PROJECTS = [
+    {'projectId': 1, 'accountName': 'one', 'slug': 'app',
+     'repositoryName': 'One/App'},
+    {'projectId': 2, 'accountName': 'two', 'slug': 'app',
+     'repositoryName': 'two/app'},
+    {'projectId': 3, 'accountName': 'one', 'slug': 'lib'},
+]
+
+
+class Projects(object):
+    """Projects api group answering a fixed project list."""
+
+    def __init__(self, projects=PROJECTS):
+        """Projects api group answering a fixed project list."""
+        self.projects = list(projects)
+        self.calls = 0
+
+    def get(self):
+        """Return the project list."""
+        self.calls += 1
+        return self.projects
+
+
+def test_lookups():
+    """Projects are found by repository, id and slug."""
+    index = ProjectIndex(Projects())
+
+    assert index.by_repo('one/app')['projectId'] == 1
+    assert index.by_repo('TWO/APP')['projectId'] == 2
+    assert index.by_id(3)['slug'] == 'lib'
+    assert index.by_slug('lib')['projectId'] == 3
+    assert index.by_slug('app', 'two')['projectId'] == 2
+
+
+def test_ambiguous_slug():
+    """Slugs shared by several accounts need the account name."""
+    projects = Projects()
+    index = ProjectIndex(projects)
+
+    assert index.by_slug('app') is None
+    assert index.by_slug('app', 'one')['projectId'] == 1
+    assert projects.calls == 1
+
+
+def test_ttl():
+    """The project list is downloaded again once the ttl has passed."""
+    now = [0]
+    projects = Projects()
+    index = ProjectIndex(projects, ttl=300, clock=lambda: now[0])
+
+    index.by_id(1)
+    now[0] = 299
+    index.by_id(1)
+    assert projects.calls == 1
+
+    now[0] = 300
+    index.by_id(1)
+    assert projects.calls == 2
+
+
+def test_miss_refresh_limited():
+    """Unknown keys refresh the index at most once per miss_ttl."""
+    now = [0]
+    projects = Projects()
+    index = ProjectIndex(projects, miss_ttl=10, clock=lambda: now[0])
+
+    assert index.by_id(4) is None
+    assert index.by_id(4) is None
+    assert projects.calls == 1
+
+    now[0] = 10
+    projects.projects.append({'projectId': 4, 'accountName': 'one',
+                              'slug': 'new'})
+    assert index.by_id(4)['slug'] == 'new'
+    assert projects.calls == 2
+
+
+def test_lookups_not_blocked_by_refresh():
+    """Lookups answered by the current index do not wait for a download."""
+    now = [0]
+    started = threading.Event()
+    release = threading.Event()
+
+    class Slow(Projects):
+        def get(self):
+            if self.calls:
+                started.set()
+                release.wait(5)
+            return super(Slow, self).get()
+
+    projects = Slow()
+    index = ProjectIndex(projects, ttl=300, clock=lambda: now[0])
+    index.by_id(1)
+    now[0] = 300
+
+    thread = threading.Thread(target=index.by_id, args=(1, ))
+    thread.start()
+    assert started.wait(5)
+    # Answered from the previous index, without starting a second download
+    assert index.by_id(3)['slug'] == 'lib'
+    release.set()
+    thread.join()
+    assert projects.calls == 2
+
+
+def test_account_slug_for_repo(transport):
+    """Repositories are resolved to their account name and slug."""
+    transport.add('GET /api/projects', PROJECTS)
+    client = AppveyorClient('token', transport=transport)
+
+    assert client.account_slug_for_repo('one/app') == ('one', 'app')
+    with pytest.raises(AppveyorError):
+        client.account_slug_for_repo('unknown/repo')
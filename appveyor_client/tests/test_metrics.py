@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Request metrics tests."""
+
+# Local imports
+from appveyor_client.client import AppveyorClient
+from appveyor_client.metrics import MetricsCollector, endpoint_template
+from appveyor_client.retry import RetryPolicy
+from appveyor_client.tests.test_stream import LOG, LOG_URL, DroppingTransport
+
+
+def make_client(transport, **kwargs):
+    """Return a lazy client of a transport serving the log."""
+    transport.add('GET ' + LOG_URL, LOG, headers={'Content-Type': 'text'})
+    return AppveyorClient('token', transport=transport, lazy=True, **kwargs)
+
+
+def test_endpoint_template():
+    """Urls are grouped by the path template of their endpoint."""
+    assert endpoint_template('/api/projects') == '/api/projects'
+    assert (endpoint_template('/api/buildjobs/abc_1/log') ==
+            '/api/buildjobs/{job_id}/log')
+    assert (endpoint_template('/api/projects/a/b/history?recordsNumber=5') ==
+            '/api/projects/{account_name}/{project_slug}/history')
+    assert (endpoint_template('/api/buildjobs/1/artifacts/dist/app.zip') ==
+            '/api/buildjobs/{job_id}/artifacts/{file_name}')
+    assert endpoint_template('/api/unknown/1') == '/api/unknown/1'
+
+
+def test_collector(transport, sequence):
+    """Requests, retries, bytes and latencies are recorded per endpoint."""
+    metrics = MetricsCollector()
+    transport.add('GET /api/projects',
+                  sequence((503, {}, b''), (200, {}, b'[1, 2]')))
+    retry = RetryPolicy(backoff_factor=0, jitter=False)
+    client = AppveyorClient('token', transport=transport, retry=retry,
+                            metrics=metrics)
+    client.projects.get()
+
+    snapshot = metrics.snapshot()
+    key = ('GET', '/api/projects')
+    assert snapshot['requests'][key + ('503', )] == 1
+    assert snapshot['requests'][key + ('200', )] == 1
+    assert snapshot['retries'][key] == 1
+    assert snapshot['bytes_received'][key] == len(b'[1, 2]')
+    assert snapshot['latency'][key]['count'] == 2
+    assert snapshot['latency'][key]['buckets'][-1] == (None, 2)
+    assert snapshot['in_flight'] == 0
+
+
+def test_prometheus(transport):
+    """Metrics are exported in the Prometheus text format."""
+    metrics = MetricsCollector(prefix='test')
+    transport.add('GET /api/projects', [])
+    AppveyorClient('token', transport=transport, metrics=metrics)
+
+    text = metrics.prometheus()
+    assert ('test_requests_total{method="GET",endpoint="/api/roles",'
+            'status="200"} 1') in text
+    assert ('test_request_duration_seconds_bucket{method="GET",'
+            'endpoint="/api/roles",le="+Inf"} 1') in text
+    assert text.endswith('test_in_flight 0\n')
+
+
+def test_hooks(transport):
+    """Request hooks receive the details of every attempt."""
+    seen = []
+    client = AppveyorClient('token', transport=transport, lazy=True)
+    client.add_hook('post_request', seen.append)
+    client.verify()
+    client.remove_hook('post_request', seen.append)
+    client.roles.get()
+
+    assert [(info.method, info.url, info.status_code) for info in seen] == [
+        ('GET', '/api/roles', 200)]
+
+
+def test_streamed_bytes_received():
+    """Metrics count the bytes of streamed responses actually read."""
+    metrics = MetricsCollector()
+    transport = DroppingTransport([1000])
+    client = make_client(transport, metrics=metrics)
+
+    b''.join(client.builds.log_stream('1'))
+    stream = client.builds.log_stream('1', chunk_size=100)
+    next(stream)
+    stream.close()
+
+    key = ('GET', LOG_URL)
+    assert metrics.snapshot()['bytes_received'][key] == len(LOG) + 100
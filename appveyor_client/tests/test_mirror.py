@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Deployment mirror tests."""
+
+# Standard library imports
+import json
+
+# Local imports
+from appveyor_client.client import AppveyorClient
+from appveyor_client.mirror import DeploymentMirror
+
+
+class Server(object):
+    """Environments, settings and deployments served to a mirror."""
+
+    def __init__(self, transport):
+        """Environments, settings and deployments served to a mirror."""
+        self.environments = []
+        self.settings = {}
+        self.deployments = {}
+        self.failing = set()
+        transport.add('GET /api/environments', self.respond)
+        transport.add('GET /api/environments/{id}/{kind}', self.respond)
+        self.transport = transport
+
+    def respond(self, method, url, headers, body):
+        """Answer from the current state."""
+        parts = url.split('?')[0].split('/')
+        if len(parts) == 3:
+            return 200, {}, json.dumps(self.environments)
+
+        environment_id, kind = int(parts[3]), parts[4]
+        if (environment_id, kind) in self.failing:
+            return 403, {}, json.dumps({'message': 'Forbidden'})
+        elif kind == 'settings':
+            contents = {'environment': {
+                'settings': self.settings[environment_id]}}
+        else:
+            contents = {'deployments': self.deployments[environment_id]}
+        return 200, {}, json.dumps(contents)
+
+    def add(self, environment_id, updated='1', settings=None):
+        """Add an environment."""
+        self.environments.append({'deploymentEnvironmentId': environment_id,
+                                  'name': 'env{}'.format(environment_id),
+                                  'updated': updated})
+        self.settings[environment_id] = settings or {}
+        self.deployments[environment_id] = []
+
+    def deploy(self, environment_id, deployment_id, status='queued',
+               slug='project'):
+        """Add a deployment, newest first."""
+        self.deployments[environment_id].insert(0, {
+            'deployment': {'deploymentId': deployment_id, 'status': status},
+            'project': {'accountName': 'account', 'slug': slug}})
+
+    def calls(self, kind):
+        """Return the number of requests of a kind."""
+        return sum(1 for _, url, _ in self.transport.calls
+                   if url.endswith(kind))
+
+
+def summary(changes):
+    """Return the kinds and ids of changes."""
+    return [(change.kind, change.environment['deploymentEnvironmentId'],
+             change.deployment and change.deployment['deployment'][
+                 'deploymentId'])
+            for change in changes]
+
+
+def make_mirror(transport):
+    """Return a mirror and the server it mirrors."""
+    server = Server(transport)
+    client = AppveyorClient('token', transport=transport)
+    return DeploymentMirror(client, max_workers=2), server
+
+
+def test_changes(transport):
+    """Each refresh returns only the changes since the previous one."""
+    mirror, server = make_mirror(transport)
+    server.add(1, settings={'a': 1})
+    server.deploy(1, 10, 'success')
+    assert sorted(summary(mirror.refresh())) == [
+        ('deployment_added', 1, 10), ('environment_added', 1, None)]
+    assert mirror.settings(1) == {'a': 1}
+    assert mirror.refresh() == []
+
+    server.add(2)
+    server.deploy(1, 11)
+    server.deploy(2, 20)
+    assert sorted(summary(mirror.refresh())) == [
+        ('deployment_added', 1, 11), ('deployment_added', 2, 20),
+        ('environment_added', 2, None)]
+
+    server.deploy(1, 12, 'success', slug='other')
+    server.deployments[1][1]['deployment']['status'] = 'running'
+    changes = mirror.refresh()
+    assert sorted(summary(changes)) == [
+        ('deployment_added', 1, 12), ('status_changed', 1, 11)]
+    changed = [c for c in changes if c.kind == 'status_changed'][0]
+    assert changed.previous['deployment']['status'] == 'queued'
+    assert [item['deployment']['deploymentId']
+            for item in mirror.deployments(1)] == [12, 11, 10]
+    assert [item['deployment']['deploymentId'] for item in
+            mirror.project_deployments('account', 'project')] == [20, 11, 10]
+
+    server.environments.pop(0)
+    assert summary(mirror.refresh()) == [('environment_removed', 1, None)]
+    assert [e['deploymentEnvironmentId']
+            for e in mirror.environments()] == [2]
+    assert mirror.settings(1) is None
+
+
+def test_settings_fetched_when_updated(transport):
+    """Settings are fetched again only when the environment is updated."""
+    mirror, server = make_mirror(transport)
+    server.add(1, settings={'a': 1})
+    mirror.refresh()
+    server.settings[1] = {'a': 2}
+    mirror.refresh()
+    assert server.calls('/settings') == 1
+    assert mirror.settings(1) == {'a': 1}
+
+    server.environments[0]['updated'] = '2'
+    changes = mirror.refresh()
+    assert server.calls('/settings') == 2
+    assert summary(changes) == [('settings_changed', 1, None)]
+    assert changes[0].previous == {'a': 1}
+    assert mirror.settings(1) == {'a': 2}
+
+
+def test_failed_fetches_retried(transport):
+    """Failed fetches are reported and retried by the next refresh."""
+    mirror, server = make_mirror(transport)
+    server.add(1, settings={'a': 1})
+    server.deploy(1, 10)
+    server.failing.update([(1, 'settings'), (1, 'deployments')])
+    changes = mirror.refresh()
+    assert summary(changes) == [('environment_added', 1, None)]
+    assert sorted(environment_id for environment_id, _ in mirror.errors) == [
+        1, 1]
+    assert mirror.settings(1) is None
+
+    server.failing.clear()
+    assert summary(mirror.refresh()) == [('deployment_added', 1, 10)]
+    assert mirror.errors == []
+    assert mirror.settings(1) == {'a': 1}
+
+
+def test_watch(transport):
+    """Watching refreshes between sleeps."""
+    mirror, server = make_mirror(transport)
+    server.add(1)
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        server.deploy(1, len(sleeps))
+
+    watch = mirror.watch(interval=30, sleep=sleep)
+    assert [next(watch).kind for _ in range(3)] == [
+        'environment_added', 'deployment_added', 'deployment_added']
+    assert sleeps == [30, 30]
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Typed model tests."""
+
+# Standard library imports
+import datetime
+
+# Third party imports
+import pytest
+
+# Local imports
+from appveyor_client.client import AppveyorClient
+from appveyor_client.models import Build, Job, Project, to_models
+
+BUILD = {
+    'buildId': 1,
+    'version': '1.0.1',
+    'status': 'success',
+    'branch': 'master',
+    'started': '2017-07-14T02:40:00.5+00:00',
+    'jobs': [{'jobId': 'abc', 'status': 'failed', 'messages': []}],
+    'newField': 3,
+}
+
+
+def test_fields():
+    """Fields are read as attributes or by api key."""
+    build = Build.from_dict(BUILD)
+    assert build.build_id == build['buildId'] == 1
+    assert build.started == datetime.datetime(2017, 7, 14, 2, 40, 0, 500000)
+    assert build['newField'] == 3
+    assert build.finished is build['finished'] is None
+    assert 'finished' not in build
+    assert build.get('finished', 'unset') == 'unset'
+    with pytest.raises(KeyError):
+        build['unknown']
+
+    job = build.jobs[0]
+    assert isinstance(job, Job)
+    assert job is build['jobs'][0]
+    assert job.status == 'failed'
+    assert repr(job) == "<Job job_id='abc'>"
+
+
+def test_mapping():
+    """Models are read only mappings of the api keys that are set."""
+    build = Build.from_dict({'buildId': 1, 'status': None, 'extra': 2})
+    assert sorted(build) == ['buildId', 'extra']
+    assert len(build) == 2
+    assert sorted(build.items()) == [('buildId', 1), ('extra', 2)]
+    with pytest.raises(AttributeError):
+        build.build_id = 2
+
+
+def test_interned():
+    """Low cardinality values share a single copy."""
+    status = ''.join(['suc', 'cess'])
+    first = Build.from_dict({'buildId': 1, 'status': 'success'})
+    second = Build.from_dict({'buildId': 2, 'status': status})
+    assert first.status is second.status
+
+
+def test_to_dict():
+    """Models convert back to api dictionaries."""
+    data = Build.from_dict(BUILD).to_dict()
+    assert data['started'] == '2017-07-14T02:40:00.500000+00:00'
+    assert data['jobs'] == [{'jobId': 'abc', 'status': 'failed',
+                             'messages': []}]
+    assert data['newField'] == 3
+    assert Build.from_dict(data).to_dict() == data
+
+
+def test_equality():
+    """Models compare equal by their api keys, to models and dictionaries."""
+    build = Build.from_dict(BUILD)
+    assert build == Build.from_dict(BUILD)
+    assert not build != Build.from_dict(BUILD)
+    assert build != Build.from_dict(dict(BUILD, status='failed'))
+    assert build == build.to_dict()
+    assert build.to_dict() == build
+    assert build != Job.from_dict({'jobId': 'abc'})
+    assert build != 1
+    with pytest.raises(TypeError):
+        hash(build)
+
+
+def test_to_models():
+    """Entities, lists and envelopes are converted."""
+    contents = to_models({'project': {'projectId': 1},
+                          'builds': [{'buildId': 2}], 'total': 1})
+    assert isinstance(contents['project'], Project)
+    assert isinstance(contents['builds'][0], Build)
+    assert contents['total'] == 1
+    assert isinstance(to_models([{'jobId': 'a'}])[0], Job)
+    assert to_models([]) == []
+
+
+def test_client_models(transport):
+    """Clients return models when asked to."""
+    transport.add('GET /api/projects/{account}/{slug}',
+                  {'project': {'projectId': 1}, 'build': BUILD})
+    client = AppveyorClient('token', models=True, transport=transport)
+
+    contents = client.projects.last_build('account', 'project')
+    assert contents['build'] == Build.from_dict(BUILD)
+    assert contents['build'].jobs[0].status == 'failed'
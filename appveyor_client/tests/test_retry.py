@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Retry policy tests."""
+
+# Standard library imports
+import time
+
+# Third party imports
+import pytest
+import requests
+
+# Local imports
+from appveyor_client.client import AppveyorClient, AppveyorError
+from appveyor_client.retry import RetryPolicy, parse_retry_after
+
+
+def test_get_retried_until_success(transport, retry, sequence):
+    """Failed GET requests are retried."""
+    transport.add('GET /api/projects',
+                  sequence((503, {}, b''), (502, {}, b''), (200, {}, b'[1]')))
+    client = AppveyorClient('token', transport=transport, retry=retry)
+
+    assert client.projects.get() == [1]
+    assert [call[1] for call in transport.calls].count('/api/projects') == 3
+
+
+def test_retries_give_up(transport, retry):
+    """The last failed response is raised once the retries are spent."""
+    transport.add('GET /api/projects', b'', status_code=503)
+    client = AppveyorClient('token', transport=transport, retry=retry)
+
+    with pytest.raises(AppveyorError) as excinfo:
+        client.projects.get()
+    assert excinfo.value.args[0]['status_code'] == 503
+    assert [call[1] for call in transport.calls].count('/api/projects') == 4
+
+
+def test_client_errors_not_retried(transport, retry):
+    """Responses outside the status forcelist are not retried."""
+    transport.add('GET /api/projects', b'', status_code=404)
+    client = AppveyorClient('token', transport=transport, retry=retry)
+
+    with pytest.raises(AppveyorError):
+        client.projects.get()
+    assert [call[1] for call in transport.calls].count('/api/projects') == 1
+
+
+def test_retry_after(transport, retry, sequence, monkeypatch):
+    """The delay before a retry is the Retry-After of the response."""
+    sleeps = []
+    monkeypatch.setattr(time, 'sleep', sleeps.append)
+    transport.add('GET /api/projects',
+                  sequence((429, {'Retry-After': '7'}, b''),
+                           (200, {}, b'[]')))
+    client = AppveyorClient('token', transport=transport, retry=retry)
+
+    assert client.projects.get() == []
+    assert sleeps == [7]
+
+
+def test_retry_after_capped():
+    """Retry-After values are capped to max_retry_after."""
+    policy = RetryPolicy(max_retry_after=10)
+    assert policy.delay(0, '3600') == 10
+    assert policy.delay(0, '2.5') == 2.5
+
+
+def test_parse_retry_after():
+    """Retry-After is a number of seconds or an http date."""
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('120') == 120
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0
+    assert parse_retry_after('soon') is None
+
+
+def test_backoff():
+    """Delays double on every attempt up to max_backoff."""
+    policy = RetryPolicy(backoff_factor=1, max_backoff=5, jitter=False)
+    assert [policy.delay(attempt) for attempt in range(4)] == [1, 2, 4, 5]
+
+
+def test_post_not_retried(transport, retry):
+    """POST requests are not idempotent and not retried."""
+    transport.add('POST /api/builds', b'', status_code=503)
+    client = AppveyorClient('token', transport=transport, retry=retry)
+
+    with pytest.raises(AppveyorError):
+        client.builds.start('account', 'project', branch='master')
+    assert [call[0] for call in transport.calls].count('POST') == 1
+
+
+def test_post_retried_when_allowed(transport, sequence):
+    """POST requests are retried with retry_post."""
+    retry = RetryPolicy(backoff_factor=0, jitter=False, retry_post=True)
+    transport.add('POST /api/builds',
+                  sequence((503, {}, b''), (200, {}, b'{"buildId": 1}')))
+    client = AppveyorClient('token', transport=transport, retry=retry)
+
+    build = client.builds.start('account', 'project', branch='master')
+    assert build['buildId'] == 1
+    assert [call[0] for call in transport.calls].count('POST') == 2
+
+
+def test_throttled_post_retried(transport, retry, sequence):
+    """Throttled POST requests are retried, they were not processed."""
+    transport.add('POST /api/builds',
+                  sequence((429, {'Retry-After': '0'}, b''),
+                           (200, {}, b'{"buildId": 1}')))
+    client = AppveyorClient('token', transport=transport, retry=retry)
+
+    build = client.builds.start('account', 'project', branch='master')
+    assert build['buildId'] == 1
+
+
+def test_connection_errors_retried(transport, retry):
+    """Requests failing to connect are retried."""
+    failures = [requests.ConnectionError('refused')]
+
+    def respond(method, url, headers, body):
+        if failures:
+            raise failures.pop()
+        return 200, {}, b'[]'
+
+    transport.add('GET /api/projects', respond)
+    client = AppveyorClient('token', transport=transport, retry=retry)
+
+    assert client.projects.get() == []
+    assert not failures
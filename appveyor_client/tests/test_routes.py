@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Api endpoint registry tests."""
+
+# Standard library imports
+import re
+
+# Third party imports
+import pytest
+
+# Local imports
+from appveyor_client.routes import (ENDPOINTS, JSON, ROUTES, Route,
+                                    compile_routes, template_pattern)
+
+
+def test_url():
+    """Path arguments are quoted, empty query parameters left out."""
+    route = ROUTES['projects.history']
+    assert route.params == ('account_name', 'project_slug')
+    assert route.url('account', 'my app') == (
+        '/api/projects/account/my%20app/history')
+    assert route.url('account', 'app', records_per_page=10,
+                     start_build_id=None, branch='') == (
+        '/api/projects/account/app/history?recordsNumber=10')
+    assert route.url('account', 'app', records_per_page=5,
+                     branch='feature/x y') == (
+        '/api/projects/account/app/history?recordsNumber=5'
+        '&branch=feature%2Fx%20y')
+    assert ROUTES['users.get'].url(7) == '/api/users/7'
+    assert ROUTES['users.list'].url() == '/api/users'
+
+
+def test_url_arguments():
+    """Missing path arguments and unknown query parameters raise."""
+    with pytest.raises(TypeError):
+        ROUTES['users.get'].url()
+    with pytest.raises(TypeError):
+        ROUTES['users.list'].url(1)
+    with pytest.raises(TypeError):
+        ROUTES['projects.history'].url('account', 'app', page=2)
+
+
+def test_metadata():
+    """Idempotency and cacheability follow the verb unless declared."""
+    assert ROUTES['users.get'].cacheable
+    assert ROUTES['users.delete'].idempotent
+    assert not ROUTES['users.delete'].cacheable
+    assert not ROUTES['users.add'].idempotent
+    assert ROUTES['users.add'].body == JSON
+    assert ROUTES['builds.log'].stream
+    assert not ROUTES['builds.log'].cacheable
+
+    route = Route('custom', 'POST', '/api/x', idempotent=True)
+    assert route.idempotent and not route.cacheable
+    assert repr(route) == '<Route custom POST /api/x>'
+
+
+def test_compile_routes():
+    """Every endpoint is compiled once, duplicates raise."""
+    assert len(ROUTES) == len(ENDPOINTS)
+    with pytest.raises(ValueError):
+        compile_routes(ENDPOINTS[:1] * 2)
+
+
+def test_template_pattern():
+    """Placeholders match path segments, the rest matches literally."""
+    pattern = re.compile(template_pattern(
+        '/api/buildjobs/{job_id}/artifacts/{file_name}',
+        patterns={'file_name': '.+'}) + '$')
+    assert pattern.match('/api/buildjobs/a_1/artifacts/dist/app.zip')
+    assert not pattern.match('/api/buildjobs/a/b/artifacts/app.zip')
+
+    pattern = re.compile(template_pattern('/api/{user_id}.json', '[^/?]+'))
+    assert pattern.match('/api/1.json')
+    assert not pattern.match('/api/1xjson')
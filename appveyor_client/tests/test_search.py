@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Job log search tests."""
+
+# Standard library imports
+import re
+import time
+
+# Third party imports
+import pytest
+
+# Local imports
+from appveyor_client.client import AppveyorClient, AppveyorError
+from appveyor_client.metrics import MetricsCollector
+from appveyor_client.search import LineScanner, search_logs
+
+LOG_URL = 'GET /api/buildjobs/{job_id}/log'
+
+
+def make_client(transport, log, **kwargs):
+    """Return a lazy client of a transport serving the same log to jobs."""
+    transport.add(LOG_URL, log, headers={'Content-Type': 'text'})
+    return AppveyorClient('token', transport=transport, lazy=True, **kwargs)
+
+
+def test_line_scanner_context():
+    """Matches hold the lines around them."""
+    scanner = LineScanner(re.compile('x'), context=1)
+    matches = []
+    for line in ['a', 'x1', 'b', 'x2']:
+        matches.extend(scanner.feed(line))
+    matches.extend(scanner.close())
+
+    assert matches == [(2, 'x1', ['a'], ['b']), (4, 'x2', ['b'], [])]
+
+
+def test_search_logs(transport):
+    """Matches of every job are found."""
+    client = make_client(transport, b'ok\nERROR one\nok\nERROR two\n')
+
+    matches = list(search_logs(client, ['1', '2'], 'ERROR'))
+    assert sorted((match.job_id, match.line_number, match.line)
+                  for match in matches) == [
+                      ('1', 2, 'ERROR one'), ('1', 4, 'ERROR two'),
+                      ('2', 2, 'ERROR one'), ('2', 4, 'ERROR two')]
+
+
+def test_max_matches(transport):
+    """The search stops after max_matches matches."""
+    client = make_client(transport, b'ERROR\n' * 1000)
+
+    matches = list(search_logs(client, ['1', '2', '3'], 'ERROR',
+                               max_matches=10, max_pending=2))
+    assert len(matches) == 10
+
+
+def test_closed_search_stops_reading_logs(transport):
+    """Logs are no longer downloaded once the search is closed."""
+    metrics = MetricsCollector()
+    log = b'ERROR\n' + b'nothing to see\n' * 100000
+    client = make_client(transport, log, metrics=metrics)
+
+    matches = search_logs(client, ['1'], 'ERROR', max_workers=1)
+    next(matches)
+    matches.close()
+
+    # The worker closes the log stream in the background
+    key = ('GET', '/api/buildjobs/{job_id}/log')
+    deadline = time.time() + 5
+    while key not in metrics.snapshot()['bytes_received']:
+        assert time.time() < deadline
+        time.sleep(0.01)
+    assert metrics.snapshot()['bytes_received'][key] < len(log)
+
+
+def test_failures_raised_after_search(transport):
+    """Download errors are raised once the other logs were searched."""
+    client = make_client(transport, b'ERROR\n')
+    transport.add('GET /api/buildjobs/missing/log', status_code=404)
+
+    found = []
+    with pytest.raises(AppveyorError):
+        for match in search_logs(client, ['missing', '1'], 'ERROR'):
+            found.append(match.job_id)
+    assert found == ['1']
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Single flight request coalescing tests."""
+
+# Standard library imports
+import threading
+import time
+
+# Third party imports
+import pytest
+
+# Local imports
+from appveyor_client.client import AppveyorClient, AppveyorError
+from appveyor_client.utils import SingleFlight
+
+
+def call_concurrently(func, count=5):
+    """Call func from many threads, returning the results and errors."""
+    results = []
+    errors = []
+
+    def run():
+        try:
+            results.append(func())
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=run) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def blocking(transport, url, status_code=200):
+    """Answer url once released, returning the release event."""
+    release = threading.Event()
+
+    def respond(method, url, headers, body):
+        release.wait(5)
+        return status_code, {}, b'[1]'
+
+    transport.add('GET ' + url, respond)
+    return release
+
+
+def test_concurrent_gets_coalesced(transport):
+    """Identical concurrent GET requests share a single request."""
+    release = blocking(transport, '/api/projects')
+    client = AppveyorClient('token', transport=transport, single_flight=True)
+
+    threads, results, errors = call_concurrently(client.projects.get)
+    time.sleep(0.2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == [[1]] * 5
+    assert not errors
+    assert transport.calls.count(('GET', '/api/projects', None)) == 1
+
+    client.projects.get()
+    assert transport.calls.count(('GET', '/api/projects', None)) == 2
+
+
+def test_errors_shared(transport):
+    """Callers waiting on a failed request receive its error."""
+    release = blocking(transport, '/api/projects', status_code=500)
+    client = AppveyorClient('token', transport=transport, single_flight=True)
+
+    threads, results, errors = call_concurrently(client.projects.get)
+    time.sleep(0.2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert not results
+    assert len(errors) == 5
+    assert all(isinstance(error, AppveyorError) for error in errors)
+    assert transport.calls.count(('GET', '/api/projects', None)) == 1
+
+
+def test_keys_not_shared():
+    """Calls with different keys run separately."""
+    flight = SingleFlight()
+    assert flight.do('a', lambda: 1) == 1
+    assert flight.do('b', lambda: 2) == 2
+
+
+def test_error_raised_to_leader():
+    """The caller making the call gets its error."""
+    def fail():
+        raise ValueError('failed')
+
+    with pytest.raises(ValueError):
+        SingleFlight().do('key', fail)
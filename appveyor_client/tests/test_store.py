@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Build history store tests."""
+
+# Standard library imports
+import datetime
+import json
+import re
+
+# Local imports
+from appveyor_client.client import AppveyorClient
+from appveyor_client.store import HistoryStore
+
+HISTORY = 'GET /api/projects/{account}/{slug}/history'
+BUILD = 'GET /api/projects/{account}/{slug}/build/{version}'
+
+
+def build(build_id, status='success', branch='master', day=1):
+    """Return a history build."""
+    return {'buildId': build_id, 'version': '1.0.{}'.format(build_id),
+            'status': status, 'branch': branch,
+            'created': '2017-07-{:02d}T10:00:00Z'.format(day)}
+
+
+def history(builds):
+    """Answer paged history requests from a list of builds, newest first."""
+    def respond(method, url, headers, body):
+        query = dict(re.findall(r'(\w+)=(\w+)', url))
+        size = int(query['recordsNumber'])
+        start = int(query.get('startBuildId', 0))
+        page = [b for b in builds if not start or b['buildId'] < start]
+        return 200, {}, json.dumps({'builds': page[:size]})
+
+    return respond
+
+
+def latest(builds):
+    """Answer build requests from a list of builds."""
+    def respond(method, url, headers, body):
+        version = url.rsplit('/', 1)[-1]
+        for item in builds:
+            if item['version'] == version:
+                return 200, {}, json.dumps({'build': item})
+        return 404, {}, json.dumps({'message': 'Build not found'})
+
+    return respond
+
+
+def make_store(transport, builds):
+    """Return a store of a client answering from a list of builds."""
+    transport.add(HISTORY, history(builds))
+    transport.add(BUILD, latest(builds))
+    return HistoryStore(':memory:', AppveyorClient('token',
+                                                   transport=transport))
+
+
+def versions(builds):
+    """Return the versions of builds."""
+    return [item['version'] for item in builds]
+
+
+def test_sync_and_query(transport):
+    """Synced builds are queried locally, newest first."""
+    builds = [build(5, 'failed', day=5), build(4, branch='dev', day=4),
+              build(3, day=3), build(2, 'failed', day=2), build(1, day=1)]
+    store = make_store(transport, builds)
+
+    assert store.high_water_build_id('account', 'project') is None
+    assert store.sync('account', 'project', records_per_page=2) == 5
+    assert store.high_water_build_id('account', 'project') == 5
+
+    def query(**kwargs):
+        return versions(store.history('account', 'project', **kwargs))
+
+    assert query() == versions(builds)
+    assert query(limit=2) == ['1.0.5', '1.0.4']
+    assert query(status='failed') == ['1.0.5', '1.0.2']
+    assert query(branch='dev') == ['1.0.4']
+    assert query(since=datetime.datetime(2017, 7, 2),
+                 until=datetime.datetime(2017, 7, 4)) == ['1.0.3', '1.0.2']
+    assert versions(store.history('account', 'other')) == []
+
+
+def test_sync_twice_refreshes_unfinished_builds(transport):
+    """A second sync adds newer builds and refreshes unfinished ones."""
+    builds = [build(2, 'running'), build(1, 'queued')]
+    store = make_store(transport, builds)
+    assert store.sync('account', 'project') == 2
+
+    builds[:] = [build(3, 'queued'), build(2, 'success'),
+                 build(1, 'failed')]
+    del transport.calls[:]
+    assert store.sync('account', 'project') == 3
+    history_calls = [url for _, url, _ in transport.calls if 'history' in url]
+    assert len(history_calls) == 1
+
+    stored = list(store.history('account', 'project'))
+    assert [item['status'] for item in stored] == [
+        'queued', 'success', 'failed']
+
+    # Only the build queued during the last sync is refreshed again
+    del transport.calls[:]
+    assert store.sync('account', 'project') == 1
+    assert [url.rsplit('/', 1)[-1] for _, url, _ in transport.calls
+            if '/build/' in url] == ['1.0.3']
+
+
+def test_sync_errors(transport):
+    """Deleted builds are removed, other refresh errors are kept."""
+    builds = [build(2, 'running'), build(1, 'running')]
+    store = make_store(transport, builds)
+    store.sync('account', 'project')
+
+    def forbidden(method, url, headers, body):
+        if url.endswith('1.0.1'):
+            return 403, {}, json.dumps({'message': 'Forbidden'})
+        return 404, {}, json.dumps({'message': 'Build not found'})
+
+    transport.add(BUILD, forbidden)
+    assert store.sync('account', 'project') == 0
+    assert versions(store.history('account', 'project')) == ['1.0.1']
+    assert [(version, error.args[0]['status_code'])
+            for version, error in store.errors] == [('1.0.1', 403)]
+
+
+def test_sync_all(transport):
+    """Every project of the account is synced."""
+    transport.add('GET /api/projects', [
+        {'accountName': 'account', 'slug': 'one'},
+        {'accountName': 'account', 'slug': 'two'}])
+    store = make_store(transport, [build(2), build(1)])
+
+    assert store.sync_all() == 4
+    assert versions(store.history('account', 'two')) == ['1.0.2', '1.0.1']
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Streamed download tests."""
+
+# Standard library imports
+import io
+
+# Third party imports
+import pytest
+import requests
+
+# Local imports
+from appveyor_client.client import AppveyorClient
+from appveyor_client.retry import RetryPolicy
+from appveyor_client.transport import MemoryTransport
+
+LOG = ''.join('line %d\n' % number for number in range(10000)).encode()
+
+LOG_URL = '/api/buildjobs/{job_id}/log'
+
+
+class DroppedReader(io.BytesIO):
+    """Response body whose connection drops after `limit` bytes."""
+
+    def __init__(self, body, limit):
+        """Response body whose connection drops after `limit` bytes."""
+        super(DroppedReader, self).__init__(body)
+        self.limit = limit
+
+    def read(self, size=-1):
+        """Read up to the limit, then fail like a dropped connection."""
+        left = self.limit - self.tell()
+        if left <= 0:
+            raise requests.exceptions.ChunkedEncodingError('dropped')
+        return super(DroppedReader, self).read(
+            left if size is None or size < 0 else min(size, left))
+
+
+class DroppingTransport(MemoryTransport):
+    """In-memory transport dropping streamed responses after some bytes."""
+
+    def __init__(self, drops):
+        """In-memory transport dropping responses after `drops` bytes."""
+        super(DroppingTransport, self).__init__()
+        self.drops = list(drops)
+        self.ranges = []
+
+    def send(self, request, **kwargs):
+        """Send a request, dropping streamed response bodies if pending."""
+        self.ranges.append(request.headers.get('Range'))
+        response = super(DroppingTransport, self).send(request, **kwargs)
+        if (self.drops and kwargs.get('stream') and
+                response.status_code in (200, 206)):
+            response.raw = DroppedReader(response.raw.read(),
+                                         self.drops.pop(0))
+        return response
+
+
+def log_client(transport, body=LOG, **kwargs):
+    """Return a lazy client of a transport serving the log."""
+    transport.add('GET ' + LOG_URL, body, headers={'Content-Type': 'text'})
+    return AppveyorClient('token', transport=transport, lazy=True, **kwargs)
+
+
+def test_resume_dropped_download():
+    """Dropped downloads resume from the last byte received."""
+    transport = DroppingTransport([1000, 5000])
+    client = log_client(transport)
+
+    assert b''.join(client.builds.log_stream('1', chunk_size=512)) == LOG
+    assert transport.ranges[-3:] == [None, 'bytes=1000-', 'bytes=6000-']
+
+
+def test_resume_attempts_spent():
+    """Downloads dropped too many times raise the connection error."""
+    transport = DroppingTransport([100] * 10)
+    client = log_client(transport)
+
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        b''.join(client.builds.log_stream('1'))
+    assert len([r for r in transport.ranges if r is not None]) == 3
+
+
+def test_offset(transport):
+    """Downloads start at the requested offset."""
+    client = log_client(transport)
+
+    assert b''.join(client.builds.log_stream('1', offset=100)) == LOG[100:]
+    assert list(client.builds.log_stream('1', offset=len(LOG))) == []
+
+
+def test_range_ignored(transport):
+    """Bytes before the offset are skipped if the server ignores ranges."""
+    transport.add('GET ' + LOG_URL,
+                  lambda method, url, headers, body: (200, {}, LOG))
+    client = AppveyorClient('token', transport=transport, lazy=True)
+
+    chunks = client.builds.log_stream('1', offset=1000, chunk_size=300)
+    assert b''.join(chunks) == LOG[1000:]
+
+
+def test_log_lines(transport):
+    """Logs are decoded one line at a time."""
+    client = log_client(transport, body=u'caf\xe9\nend'.encode('utf-8'))
+    assert list(client.builds.log_lines('1')) == [u'caf\xe9', u'end']
+
+
+def test_streams_retried(transport, sequence):
+    """Streamed requests follow the retry policy."""
+    transport.add('GET ' + LOG_URL, sequence((503, {}, b''), (200, {}, LOG)))
+    retry = RetryPolicy(backoff_factor=0, jitter=False)
+    client = AppveyorClient('token', transport=transport, retry=retry)
+
+    assert b''.join(client.builds.log_stream('1')) == LOG
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Live log tailing tests."""
+
+# Standard library imports
+import json
+
+# Third party imports
+import pytest
+
+# Local imports
+from appveyor_client.client import AppveyorClient, AppveyorError
+from appveyor_client.tail import LogLine, LogTail
+
+
+class Build(object):
+    """Running build whose job logs grow at each poll."""
+
+    def __init__(self, transport, chunks):
+        """Running build whose job logs grow at each poll."""
+        # job_id -> log chunks appended at each poll
+        self.chunks = chunks
+        self.logs = dict((job_id, b'') for job_id in chunks)
+        self.finished = set()
+        self.ranges = []
+        transport.add('GET /api/buildjobs/{job_id}/log', self.log)
+        transport.add('GET /api/projects/{account}/{slug}/build/{version}',
+                      self.build)
+
+    def log(self, method, url, headers, body):
+        """Answer a log request, growing the log first."""
+        job_id = url.split('/')[3]
+        self.ranges.append(headers.get('Range'))
+        if self.chunks[job_id]:
+            self.logs[job_id] += self.chunks[job_id].pop(0)
+        return 200, {'Content-Type': 'text/plain'}, self.logs[job_id]
+
+    def build(self, method, url, headers, body):
+        """Answer a build request, finishing the jobs without new output."""
+        jobs = []
+        for job_id in sorted(self.chunks):
+            if not self.chunks[job_id]:
+                self.finished.add(job_id)
+            status = 'success' if job_id in self.finished else 'running'
+            jobs.append({'jobId': job_id, 'status': status})
+        return 200, {}, json.dumps({'build': {'jobs': jobs}})
+
+
+class Clock(object):
+    """Clock advanced by the tail sleeps."""
+
+    def __init__(self):
+        """Clock advanced by the tail sleeps."""
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        """Return the current time."""
+        return self.now
+
+    def sleep(self, seconds):
+        """Advance the clock instead of sleeping."""
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def make_tail(transport, **kwargs):
+    """Return a tail of a client and its clock."""
+    clock = Clock()
+    client = AppveyorClient('token', transport=transport)
+    return LogTail(client, clock=clock, sleep=clock.sleep, **kwargs), clock
+
+
+def test_follow_build(transport):
+    """New lines of every job are yielded until the jobs finish."""
+    Build(transport, {'a': [b'a1\na', b'2\n', b'', b'', b'a3'],
+                      'b': [b'b1\n']})
+    tail, clock = make_tail(transport, min_interval=1, max_interval=4)
+    tail.add_build('account', 'project', '1.0')
+    assert len(tail) == 2
+
+    lines = list(tail)
+    assert [line for line in lines if line.job_id == 'a'] == [
+        LogLine('a', 'a1'), LogLine('a', 'a2'), LogLine('a', 'a3')]
+    assert [line for line in lines if line.job_id == 'b'] == [
+        LogLine('b', 'b1')]
+    assert len(tail) == 0
+
+
+def test_range_requests(transport):
+    """Only the bytes after the last seen offset are requested."""
+    build = Build(transport, {'a': [b'one\n', b'two\n']})
+    tail, clock = make_tail(transport)
+    tail.add_job('account', 'project', '1.0', 'a', offset=2)
+
+    assert [line.line for line in tail] == ['e', 'two']
+    assert build.ranges[:2] == ['bytes=2-', 'bytes=4-']
+
+
+def test_idle_jobs_back_off(transport):
+    """Jobs whose log does not grow are polled less often."""
+    Build(transport, {'a': [b'x\n'] + [b''] * 5})
+    tail, clock = make_tail(transport, min_interval=1, max_interval=4)
+    tail.add_job('account', 'project', '1.0', 'a')
+
+    assert [line.line for line in tail.iter_lines(timeout=10)] == ['x']
+    assert clock.sleeps == [1, 2, 4, 3]
+    assert tail.offset('a') == 2
+
+
+def test_follow_log(transport):
+    """Builds.follow_log yields the lines of a single job."""
+    Build(transport, {'a': [b'one\n', b'two\n']})
+    client = AppveyorClient('token', transport=transport)
+
+    lines = client.builds.follow_log('account', 'project', '1.0', 'a',
+                                     min_interval=0)
+    assert list(lines) == ['one', 'two']
+
+
+def test_errors_raised(transport):
+    """Consecutive failures are retried and then raised."""
+    transport.add('GET /api/buildjobs/{job_id}/log', status_code=403,
+                  body={'message': 'Forbidden'})
+    tail, clock = make_tail(transport, max_errors=2)
+    tail.add_job('account', 'project', '1.0', 'a')
+
+    with pytest.raises(AppveyorError):
+        list(tail)
+    assert clock.sleeps == [2]
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Transport tests."""
+
+# Standard library imports
+import json
+
+# Third party imports
+import pytest
+
+# Local imports
+from appveyor_client.client import (AppveyorClient, AppveyorClientError,
+                                    AppveyorError)
+from appveyor_client.transport import CassetteTransport, MemoryTransport
+
+
+def test_placeholders(transport):
+    """Placeholders of fixture urls match any path segment."""
+    transport.add('GET /api/buildjobs/{job_id}/artifacts', [{'n': 1}])
+    transport.add('GET /api/projects/{account_name}/{project_slug}',
+                  {'project': {}})
+    client = AppveyorClient('token', transport=transport)
+
+    assert client.builds.artifacts('abc-123') == [{'n': 1}]
+    assert client.projects.last_build('account', 'my_app') == {'project': {}}
+    with pytest.raises(AppveyorError):
+        client.projects.last_build('account', 'my/app')
+
+
+def test_respond():
+    """Fixtures answer matching methods and urls, the latest one first."""
+    transport = MemoryTransport({'GET /api/projects': [1]})
+    transport.add('GET /api/projects?recordsNumber=1', [2])
+    transport.add('GET /api/projects/{account}/{slug}', [3])
+    transport.add('GET /api/projects/{account}/app', [4])
+
+    def body(url, method='GET'):
+        return json.loads(transport.respond(method, url)[2].decode('utf-8'))
+
+    assert body('/api/projects') == [1]
+    assert body('/api/projects?recordsNumber=10') == [1]
+    assert body('/api/projects?recordsNumber=1') == [2]
+    assert body('/api/projects/account/lib') == [3]
+    assert body('/api/projects/account/app') == [4]
+    assert transport.respond('POST', '/api/projects')[0] == 404
+    assert transport.calls[0] == ('GET', '/api/projects', None)
+
+
+def test_callable_fixture(transport):
+    """Callable fixtures receive the request."""
+    transport.add('POST /api/builds',
+                  lambda method, url, headers, body: (200, {}, body))
+    client = AppveyorClient('token', transport=transport)
+
+    build = client.builds.start('account', 'project', branch='master')
+    assert build['branch'] == 'master'
+
+
+def test_ranges(transport):
+    """Range requests are answered from the fixture body."""
+    transport.add('GET /api/buildjobs/{job_id}/log', b'0123456789')
+
+    status_code, headers, body = transport.respond(
+        'GET', '/api/buildjobs/1/log', {'Range': 'bytes=4-'})
+    assert (status_code, body) == (206, b'456789')
+    assert headers['Content-Range'] == 'bytes 4-9/10'
+    assert transport.respond('GET', '/api/buildjobs/1/log',
+                             {'Range': 'bytes=10-'})[0] == 416
+
+
+def test_cassette_record_and_replay(tmpdir):
+    """Recorded interactions are replayed without the real transport."""
+    path = str(tmpdir.join('cassette.json'))
+    backend = MemoryTransport({'GET /api/projects': [1]})
+    backend.add('GET /api/buildjobs/{job_id}/log', b'\xff\x00log')
+    with CassetteTransport(path, transport=backend) as transport:
+        assert transport.mode == 'record'
+        client = AppveyorClient('token', transport=transport)
+        client.projects.get()
+        b''.join(client.builds.log_stream('1'))
+
+    with open(path) as f:
+        assert 'token' not in f.read()
+
+    transport = CassetteTransport(path)
+    assert transport.mode == 'replay'
+    client = AppveyorClient('token', transport=transport)
+    assert client.projects.get() == [1]
+    assert b''.join(client.builds.log_stream('1')) == b'\xff\x00log'
+    with pytest.raises(AppveyorClientError):
+        client.environments.get()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Bounded worker pool tests."""
+
+# Standard library imports
+import threading
+import time
+
+# Third party imports
+import pytest
+
+# Local imports
+from appveyor_client.utils import produce
+
+
+def test_produce_yields_values():
+    """Every value put by the calls is yielded."""
+    def call(item, put, stop):
+        put(item)
+        put(-item)
+
+    values = list(produce(call, range(1, 6), max_workers=2, max_pending=1))
+    assert sorted(values) == [-5, -4, -3, -2, -1, 1, 2, 3, 4, 5]
+
+
+def test_produce_bounds_pending_values():
+    """Calls wait for the consumer beyond max_pending values."""
+    put_values = []
+
+    def call(item, put, stop):
+        for value in range(100):
+            if put(value):
+                put_values.append(value)
+
+    values = produce(call, [None], max_pending=5)
+    assert next(values) == 0
+    time.sleep(0.2)
+    assert len(put_values) <= 7
+    values.close()
+
+
+def test_produce_stops_calls_when_closed():
+    """Closing the generator stops the calls and their threads."""
+    stopped = threading.Event()
+
+    def call(item, put, stop):
+        while put(item):
+            pass
+        stopped.set()
+
+    values = produce(call, range(4), max_workers=4, max_pending=2)
+    next(values)
+    values.close()
+    assert stopped.wait(5)
+
+
+def test_produce_raises_call_errors():
+    """Errors escaping a call are raised by the generator."""
+    def call(item, put, stop):
+        if item == 3:
+            raise ValueError(item)
+        put(item)
+
+    with pytest.raises(ValueError):
+        list(produce(call, range(5), max_workers=1))
+
+
+def test_produce_without_items():
+    """Nothing is yielded without items."""
+    assert list(produce(lambda item, put, stop: put(item), [])) == []
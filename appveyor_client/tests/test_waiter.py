@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Completion waiter tests."""
+
+# Standard library imports
+import json
+
+# Local imports
+from appveyor_client.client import AppveyorClient
+from appveyor_client.waiter import Waiter
+
+HISTORY = 'GET /api/projects/{account}/{slug}/history'
+
+
+class Clock(object):
+    """Clock advanced by the waiter sleeps."""
+
+    def __init__(self):
+        """Clock advanced by the waiter sleeps."""
+        self.now = 1500000000.0
+        self.sleeps = []
+
+    def __call__(self):
+        """Return the current time."""
+        return self.now
+
+    def sleep(self, seconds):
+        """Advance the clock instead of sleeping."""
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def build(version, status, started=None, finished=None):
+    """Return a history build."""
+    return {'version': version, 'status': status, 'started': started,
+            'finished': finished}
+
+
+def polls(*items):
+    """Answer requests with successive payloads, repeating the last."""
+    items = list(items)
+
+    def respond(method, url, headers, body):
+        item = items.pop(0) if len(items) > 1 else items[0]
+        return 200, {}, json.dumps(item)
+
+    return respond
+
+
+def pages(*builds_per_poll):
+    """Answer history requests with successive build lists."""
+    return polls(*[{'builds': builds} for builds in builds_per_poll])
+
+
+def make_waiter(transport, **kwargs):
+    """Return a waiter of a client and its clock."""
+    clock = Clock()
+    client = AppveyorClient('token', transport=transport)
+    return Waiter(client, clock=clock, sleep=clock.sleep, **kwargs), clock
+
+
+def test_builds_polled_together(transport):
+    """Builds of a project are polled with one history request."""
+    transport.add(HISTORY, pages(
+        [build('1.2', 'running'), build('1.1', 'queued')],
+        [build('1.2', 'success'), build('1.1', 'running')],
+        [build('1.2', 'success'), build('1.1', 'failed')]))
+    waiter, clock = make_waiter(transport)
+    completed = []
+    waiter.add_build('account', 'project', '1.1')
+    waiter.add_build('account', 'project', '1.2', callback=completed.append)
+    assert len(waiter) == 2
+
+    completions = waiter.wait()
+    assert [(c.key[2], c.status) for c in completions] == [
+        ('1.2', 'success'), ('1.1', 'failed')]
+    assert completed == completions[:1]
+    assert len(waiter) == 0
+    history = [url for _, url, _ in transport.calls if '/history' in url]
+    assert len(history) == 3
+
+
+def test_build_missing_from_history(transport):
+    """Builds older than the history page are polled on their own."""
+    transport.add(HISTORY, pages([build('2.0', 'running')]))
+    transport.add('GET /api/projects/{account}/{slug}/build/{version}',
+                  {'build': build('1.0', 'cancelled')})
+    waiter, clock = make_waiter(transport)
+    waiter.add_build('account', 'project', '1.0')
+
+    assert [c.status for c in waiter] == ['cancelled']
+
+
+def test_deployment(transport):
+    """Deployments are polled until they complete."""
+    transport.add('GET /api/deployments/{id}', polls(
+        {'deployment': {'status': 'running'}},
+        {'deployment': {'status': 'success'}}))
+    waiter, clock = make_waiter(transport, min_interval=5, max_interval=60)
+    waiter.add_deployment(7)
+
+    completions = waiter.wait()
+    assert [(c.kind, c.key, c.status) for c in completions] == [
+        ('deployment', 7, 'success')]
+
+
+def test_queued_polled_slowly(transport):
+    """Queued builds are polled every max_interval seconds."""
+    transport.add(HISTORY, pages([build('1.0', 'queued')]))
+    waiter, clock = make_waiter(transport, min_interval=5, max_interval=60)
+    waiter.add_build('account', 'project', '1.0')
+
+    assert waiter.wait(timeout=150) == []
+    assert clock.sleeps == [60, 60, 30]
+    assert len(waiter) == 1
+
+
+def test_running_polled_near_expected_completion(transport):
+    """Running builds are polled faster as their completion gets closer."""
+    transport.add(HISTORY, pages([
+        build('1.1', 'running', started='2017-07-14T02:40:00Z'),
+        build('1.0', 'success', started='2017-07-14T02:00:00Z',
+              finished='2017-07-14T02:10:00Z')]))
+    waiter, clock = make_waiter(transport, min_interval=5, max_interval=600)
+    waiter.add_build('account', 'project', '1.1')
+
+    # 1500000000 is 02:40:00, half of the 600s expected duration is left
+    waiter.wait(timeout=1)
+    assert clock.sleeps == [1]
+    assert waiter._schedule[('build', ('account', 'project'))] == (
+        clock.now - 1 + 300)
@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""
+Appveyor Python Client transports.
+
+Transports are `requests` transport adapters mounted on the client
+sessions, so every api method goes through them. The default transport is
+a pooled `requests.adapters.HTTPAdapter`, but any adapter can be passed as
+`AppveyorClient(token, transport=...)`.
+
+`MemoryTransport` answers requests from fixtures and `CassetteTransport`
+records real interactions to a json file and replays them later, both
+without any network I/O. They can also be passed to `AsyncAppveyorClient`.
+
+::
+
+    transport = MemoryTransport()
+    transport.add('GET /api/projects', [{'projectId': 1, 'slug': 'app'}])
+    client = AppveyorClient(token, transport=transport)
+    client.projects.get()
+"""
+
+# Standard library imports
+import base64
+import collections
+import io
+import json
+import os
+import re
+import threading
+
+# Third party imports
+import requests
+import requests.adapters
+import requests.structures
+
+# Local imports
+from appveyor_client.client import AppveyorClientError
+from appveyor_client.routes import template_pattern
+
+# Response headers kept by recordings
+RECORDED_HEADERS = ('Content-Type', 'Content-Range', 'ETag', 'Retry-After')
+
+
+def _encode_body(body):
+    """Return a fixture body as bytes."""
+    if body is None:
+        return b''
+    elif isinstance(body, bytes):
+        return body
+    elif isinstance(body, type(u'')):
+        return body.encode('utf-8')
+    return json.dumps(body).encode('utf-8')
+
+
+def _apply_range(status_code, headers, body, request_headers):
+    """Answer a `Range: bytes=N-` request from a complete response."""
+    value = (request_headers or {}).get('Range') or ''
+    match = re.match(r'bytes=(\d+)-$', value)
+    if status_code != 200 or match is None:
+        return status_code, headers, body
+
+    start = int(match.group(1))
+    if start >= len(body):
+        return 416, requests.structures.CaseInsensitiveDict(), b''
+
+    headers = requests.structures.CaseInsensitiveDict(headers)
+    headers['Content-Range'] = 'bytes {}-{}/{}'.format(start, len(body) - 1,
+                                                       len(body))
+    return 206, headers, body[start:]
+
+
+def _path_url(request):
+    """Return the path and query of a prepared request."""
+    # Endpoints end with a slash and api urls start with one
+    return '/' + request.path_url.lstrip('/')
+
+
+class _BaseTransport(requests.adapters.BaseAdapter):
+    """Transport adapter building responses from `respond`."""
+
+    def __init__(self):
+        """Transport adapter building responses from `respond`."""
+        super(_BaseTransport, self).__init__()
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def respond(self, method, url, headers=None, body=None):
+        """
+        Answer a request without any I/O.
+
+        `url` is the request path including the query string. Return the
+        response `(status_code, headers, body)`.
+        """
+        raise NotImplementedError
+
+    def send(self, request, stream=False, timeout=None, verify=True,
+             cert=None, proxies=None):
+        """Send a prepared request through `respond`."""
+        status_code, headers, body = self.respond(
+            request.method, _path_url(request), request.headers, request.body)
+
+        response = requests.Response()
+        response.status_code = status_code
+        response.headers = requests.structures.CaseInsensitiveDict(headers)
+        response.raw = io.BytesIO(body)
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        """Release the transport resources."""
+
+    def _record_call(self, method, url, body):
+        """Remember a request for later inspection."""
+        if isinstance(body, type(u'')):
+            body = body.encode('utf-8')
+
+        with self._lock:
+            self.calls.append((method, url, body))
+
+
+class MemoryTransport(_BaseTransport):
+    """
+    Transport answering requests from in-memory fixtures.
+
+    Fixtures are registered with `add` for a method and url, where the url
+    may contain `{placeholders}` matching any path segment. Urls without a
+    query string match requests with any query string. Fixtures added later
+    take precedence, and unmatched requests get a 404 response. `GET
+    /api/roles` answers an empty list by default, so clients can validate
+    their token.
+
+    Byte range requests (used to resume log downloads) are answered from
+    the fixture body. Requests are recorded in `calls` as `(method, url,
+    body)` tuples.
+    """
+
+    def __init__(self, fixtures=None):
+        """
+        Transport answering requests from in-memory fixtures.
+
+        `fixtures` is an optional dictionary mapping method urls (like 'GET
+        /api/projects') to response bodies.
+        """
+        super(MemoryTransport, self).__init__()
+        self._routes = []
+        self.add('GET /api/roles', [])
+        for method_url, body in (fixtures or {}).items():
+            self.add(method_url, body)
+
+    def add(self, method_url, body=None, status_code=200, headers=None):
+        """
+        Register a fixture response.
+
+        `body` is bytes, text, a json serializable object, or a callable
+        called with `(method, url, headers, body)` of the request and
+        returning the `(status_code, headers, body)` of the response.
+        """
+        method, url = method_url.split(' ')
+        path, _, query = url.partition('?')
+        pattern = template_pattern(path, '[^/?]+')
+        if query:
+            pattern += re.escape('?' + query)
+        else:
+            pattern += r'(\?.*)?'
+
+        if not callable(body):
+            body = _encode_body(body)
+            headers = requests.structures.CaseInsensitiveDict(headers or {})
+            headers.setdefault('Content-Type', 'application/json')
+
+        with self._lock:
+            self._routes.insert(0, (method, re.compile(pattern + '$'),
+                                    status_code, headers, body))
+
+    def respond(self, method, url, headers=None, body=None):
+        """Answer a request from the registered fixtures."""
+        self._record_call(method, url, body)
+        with self._lock:
+            routes = list(self._routes)
+
+        for route in routes:
+            route_method, regex, status_code, route_headers, route_body = route
+            if route_method != method or not regex.match(url):
+                continue
+
+            if callable(route_body):
+                status_code, route_headers, route_body = route_body(
+                    method, url, headers, body)
+                route_body = _encode_body(route_body)
+
+            return _apply_range(status_code, route_headers or {}, route_body,
+                                headers)
+
+        message = 'No fixture for {} {}'.format(method, url)
+        return 404, {'Content-Type': 'application/json'}, _encode_body(
+            {'message': message})
+
+
+class CassetteTransport(_BaseTransport):
+    """
+    Transport recording interactions to a json file and replaying them.
+
+    In 'record' mode requests are sent with `transport` (a pooled
+    `HTTPAdapter` by default) and recorded, the cassette is written by
+    `save` or `close`. In 'replay' mode recorded responses are returned in
+    order for each method and url, the last one being repeated (so polling
+    loops replay too), and unrecorded requests raise `AppveyorClientError`.
+    The 'once' mode replays the cassette if it exists and records it
+    otherwise.
+
+    Only the method, url and a few response headers are recorded, never the
+    request headers, so cassettes do not contain the api token. Recording
+    requires the synchronous client.
+
+    ::
+
+        with CassetteTransport('fixtures/projects.json') as transport:
+            client = AppveyorClient(token, transport=transport)
+            client.projects.get()
+    """
+
+    MODES = ('once', 'record', 'replay')
+
+    def __init__(self, path, mode='once', transport=None):
+        """Transport recording interactions to a json file and replaying."""
+        super(CassetteTransport, self).__init__()
+        if mode not in self.MODES:
+            raise ValueError('Invalid cassette mode: {}'.format(mode))
+
+        if mode == 'once':
+            mode = 'replay' if os.path.exists(path) else 'record'
+
+        self.path = path
+        self.mode = mode
+        self._transport = transport
+        self._interactions = []
+        self._replay = {}
+
+        if mode == 'replay':
+            with open(path) as f:
+                self._interactions = json.load(f)['interactions']
+            for interaction in self._interactions:
+                key = (interaction['method'], interaction['url'])
+                self._replay.setdefault(key, collections.deque()).append(
+                    interaction)
+        elif self._transport is None:
+            self._transport = requests.adapters.HTTPAdapter()
+
+    def __enter__(self):
+        """Use the transport as a context manager saving on exit."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Save the recorded interactions."""
+        self.close()
+
+    def respond(self, method, url, headers=None, body=None):
+        """Answer a request from the recorded interactions."""
+        if self.mode != 'replay':
+            raise AppveyorClientError('Cassette is not in replay mode')
+
+        self._record_call(method, url, body)
+        with self._lock:
+            interactions = self._replay.get((method, url))
+            if not interactions:
+                raise AppveyorClientError(
+                    'Request not recorded in {}: {} {}'.format(
+                        self.path, method, url))
+            interaction = (interactions.popleft()
+                           if len(interactions) > 1 else interactions[0])
+
+        content = interaction['body']
+        if interaction.get('base64'):
+            content = base64.b64decode(content)
+        else:
+            content = content.encode('utf-8')
+
+        return _apply_range(interaction['status_code'],
+                            interaction['headers'], content, headers)
+
+    def send(self, request, **kwargs):
+        """Send a prepared request, recording or replaying it."""
+        if self.mode == 'replay':
+            return super(CassetteTransport, self).send(request, **kwargs)
+
+        response = self._transport.send(request, **kwargs)
+        self._record(request, response)
+        return response
+
+    def _record(self, request, response):
+        """Record an interaction."""
+        content = response.content
+        try:
+            body, encoded = content.decode('utf-8'), False
+        except UnicodeDecodeError:
+            body, encoded = base64.b64encode(content).decode('ascii'), True
+
+        interaction = {
+            'method': request.method,
+            'url': _path_url(request),
+            'status_code': response.status_code,
+            'headers': dict((name, response.headers[name])
+                            for name in RECORDED_HEADERS
+                            if name in response.headers),
+            'body': body,
+        }
+        if encoded:
+            interaction['base64'] = True
+
+        self._record_call(request.method, _path_url(request), request.body)
+        with self._lock:
+            self._interactions.append(interaction)
+
+    def save(self):
+        """Write the recorded interactions to the cassette file."""
+        if self.mode != 'record':
+            return
+
+        with self._lock:
+            data = {'interactions': list(self._interactions)}
+
+        with open(self.path, 'w') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+
+    def close(self):
+        """Save the cassette and close the recording transport."""
+        self.save()
+        if self._transport is not None:
+            self._transport.close()
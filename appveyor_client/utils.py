@@ -0,0 +1,359 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Appveyor Python Client utilities."""
+
+# Standard library imports
+import codecs
+import collections
+import datetime
+import re
+import threading
+import time
+
+try:
+    # Standard library imports
+    import queue
+except ImportError:  # Python 2
+    import Queue as queue
+
+# Local imports
+from appveyor_client.deadline import propagate
+
+# Monotonic high resolution clock for measuring durations
+timer = getattr(time, 'perf_counter', time.time)
+
+DATETIME_RE = re.compile(r'(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})'
+                         r'(?:\.(\d+))?(Z|[+-]\d{2}:?\d{2})?$')
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+# Epoch seconds at midnight UTC by 'YYYY-MM-DD' date
+_DAYS = {}
+
+# Sent by a `produce` worker when it has no item left
+_DONE = object()
+
+# Error raised by a `produce` call, re-raised to the consumer
+_Raised = collections.namedtuple('_Raised', ['error'])
+
+# Parses the api timestamps in C on Python 3.11+ (older versions only
+# accept 3 or 6 fraction digits and fall back to the regular expression)
+_fromisoformat = getattr(datetime.datetime, 'fromisoformat', None)
+
+
+def parse_datetime(value):
+    """
+    Parse an Appveyor ISO 8601 timestamp into a naive UTC datetime.
+
+    ::
+
+        >>> parse_datetime('2014-08-16T00:52:15.6604826+02:00')
+        datetime.datetime(2014, 8, 15, 22, 52, 15, 660482)
+    """
+    if value is None or isinstance(value, datetime.datetime):
+        return to_utc(value)
+
+    match = DATETIME_RE.match(value)
+    if match is None:
+        raise ValueError('Invalid datetime: {}'.format(value))
+
+    year, month, day, hour, minute, second, fraction, offset = match.groups()
+    microsecond = int((fraction or '0')[:6].ljust(6, '0'))
+    dt = datetime.datetime(
+        int(year), int(month), int(day), int(hour), int(minute), int(second),
+        microsecond)
+
+    if offset and offset != 'Z':
+        sign = -1 if offset[0] == '-' else 1
+        offset = offset[1:].replace(':', '')
+        delta = datetime.timedelta(
+            hours=int(offset[:2]), minutes=int(offset[2:]))
+        dt -= sign * delta
+
+    return dt
+
+
+def epoch_seconds(value):
+    """
+    Return an api datetime as UTC epoch seconds, None if missing.
+
+    Same as `parse_datetime`, without building datetime objects.
+    """
+    if value is None:
+        return None
+    elif isinstance(value, datetime.datetime):
+        return (to_utc(value) - EPOCH).total_seconds()
+
+    if _fromisoformat is not None and value[10:11] == 'T':
+        try:
+            parsed = _fromisoformat(value)
+        except ValueError:
+            pass
+        else:
+            if parsed.tzinfo is None:
+                return (parsed - EPOCH).total_seconds()
+            return parsed.timestamp()
+
+    match = DATETIME_RE.match(value)
+    if match is None:
+        raise ValueError('Invalid datetime: {}'.format(value))
+
+    year, month, day, hour, minute, second, fraction, offset = match.groups()
+    days = _DAYS.get(value[:10])
+    if days is None:
+        days = _DAYS[value[:10]] = (datetime.datetime(
+            int(year), int(month), int(day)) - EPOCH).days * 86400.0
+
+    seconds = days + int(hour) * 3600 + int(minute) * 60 + int(second)
+    if fraction:
+        seconds += int(fraction[:6].ljust(6, '0')) / 1e6
+    if offset and offset != 'Z':
+        sign = -1 if offset[0] == '-' else 1
+        offset = offset[1:].replace(':', '')
+        seconds -= sign * (int(offset[:2]) * 3600 + int(offset[2:]) * 60)
+    return seconds
+
+
+def from_epoch_seconds(seconds):
+    """Return UTC epoch seconds as a naive UTC datetime."""
+    return EPOCH + datetime.timedelta(seconds=seconds)
+
+
+def to_utc(value):
+    """Convert a datetime to a naive UTC datetime."""
+    if value is not None and value.utcoffset() is not None:
+        value = value.replace(tzinfo=None) - value.utcoffset()
+    return value
+
+
+class Prefetch(object):
+    """
+    Call a function in a background thread and collect its result.
+
+    The call runs inside the deadline of the caller, if any.
+    """
+
+    def __init__(self, func, *args, **kwargs):
+        """Call a function in a background thread and collect its result."""
+        self._result = None
+        self._error = None
+        self._thread = threading.Thread(
+            target=self._run, args=(propagate(func), args, kwargs))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self, func, args, kwargs):
+        """Run the function storing its result or error."""
+        try:
+            self._result = func(*args, **kwargs)
+        except Exception as error:
+            self._error = error
+
+    def result(self):
+        """Wait for the call to finish and return its result."""
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+class _Flight(object):
+    """Call in progress shared by a SingleFlight."""
+
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        """Call in progress shared by a SingleFlight."""
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Coalesce concurrent identical calls into one.
+
+    Threads calling `do` with a key while a call for the same key is in
+    progress wait for it and receive its result, or its error, instead of
+    making their own call.
+    """
+
+    def __init__(self):
+        """Coalesce concurrent identical calls into one."""
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def do(self, key, func, *args, **kwargs):
+        """Call `func(*args, **kwargs)` unless a call for key is running."""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = func(*args, **kwargs)
+        except Exception as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
+
+        return flight.result
+
+    def forget(self):
+        """Make later calls start afresh instead of joining running ones."""
+        with self._lock:
+            self._flights.clear()
+
+
+class LineDecoder(object):
+    """Incrementally decode chunks of bytes into lines of text."""
+
+    def __init__(self, encoding='utf-8'):
+        """Incrementally decode chunks of bytes into lines of text."""
+        self._decoder = codecs.getincrementaldecoder(encoding)('replace')
+        self._pending = ''
+
+    def feed(self, chunk):
+        """Return the complete lines found after adding chunk."""
+        text = self._pending + self._decoder.decode(chunk)
+        lines = text.split('\n')
+        self._pending = lines.pop()
+        return [line.rstrip('\r') for line in lines]
+
+    def close(self):
+        """Return the last incomplete line, if any."""
+        text = self._pending + self._decoder.decode(b'', True)
+        self._pending = ''
+        return [text.rstrip('\r')] if text else []
+
+
+def iter_lines(chunks, encoding='utf-8'):
+    """Yield lines of text, without line endings, from chunks of bytes."""
+    decoder = LineDecoder(encoding)
+    for chunk in chunks:
+        for line in decoder.feed(chunk):
+            yield line
+
+    for line in decoder.close():
+        yield line
+
+
+BatchResult = collections.namedtuple('BatchResult',
+                                     ['item', 'result', 'error'])
+
+
+def fan_out(func, items, max_workers=8):
+    """
+    Call `func(*item)` for every item using a bounded pool of threads.
+
+    Yield a `BatchResult` for each item as soon as its call completes, with
+    the exception raised by the call (if any) stored in `error` instead of
+    aborting the whole batch. Pending calls are abandoned if the generator
+    is closed early. The calls share the deadline of the caller, if any.
+    """
+    func = propagate(func)
+    items = list(items)
+    tasks = queue.Queue()
+    results = queue.Queue()
+    stop = threading.Event()
+
+    for item in items:
+        tasks.put(item)
+
+    def work():
+        while not stop.is_set():
+            try:
+                item = tasks.get_nowait()
+            except queue.Empty:
+                return
+
+            try:
+                results.put(BatchResult(item, func(*item), None))
+            except Exception as error:
+                results.put(BatchResult(item, None, error))
+
+    for _ in range(min(max_workers, len(items))):
+        thread = threading.Thread(target=work)
+        thread.daemon = True
+        thread.start()
+
+    try:
+        for _ in range(len(items)):
+            yield results.get()
+    finally:
+        stop.set()
+
+
+def produce(func, items, max_workers=8, max_pending=16):
+    """
+    Call `func(item, put, stop)` for every item in a bounded thread pool.
+
+    Yield the values the calls pass to `put` as soon as they are put. At
+    most `max_pending` values wait to be consumed, `put` blocks until the
+    caller catches up. Once the generator is closed the `stop` event is set
+    and `put` returns False, and the calls should give up early. An error
+    raised by a call is raised by the generator. The calls share the
+    deadline of the caller, if any.
+    """
+    tasks = queue.Queue()
+    for item in items:
+        tasks.put(item)
+
+    values = queue.Queue(maxsize=max_pending)
+    stop = threading.Event()
+
+    def put(value):
+        while not stop.is_set():
+            try:
+                values.put(value, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def work():
+        try:
+            while not stop.is_set():
+                try:
+                    item = tasks.get_nowait()
+                except queue.Empty:
+                    break
+                func(item, put, stop)
+        except Exception as error:
+            put(_Raised(error))
+        finally:
+            put(_DONE)
+
+    workers = min(max_workers, tasks.qsize())
+    for _ in range(workers):
+        thread = threading.Thread(target=propagate(work))
+        thread.daemon = True
+        thread.start()
+
+    try:
+        while workers:
+            value = values.get()
+            if value is _DONE:
+                workers -= 1
+            elif isinstance(value, _Raised):
+                raise value.error
+            else:
+                yield value
+    finally:
+        stop.set()
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Appveyor Python Client build and deployment waiter."""
+
+# Standard library imports
+import collections
+import datetime
+import time
+
+# Local imports
+from appveyor_client.utils import parse_datetime
+
+FINAL_STATUSES = frozenset(['success', 'failed', 'cancelled'])
+QUEUED_STATUSES = frozenset(['queued', 'starting'])
+
+Completion = collections.namedtuple('Completion',
+                                    ['kind', 'key', 'status', 'result'])
+
+
+class _Tracked(object):
+    """In flight build or deployment."""
+
+    __slots__ = ('kind', 'key', 'callback', 'status', 'started')
+
+    def __init__(self, kind, key, callback):
+        """In flight build or deployment."""
+        self.kind = kind
+        self.key = key
+        self.callback = callback
+        self.status = 'queued'
+        self.started = None
+
+
+class Waiter(object):
+    """
+    Wait for many in flight builds and deployments in a single scheduler.
+
+    Builds of the same project are polled together with one history
+    request. Poll intervals adapt to the state of each item, between
+    `min_interval` and `max_interval` seconds: queued items are polled
+    slowly, running builds are polled faster as their expected completion
+    (estimated from recent builds of the project) gets closer.
+
+    ::
+
+        waiter = Waiter(client)
+        build = client.builds.start('account', 'project', branch='master')
+        waiter.add_build('account', 'project', build['version'])
+        for completion in waiter:
+            print(completion.key, completion.status)
+
+    Works with the synchronous `AppveyorClient`.
+    """
+
+    def __init__(self,
+                 client,
+                 min_interval=5,
+                 max_interval=60,
+                 clock=None,
+                 sleep=None):
+        """Wait for many in flight builds and deployments."""
+        self._client = client
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._clock = clock or time.time
+        self._sleep = sleep or time.sleep
+        # (account_name, project_slug) -> {build_version: _Tracked}
+        self._builds = collections.OrderedDict()
+        # deployment_id -> _Tracked
+        self._deployments = collections.OrderedDict()
+        # Poll group key -> next poll time
+        self._schedule = {}
+        # (account_name, project_slug) -> estimated build duration
+        self._durations = {}
+
+    def __len__(self):
+        """Return the number of items still in flight."""
+        return (sum(len(builds) for builds in self._builds.values()) +
+                len(self._deployments))
+
+    def add_build(self, account_name, project_slug, build_version,
+                  callback=None):
+        """
+        Track a build until it completes.
+
+        `callback(completion)` is called when the build completes.
+        """
+        project = (account_name, project_slug)
+        builds = self._builds.setdefault(project, collections.OrderedDict())
+        builds[build_version] = _Tracked(
+            'build', (account_name, project_slug, build_version), callback)
+        self._schedule.setdefault(('build', project), self._clock())
+
+    def add_deployment(self, deployment_id, callback=None):
+        """
+        Track a deployment until it completes.
+
+        `callback(completion)` is called when the deployment completes.
+        """
+        self._deployments[deployment_id] = _Tracked('deployment',
+                                                    deployment_id, callback)
+        self._schedule.setdefault(('deployment', deployment_id),
+                                  self._clock())
+
+    def __iter__(self):
+        """Iterate over completions until no item is in flight."""
+        return self.iter_completed()
+
+    def iter_completed(self, timeout=None):
+        """
+        Yield a `Completion` for each item as it completes.
+
+        Stop when no item is left in flight, or after `timeout` seconds.
+        """
+        deadline = None if timeout is None else self._clock() + timeout
+        while self._schedule:
+            group, due = min(self._schedule.items(), key=lambda item: item[1])
+            now = self._clock()
+            if deadline is not None and due >= deadline:
+                self._sleep(max(0, deadline - now))
+                return
+
+            if due > now:
+                self._sleep(due - now)
+
+            for completion in self._poll(group):
+                yield completion
+
+    def wait(self, timeout=None):
+        """Block until all items complete and return their completions."""
+        return list(self.iter_completed(timeout=timeout))
+
+    # --- Polling
+    def _poll(self, group):
+        """Poll a group, reschedule it and return its completions."""
+        kind, key = group
+        if kind == 'build':
+            completed = self._poll_builds(key)
+            pending = list(self._builds[key].values())
+            if not pending:
+                del self._builds[key]
+        else:
+            completed = self._poll_deployment(key)
+            pending = [self._deployments[key]] if not completed else []
+
+        if pending:
+            interval = min(self._interval(item, key) for item in pending)
+            self._schedule[group] = self._clock() + interval
+        else:
+            del self._schedule[group]
+
+        completions = []
+        for item, result in completed:
+            completion = Completion(item.kind, item.key, item.status, result)
+            if item.callback is not None:
+                item.callback(completion)
+            completions.append(completion)
+        return completions
+
+    def _poll_builds(self, project):
+        """Poll all tracked builds of a project with one history request."""
+        account_name, project_slug = project
+        tracked = self._builds[project]
+        history = self._client.projects.history(
+            account_name,
+            project_slug,
+            records_per_page=max(10, 2 * len(tracked)))
+        builds = history.get('builds') or []
+        self._estimate_duration(project, builds)
+
+        found = dict((build['version'], build) for build in builds
+                     if build['version'] in tracked)
+        for version in tracked:
+            if version not in found:
+                # Older than the latest page, poll it on its own
+                result = self._client.projects.build(account_name,
+                                                     project_slug, version)
+                found[version] = result['build']
+
+        completed = []
+        for version, build in found.items():
+            item = tracked[version]
+            self._update(item, build)
+            if item.status in FINAL_STATUSES:
+                completed.append((item, build))
+                del tracked[version]
+        return completed
+
+    def _poll_deployment(self, deployment_id):
+        """Poll a tracked deployment."""
+        item = self._deployments[deployment_id]
+        result = self._client.deployments.get(deployment_id)
+        deployment = result.get('deployment', result)
+        self._update(item, deployment)
+
+        if item.status not in FINAL_STATUSES:
+            return []
+
+        del self._deployments[deployment_id]
+        return [(item, deployment)]
+
+    def _update(self, item, result):
+        """Update the tracked status and start time of an item."""
+        item.status = result.get('status', item.status)
+        if item.started is None and result.get('started'):
+            item.started = parse_datetime(result['started'])
+
+    def _estimate_duration(self, project, builds):
+        """Estimate build duration from finished builds of the project."""
+        durations = sorted(
+            (parse_datetime(build['finished']) -
+             parse_datetime(build['started'])).total_seconds()
+            for build in builds
+            if build.get('status') == 'success' and build.get('started') and
+            build.get('finished'))
+        if durations:
+            self._durations[project] = durations[len(durations) // 2]
+
+    def _interval(self, item, project):
+        """Return the seconds to wait before polling an item again."""
+        if item.status in QUEUED_STATUSES or item.started is None:
+            return self.max_interval
+
+        now = datetime.datetime.utcfromtimestamp(self._clock())
+        elapsed = (now - item.started).total_seconds()
+        duration = (self._durations.get(project)
+                    if item.kind == 'build' else None)
+        if duration is not None:
+            interval = (duration - elapsed) / 2.0
+        else:
+            interval = elapsed / 4.0
+
+        return max(self.min_interval, min(self.max_interval, interval))
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""
+Appveyor Python Client offline benchmarks.
+
+Runs the client hot paths against a local fake Appveyor server and reports
+requests per second, per call overhead, memory per 10k history records and
+log streaming throughput.
+
+::
+
+    python benchmarks/bench.py --json results.json
+    python benchmarks/bench.py --baseline results.json --tolerance 0.2
+
+With `--baseline` the process exits with status 1 if any result regressed
+by more than `tolerance` (a fraction) compared to the baseline run.
+"""
+
+from __future__ import print_function
+
+# Standard library imports
+import argparse
+import gc
+import json
+import os
+import sys
+
+try:
+    # Standard library imports
+    import tracemalloc
+except ImportError:  # Python 2
+    tracemalloc = None
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+# Third party imports
+import requests  # noqa: E402
+
+# Local imports
+from appveyor_client import AppveyorClient  # noqa: E402
+from appveyor_client.transport import MemoryTransport  # noqa: E402
+from appveyor_client.utils import timer  # noqa: E402
+from fake_server import (ACCOUNT_NAME, PROJECT_SLUG,  # noqa: E402
+                         FakeAppveyorServer)
+
+# Result name -> True if higher values are better, None if informational
+HIGHER_IS_BETTER = {
+    'requests_per_second': True,
+    'concurrent_requests_per_second': True,
+    'call_us': False,
+    'call_overhead_us': None,
+    'history_kb_per_10k_dicts': False,
+    'history_kb_per_10k_models': False,
+    'log_mb_per_second': True,
+    'log_lines_per_second': True,
+}
+
+UNITS = {
+    'requests_per_second': 'req/s',
+    'concurrent_requests_per_second': 'req/s',
+    'call_us': 'us',
+    'call_overhead_us': 'us',
+    'history_kb_per_10k_dicts': 'KiB',
+    'history_kb_per_10k_models': 'KiB',
+    'log_mb_per_second': 'MiB/s',
+    'log_lines_per_second': 'lines/s',
+}
+
+
+class _NullFile(object):
+    """Binary file object discarding everything written."""
+
+    def write(self, data):
+        """Discard data."""
+
+
+def _best_of(repeat, func, *args):
+    """Return the fastest of `repeat` timed runs of func."""
+    best = None
+    for _ in range(repeat):
+        start = timer()
+        func(*args)
+        elapsed = timer() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+# --- Benchmarks
+def bench_requests(client, count, repeat):
+    """Sequential and concurrent small GET requests per second."""
+    def sequential():
+        for _ in range(count):
+            client.projects.last_build(ACCOUNT_NAME, PROJECT_SLUG)
+
+    projects = [(ACCOUNT_NAME, 'project-{}'.format(index))
+                for index in range(count)]
+
+    def concurrent():
+        for result in client.projects.last_builds(projects):
+            if result.error is not None:
+                raise result.error
+
+    return {
+        'requests_per_second': count / _best_of(repeat, sequential),
+        'concurrent_requests_per_second':
+        count / _best_of(repeat, concurrent),
+    }
+
+
+def bench_overhead(token, server, count, repeat):
+    """
+    Time spent in the client per call, on top of a bare requests call.
+
+    Both sides are served by the same in-memory transport, so server and
+    network noise do not hide the client overhead. The overhead is the
+    difference of two similar timings and is only informational, `call_us`
+    is the value checked for regressions.
+    """
+    url = '{}api/projects/{}/{}'.format(server.url, ACCOUNT_NAME, PROJECT_SLUG)
+    transport = MemoryTransport()
+    transport.add('GET /api/projects/{account_name}/{project_slug}',
+                  server.history(1))
+    client = AppveyorClient(token, endpoint=server.url, transport=transport)
+    session = requests.Session()
+    session.mount(server.url, transport)
+
+    def bare():
+        for _ in range(count):
+            session.get(url).json()
+
+    def wrapped():
+        for _ in range(count):
+            client.projects.last_build(ACCOUNT_NAME, PROJECT_SLUG)
+
+    wrapped_time = _best_of(repeat, wrapped) / count
+    bare_time = _best_of(repeat, bare) / count
+    return {
+        'call_us': wrapped_time * 1e6,
+        'call_overhead_us': (wrapped_time - bare_time) * 1e6,
+    }
+
+
+def bench_history_memory(token, server, records):
+    """Memory held by 10k history records, as dicts and as models."""
+    if tracemalloc is None:
+        return {}
+
+    results = {}
+    for name, models in (('dicts', False), ('models', True)):
+        client = AppveyorClient(token, endpoint=server.url, models=models)
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        builds = list(client.projects.iter_history(
+            ACCOUNT_NAME, PROJECT_SLUG, limit=records, records_per_page=100))
+        gc.collect()
+        used = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        per_10k = used * 10000.0 / max(len(builds), 1)
+        results['history_kb_per_10k_' + name] = per_10k / 1024
+        del builds
+    return results
+
+
+def bench_logs(client, server, repeat):
+    """Build log download throughput, in bytes and in lines."""
+    def download():
+        client.builds.download_log('1-0', _NullFile())
+
+    lines = [0]
+
+    def iterate():
+        lines[0] = sum(1 for _ in client.builds.log_lines('1-0'))
+
+    size = server.log_size / float(1 << 20)
+    download_time = _best_of(repeat, download)
+    iterate_time = _best_of(repeat, iterate)
+    return {
+        'log_mb_per_second': size / download_time,
+        'log_lines_per_second': lines[0] / iterate_time,
+    }
+
+
+def run(args):
+    """Run all benchmarks and return their results."""
+    server = FakeAppveyorServer(
+        latency=args.latency,
+        builds=max(args.records, 1),
+        log_size=args.log_size)
+    results = {}
+    with server:
+        client = AppveyorClient(args.token, endpoint=server.url)
+        results.update(bench_requests(client, args.requests, args.repeat))
+        results.update(bench_overhead(args.token, server, args.requests,
+                                      args.repeat))
+        results.update(bench_history_memory(args.token, server, args.records))
+        results.update(bench_logs(client, server, args.repeat))
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return descriptions of the results regressed against a baseline."""
+    regressions = []
+    for name, value in sorted(results.items()):
+        base = baseline.get(name)
+        if not base or HIGHER_IS_BETTER[name] is None:
+            continue
+
+        if HIGHER_IS_BETTER[name]:
+            change = (base - value) / base
+        else:
+            change = (value - base) / base
+
+        if change > tolerance:
+            regressions.append('{}: {:.1f} {} (baseline {:.1f}, {:.0%} '
+                               'worse)'.format(name, value, UNITS[name], base,
+                                               change))
+    return regressions
+
+
+def main(argv=None):
+    """Run the benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--requests', type=int, default=500,
+                        help='requests per request benchmark run')
+    parser.add_argument('--records', type=int, default=10000,
+                        help='history records for the memory benchmark')
+    parser.add_argument('--log-size', type=int, default=16 << 20,
+                        help='build log size in bytes')
+    parser.add_argument('--latency', type=float, default=0,
+                        help='fake server latency per request in seconds')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='runs per benchmark, the best one is kept')
+    parser.add_argument('--token', default='benchmark-token')
+    parser.add_argument('--json', help='write results to this json file')
+    parser.add_argument('--baseline', help='json results to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed regression against the baseline')
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    for name, value in sorted(results.items()):
+        print('{:<34} {:>14.1f} {}'.format(name, value, UNITS[name]))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print('REGRESSION ' + regression)
+
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Gonzalo Pena-Castellanos (@goanpeca)
+#
+# Licensed under the terms of the MIT License
+# (See LICENSE.txt for details)
+# -----------------------------------------------------------------------------
+"""Local stand in for the Appveyor api, used by the benchmarks."""
+
+# Standard library imports
+import datetime
+import json
+import re
+import threading
+import time
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import parse_qs, urlparse
+except ImportError:  # Python 2
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import parse_qs, urlparse
+
+ACCOUNT_NAME = 'bench'
+PROJECT_SLUG = 'project'
+EPOCH = datetime.datetime(2017, 1, 1)
+
+LOG_LINE = (b'[00:00:01] Collecting appveyor-client... building wheel for '
+            b'appveyor-client (setup.py) ... done\n')
+
+
+def _timestamp(seconds):
+    """Return an api timestamp `seconds` after the fake epoch."""
+    value = EPOCH + datetime.timedelta(seconds=seconds)
+    return value.strftime('%Y-%m-%dT%H:%M:%S.%f0+00:00')
+
+
+def make_build(build_id, jobs=2, padding=0):
+    """Return a fake build dictionary shaped like the api ones."""
+    created = build_id * 600
+    build = {
+        'buildId': build_id,
+        'buildNumber': build_id,
+        'version': '1.0.{}'.format(build_id),
+        'message': 'Commit message {}'.format(build_id),
+        'messageExtended': 'x' * padding,
+        'branch': 'master' if build_id % 4 else 'feature',
+        'isTag': False,
+        'commitId': '{:040x}'.format(build_id),
+        'authorName': 'Author {}'.format(build_id % 5),
+        'authorUsername': 'author{}'.format(build_id % 5),
+        'committerName': 'Author {}'.format(build_id % 5),
+        'committerUsername': 'author{}'.format(build_id % 5),
+        'status': 'failed' if build_id % 7 == 0 else 'success',
+        'messages': [],
+        'committed': _timestamp(created - 60),
+        'started': _timestamp(created + 5),
+        'finished': _timestamp(created + 300 + build_id % 60),
+        'created': _timestamp(created),
+        'updated': _timestamp(created + 300 + build_id % 60),
+        'jobs': [],
+    }
+    for index in range(jobs):
+        build['jobs'].append({
+            'jobId': '{}-{}'.format(build_id, index),
+            'name': 'Environment: PYTHON_VERSION={}'.format(index),
+            'osType': 'Windows',
+            'allowFailure': False,
+            'messagesCount': 0,
+            'compilationMessagesCount': 0,
+            'compilationErrorsCount': 0,
+            'compilationWarningsCount': 0,
+            'testsCount': 10,
+            'passedTestsCount': 10,
+            'failedTestsCount': 0,
+            'artifactsCount': 0,
+            'status': build['status'],
+            'started': build['started'],
+            'finished': build['finished'],
+            'created': build['created'],
+            'updated': build['updated'],
+        })
+    return build
+
+
+class FakeAppveyorServer(ThreadingMixIn, HTTPServer):
+    """
+    Threaded HTTP server emulating the Appveyor api.
+
+    Serves projects, builds, project history (paged with `startBuildId`),
+    build logs (with `Range` support), environments and deployments. Every
+    request is delayed by `latency` seconds, history holds `builds` builds
+    of `jobs` jobs each (padded with `padding` bytes) and logs are
+    `log_size` bytes long.
+
+    ::
+
+        server = FakeAppveyorServer(latency=0.001)
+        server.start()
+        client = AppveyorClient('token', endpoint=server.url)
+        ...
+        server.stop()
+    """
+
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self,
+                 latency=0,
+                 builds=10000,
+                 jobs=2,
+                 padding=0,
+                 log_size=1 << 20,
+                 host='127.0.0.1',
+                 port=0):
+        """Threaded HTTP server emulating the Appveyor api."""
+        HTTPServer.__init__(self, (host, port), _Handler)
+        self.latency = latency
+        self.builds = builds
+        self.jobs = jobs
+        self.padding = padding
+        self.log_size = log_size
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._log = None
+
+    @property
+    def url(self):
+        """Return the endpoint url of the server."""
+        return 'http://{}:{}/'.format(*self.server_address[:2])
+
+    def start(self):
+        """Serve requests in a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the socket."""
+        self.shutdown()
+        self.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        """Start the server."""
+        return self.start()
+
+    def __exit__(self, *args):
+        """Stop the server."""
+        self.stop()
+
+    # --- Data
+    def build(self, build_id):
+        """Return a build of the fake history."""
+        return make_build(build_id, jobs=self.jobs, padding=self.padding)
+
+    def project(self):
+        """Return the fake project."""
+        return {
+            'projectId': 1,
+            'accountId': 1,
+            'accountName': ACCOUNT_NAME,
+            'name': PROJECT_SLUG,
+            'slug': PROJECT_SLUG,
+            'repositoryType': 'gitHub',
+            'repositoryScm': 'git',
+            'repositoryName': '{}/{}'.format(ACCOUNT_NAME, PROJECT_SLUG),
+            'repositoryBranch': 'master',
+            'isPrivate': False,
+            'builds': [],
+            'created': _timestamp(0),
+            'updated': _timestamp(0),
+        }
+
+    def history(self, records_number, start_build_id=None):
+        """Return a history page, newest first."""
+        first = self.builds if start_build_id is None else start_build_id - 1
+        last = max(first - records_number, 0)
+        return {
+            'project': self.project(),
+            'builds': [self.build(build_id)
+                       for build_id in range(first, last, -1)],
+        }
+
+    def log(self):
+        """Return the fake build log bytes."""
+        if self._log is None or len(self._log) != self.log_size:
+            repeat = self.log_size // len(LOG_LINE) + 1
+            self._log = (LOG_LINE * repeat)[:self.log_size]
+        return self._log
+
+    def environment(self, environment_id):
+        """Return a fake deployment environment."""
+        return {
+            'deploymentEnvironmentId': environment_id,
+            'name': 'environment-{}'.format(environment_id),
+            'provider': 'Webhook',
+            'created': _timestamp(0),
+        }
+
+    def deployment(self, deployment_id):
+        """Return a fake deployment."""
+        return {
+            'deploymentId': deployment_id,
+            'status': 'success',
+            'build': self.build(self.builds),
+            'environment': self.environment(1),
+            'jobs': [],
+            'started': _timestamp(10),
+            'finished': _timestamp(70),
+            'created': _timestamp(0),
+        }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Request handler of the fake api."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    ROUTES = (
+        ('GET', r'/api/roles$', 'roles'),
+        ('GET', r'/api/projects$', 'projects'),
+        ('GET', r'/api/projects/[^/]+/[^/]+$', 'last_build'),
+        ('GET', r'/api/projects/[^/]+/[^/]+/branch/[^/]+$', 'last_build'),
+        ('GET', r'/api/projects/[^/]+/[^/]+/build/[^/]+$', 'last_build'),
+        ('GET', r'/api/projects/[^/]+/[^/]+/history$', 'history'),
+        ('GET', r'/api/buildjobs/[^/]+/log$', 'log'),
+        ('POST', r'/api/builds$', 'start_build'),
+        ('DELETE', r'/api/builds/.+$', 'no_content'),
+        ('GET', r'/api/environments$', 'environments'),
+        ('GET', r'/api/environments/(\d+)/deployments$',
+         'environment_deployments'),
+        ('GET', r'/api/deployments/(\d+)$', 'deployment'),
+        ('POST', r'/api/deployments$', 'start_deployment'),
+        ('PUT', r'/api/deployments/stop$', 'no_content'),
+    )
+
+    def log_message(self, *args):
+        """Do not log requests."""
+
+    def _handle(self):
+        """Dispatch a request to its route."""
+        length = int(self.headers.get('Content-Length') or 0)
+        self.body = self.rfile.read(length) if length else b''
+        url = urlparse(self.path)
+        self.query = parse_qs(url.query)
+
+        server = self.server
+        with server._lock:
+            server.requests += 1
+
+        if server.latency:
+            time.sleep(server.latency)
+
+        for method, pattern, name in self.ROUTES:
+            match = re.match(pattern, url.path)
+            if method == self.command and match:
+                return getattr(self, 'do_' + name)(*match.groups())
+
+        self._send_json({'message': 'Not found'}, status=404)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+    def _send(self, body, status=200, headers=()):
+        """Send a response."""
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _send_json(self, obj, status=200):
+        """Send a json response."""
+        body = json.dumps(obj, separators=(',', ':')).encode('utf-8')
+        self._send(body, status, [('Content-Type', 'application/json')])
+
+    # --- Routes
+    def do_roles(self):
+        """Token validation."""
+        self._send_json([{'roleId': 1, 'name': 'Administrator'}])
+
+    def do_projects(self):
+        """List projects."""
+        self._send_json([self.server.project()])
+
+    def do_last_build(self):
+        """Last build of a project, branch or version."""
+        server = self.server
+        self._send_json({
+            'project': server.project(),
+            'build': server.build(server.builds),
+        })
+
+    def do_history(self):
+        """Page of the project history."""
+        records_number = int(self.query.get('recordsNumber', ['50'])[0])
+        start_build_id = self.query.get('startBuildId')
+        if start_build_id:
+            start_build_id = int(start_build_id[0])
+        self._send_json(self.server.history(records_number, start_build_id))
+
+    def do_log(self):
+        """Build log, honoring byte ranges."""
+        log = self.server.log()
+        match = re.match(r'bytes=(\d+)-$', self.headers.get('Range') or '')
+        if match is None:
+            return self._send(log, headers=[('Accept-Ranges', 'bytes')])
+
+        start = int(match.group(1))
+        if start >= len(log):
+            return self._send(b'', status=416)
+
+        content_range = 'bytes {}-{}/{}'.format(start, len(log) - 1, len(log))
+        self._send(log[start:], status=206,
+                   headers=[('Content-Range', content_range)])
+
+    def do_start_build(self):
+        """Start a build."""
+        self._send_json(self.server.build(self.server.builds + 1))
+
+    def do_environments(self):
+        """List environments."""
+        self._send_json([self.server.environment(environment_id)
+                         for environment_id in range(1, 11)])
+
+    def do_environment_deployments(self, environment_id):
+        """Deployments of an environment."""
+        server = self.server
+        self._send_json({
+            'environment': server.environment(int(environment_id)),
+            'deployments': [{
+                'deployment': server.deployment(deployment_id),
+                'project': server.project(),
+            } for deployment_id in range(1, 11)],
+        })
+
+    def do_deployment(self, deployment_id):
+        """Get a deployment."""
+        self._send_json({'deployment': self.server.deployment(
+            int(deployment_id))})
+
+    def do_start_deployment(self):
+        """Start a deployment."""
+        self._send_json(self.server.deployment(1))
+
+    def do_no_content(self):
+        """Empty response for cancel and delete requests."""
+        self._send(b'', status=204)
@@ -52,6 +52,15 @@ setup(
     long_description=get_description(),
     packages=find_packages(exclude=['contrib', 'docs', 'tests*']),
     install_requires=['requests'],
+    entry_points={
+        'console_scripts': ['appveyor-client = appveyor_client.cli:main'],
+    },
+    extras_require={
+        'async': ['aiohttp'],
+        'numpy': ['numpy'],
+        'orjson': ['orjson'],
+        'parquet': ['pyarrow'],
+    },
     classifiers=[
         'Development Status :: 4 - Beta',
         'Intended Audience :: Developers',